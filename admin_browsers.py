@@ -0,0 +1,370 @@
+import threading
+import tkinter as tk
+from collections import Counter
+from tkinter import ttk, filedialog, messagebox
+
+from marketplace_core import (
+    COUNT_CAP, EXPORT_FORMATS, ORDER_SORTS, ORDER_STATUSES, USER_SORTS, OrderExporter, ValidationError, order_filter,
+    parse_order_ids, stale_filter, user_filter,
+)
+from marketplace_core.accounts import DEFAULT_USER_SORT
+from database import MAIN_DB, connect
+from marketplace_core.orders import DEFAULT_ORDER_SORT
+from virtual_list import VirtualList
+
+ALL_STATUSES = "All"
+
+
+def count_text(count, noun):
+    """Match count label; counts stop at COUNT_CAP + 1"""
+    if count > COUNT_CAP:
+        return f"{COUNT_CAP}+ {noun}"
+    return f"{count} {noun}"
+
+
+class AdminBrowser(tk.Toplevel):
+    """Filterable, keyset-paged admin listing with a capped match count.
+
+    Subclasses add their filter fields to self.filter_frame and implement
+    read_filters, fetch_page and count. source(conn) returns the service
+    (or marketplace_client) to query; both run on the executor.
+    """
+
+    noun = "rows"
+
+    def __init__(self, root, executor, source, title, columns, format_row, sorts, default_sort):
+        super().__init__(root)
+        self.executor = executor
+        self.source = source
+        self.sorts = sorts
+        self.title(title)
+        self.geometry("900x600")
+
+        self.filter_frame = ttk.Frame(self)
+        self.filter_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+
+        action_frame = ttk.Frame(self)
+        action_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(action_frame, text="Sort by:").pack(side=tk.LEFT)
+        self.sort_labels = {label: sort for sort, (label, _, _) in sorts.items()}
+        self.sort_var = tk.StringVar(value=sorts[default_sort][0])
+        sort_combo = ttk.Combobox(action_frame, textvariable=self.sort_var, values=list(self.sort_labels),
+                                  state="readonly", width=20)
+        sort_combo.pack(side=tk.LEFT, padx=5)
+        sort_combo.bind("<<ComboboxSelected>>", self.apply_filters)
+        ttk.Button(action_frame, text="Apply", command=self.apply_filters).pack(side=tk.LEFT, padx=5)
+        ttk.Button(action_frame, text="Clear", command=self.clear_filters).pack(side=tk.LEFT)
+        self.count_var = tk.StringVar()
+        ttk.Label(action_frame, textvariable=self.count_var).pack(side=tk.RIGHT)
+        self.bind("<Return>", self.apply_filters)
+
+        self.filters = None
+        self.sort = default_sort
+        self.list = VirtualList(self, columns, self.fetch_page, executor=executor, format_row=format_row)
+        self.list.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+    def entry(self, label, width=14):
+        """Add a labelled filter entry and return it"""
+        ttk.Label(self.filter_frame, text=label).pack(side=tk.LEFT)
+        entry = ttk.Entry(self.filter_frame, width=width)
+        entry.pack(side=tk.LEFT, padx=(5, 15))
+        return entry
+
+    def apply_filters(self, event=None):
+        """Reload the list and its count for the current filter fields"""
+        try:
+            self.filters = self.read_filters()
+        except ValidationError as e:
+            messagebox.showerror("Error", str(e), parent=self)
+            return
+        self.sort = self.sort_labels[self.sort_var.get()]
+        self.list.reload()
+        self.count_var.set("Counting...")
+        self.executor.submit(self.count, self.filters, on_done=self.show_count,
+                             on_error=lambda e: self.count_var.set(""), key=(self, "count"))
+
+    def show_count(self, count):
+        if self.winfo_exists():
+            self.count_var.set(count_text(count, self.noun))
+
+    def clear_filters(self):
+        """Empty every filter field and reload"""
+        for widget in self.filter_frame.winfo_children():
+            if isinstance(widget, ttk.Combobox):
+                widget.current(0)
+            elif isinstance(widget, ttk.Entry):
+                widget.delete(0, tk.END)
+        self.apply_filters()
+
+
+class OrderBrowser(AdminBrowser):
+    """Every order, filtered by status, date range and username in SQL"""
+
+    noun = "orders"
+
+    def __init__(self, root, executor, source):
+        columns = [
+            ("ID", "Order ID", 80),
+            ("User", "Username", 150),
+            ("Date", "Date", 160),
+            ("Total", "Total", 100),
+            ("Status", "Status", 100)
+        ]
+        super().__init__(root, executor, source, "All Orders", columns,
+                         lambda row: (row.id, row.username, row.order_date, f"${row.total_amount:.2f}", row.status),
+                         ORDER_SORTS, DEFAULT_ORDER_SORT)
+        ttk.Label(self.filter_frame, text="Status:").pack(side=tk.LEFT)
+        self.status_combo = ttk.Combobox(self.filter_frame, values=(ALL_STATUSES, *ORDER_STATUSES),
+                                         state="readonly", width=10)
+        self.status_combo.current(0)
+        self.status_combo.pack(side=tk.LEFT, padx=(5, 15))
+        self.status_combo.bind("<<ComboboxSelected>>", self.apply_filters)
+        self.date_from = self.entry("From (YYYY-MM-DD):", 11)
+        self.date_to = self.entry("To:", 11)
+        self.username = self.entry("Username:")
+        self.apply_filters()
+
+    def read_filters(self):
+        status = self.status_combo.get()
+        return order_filter(None if status == ALL_STATUSES else status, self.date_from.get().strip(),
+                            self.date_to.get().strip(), self.username.get())
+
+    def fetch_page(self, conn, cursor, limit):
+        """Fetch one page of matching orders (worker thread)"""
+        return self.source(conn).page_all_orders(self.filters, self.sort, cursor, limit)
+
+    def count(self, conn, filters):
+        """Count matching orders up to the cap (worker thread)"""
+        return self.source(conn).count_all_orders(filters)
+
+
+class UserBrowser(AdminBrowser):
+    """Every user, filtered by username and email prefix in SQL"""
+
+    noun = "users"
+
+    def __init__(self, root, executor, source):
+        columns = [
+            ("ID", "User ID", 80),
+            ("Username", "Username", 150),
+            ("Email", "Email", 250),
+            ("Name", "Full Name", 200)
+        ]
+        super().__init__(root, executor, source, "All Users", columns,
+                         lambda row: (row.id, row.username, row.email, f"{row.firstname} {row.lastname}"),
+                         USER_SORTS, DEFAULT_USER_SORT)
+        self.username = self.entry("Username starts with:")
+        self.email = self.entry("Email starts with:", 20)
+        self.apply_filters()
+
+    def read_filters(self):
+        return user_filter(self.username.get(), self.email.get())
+
+    def fetch_page(self, conn, cursor, limit):
+        """Fetch one page of matching users (worker thread)"""
+        return self.source(conn).page_users(self.filters, self.sort, cursor, limit)
+
+    def count(self, conn, filters):
+        """Count matching users up to the cap (worker thread)"""
+        return self.source(conn).count_users(filters)
+
+
+class BulkStatusDialog(tk.Toplevel):
+    """Move many orders to one status in a single transaction.
+
+    The orders are either pasted ids or every order in a status placed at
+    least N days ago. The change runs on the executor; afterwards each
+    order's previous status and outcome are listed, so orders that were
+    missing or could not move that way are easy to follow up.
+    """
+
+    def __init__(self, root, executor, source, on_change=None):
+        super().__init__(root)
+        self.executor = executor
+        self.source = source
+        self.on_change = on_change
+        self.title("Bulk Order Status")
+        self.geometry("520x560")
+
+        form = ttk.Frame(self, padding=10)
+        form.pack(fill=tk.X)
+        self.mode_var = tk.StringVar(value="ids")
+        ttk.Radiobutton(form, text="Order IDs (comma, space or newline separated):", variable=self.mode_var,
+                        value="ids").grid(row=0, column=0, columnspan=5, sticky=tk.W)
+        self.ids_text = tk.Text(form, height=5, width=60)
+        self.ids_text.grid(row=1, column=0, columnspan=5, sticky=tk.EW, pady=5)
+        ttk.Radiobutton(form, text="Every order in status", variable=self.mode_var,
+                        value="stale").grid(row=2, column=0, sticky=tk.W)
+        self.from_combo = ttk.Combobox(form, values=ORDER_STATUSES, state="readonly", width=10)
+        self.from_combo.current(0)
+        self.from_combo.grid(row=2, column=1, padx=5)
+        ttk.Label(form, text="placed at least").grid(row=2, column=2)
+        self.days_entry = ttk.Entry(form, width=4)
+        self.days_entry.insert(0, "2")
+        self.days_entry.grid(row=2, column=3, sticky=tk.W, padx=5)
+        ttk.Label(form, text="days ago").grid(row=2, column=4, sticky=tk.W)
+
+        ttk.Label(form, text="New status:").grid(row=3, column=0, sticky=tk.W, pady=10)
+        self.status_combo = ttk.Combobox(form, values=ORDER_STATUSES, state="readonly", width=10)
+        self.status_combo.current(ORDER_STATUSES.index("shipped"))
+        self.status_combo.grid(row=3, column=1, padx=5)
+        self.apply_button = ttk.Button(form, text="Apply", command=self.apply)
+        self.apply_button.grid(row=3, column=2, columnspan=2)
+
+        self.summary_var = tk.StringVar()
+        ttk.Label(self, textvariable=self.summary_var).pack(fill=tk.X, padx=10)
+        results_frame = ttk.Frame(self)
+        results_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.results = ttk.Treeview(results_frame, columns=("ID", "Previous", "Result"), show="headings")
+        for column, width in (("ID", 100), ("Previous", 120), ("Result", 120)):
+            self.results.heading(column, text=column)
+            self.results.column(column, width=width)
+        scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.results.yview)
+        self.results.configure(yscrollcommand=scrollbar.set)
+        self.results.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    def apply(self):
+        """Confirm and run the transition on the executor"""
+        status = self.status_combo.get()
+        try:
+            if self.mode_var.get() == "ids":
+                order_ids = parse_order_ids(self.ids_text.get("1.0", tk.END))
+                question = f"Move {len(order_ids)} order(s) to {status}?"
+                fn, target = self.transition_orders, order_ids
+            else:
+                filters = stale_filter(self.from_combo.get(), self.days_entry.get().strip())
+                question = (f"Move every {filters.status} order placed at least {filters.min_age_days} day(s) ago "
+                            f"to {status}?")
+                fn, target = self.transition_matching, filters
+        except ValidationError as e:
+            messagebox.showerror("Error", str(e), parent=self)
+            return
+        if not messagebox.askyesno("Confirm", question, parent=self):
+            return
+        self.apply_button.state(["disabled"])
+        self.summary_var.set("Updating...")
+        self.executor.submit(fn, target, status, on_done=self.show_results, on_error=self.failed)
+
+    def transition_orders(self, conn, order_ids, status):
+        """Apply the transition to pasted ids (worker thread)"""
+        return self.source(conn).transition_orders(order_ids, status)
+
+    def transition_matching(self, conn, filters, status):
+        """Apply the transition to every matching order (worker thread)"""
+        return self.source(conn).transition_matching(filters, status)
+
+    def failed(self, error):
+        if self.winfo_exists():
+            self.apply_button.state(["!disabled"])
+            self.summary_var.set("")
+            messagebox.showerror("Error", f"Status update failed, no order was changed: {error}", parent=self)
+
+    def show_results(self, results):
+        """List each order's outcome under a per-outcome summary"""
+        if self.on_change:
+            self.on_change()
+        if not self.winfo_exists():
+            return
+        self.apply_button.state(["!disabled"])
+        self.results.delete(*self.results.get_children())
+        for result in results:
+            self.results.insert("", tk.END, values=(result.order_id, result.previous or "-", result.outcome))
+        counts = Counter(result.outcome for result in results)
+        self.summary_var.set(", ".join(f"{count} {outcome}" for outcome, count in counts.items())
+                             or "No orders matched")
+
+
+class ExportDialog(tk.Toplevel):
+    """Export orders, their items and payments to CSV or JSON Lines.
+
+    The export streams from the local database on a thread and connection
+    of its own, so a long export neither blocks the window nor holds one
+    of the browsers' executor workers. Its row count, result and error
+    are picked up by polling.
+    """
+
+    def __init__(self, root, db_path=MAIN_DB):
+        super().__init__(root)
+        self.db_path = db_path
+        self.exported = 0
+        self.thread = None
+        self.outcome = None
+        self.title("Export Orders")
+        self.geometry("460x300")
+
+        form = ttk.Frame(self, padding=10)
+        form.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(form, text="Format:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        self.format_combo = ttk.Combobox(form, values=EXPORT_FORMATS, state="readonly", width=8)
+        self.format_combo.current(0)
+        self.format_combo.grid(row=0, column=1, sticky=tk.W)
+        self.gzip_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(form, text="gzip", variable=self.gzip_var).grid(row=0, column=2, sticky=tk.W)
+        ttk.Label(form, text="From (YYYY-MM-DD):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.date_from = ttk.Entry(form, width=12)
+        self.date_from.grid(row=1, column=1, sticky=tk.W)
+        ttk.Label(form, text="To:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.date_to = ttk.Entry(form, width=12)
+        self.date_to.grid(row=2, column=1, sticky=tk.W)
+        ttk.Label(form, text="Only new since export named:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        self.since = ttk.Entry(form, width=16)
+        self.since.grid(row=3, column=1, columnspan=2, sticky=tk.W)
+        self.export_button = ttk.Button(form, text="Export...", command=self.start)
+        self.export_button.grid(row=4, column=0, columnspan=3, pady=15)
+        self.status_var = tk.StringVar(value="Leave the dates empty to export every order.")
+        ttk.Label(form, textvariable=self.status_var, wraplength=420).grid(row=5, column=0, columnspan=3, sticky=tk.W)
+
+    def start(self):
+        """Ask for the file and run the export on its own thread"""
+        fmt = self.format_combo.get()
+        extension = f".{fmt}" + (".gz" if self.gzip_var.get() else "")
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=extension,
+                                            filetypes=[(fmt.upper(), f"*{extension}")])
+        if not path:
+            return
+        self.exported = 0
+        self.outcome = None
+        self.export_button.state(["disabled"])
+        self.thread = threading.Thread(target=self.export, name="order-export", daemon=True,
+                                       args=(path, fmt, self.date_from.get().strip(), self.date_to.get().strip(),
+                                             self.since.get().strip() or None, self.gzip_var.get()))
+        self.thread.start()
+        self.poll()
+
+    def export(self, path, fmt, date_from, date_to, since, compress):
+        """Stream the export to path and keep its (result, error) for poll (export thread)"""
+        conn = connect(self.db_path)
+        try:
+            result = OrderExporter(conn).export(path, fmt, date_from, date_to, since, compress,
+                                                progress=lambda rows: setattr(self, "exported", rows))
+            self.outcome = (result, None)
+        except Exception as e:
+            self.outcome = (None, e)
+        finally:
+            conn.close()
+
+    def poll(self):
+        """Show progress until the export thread ends, then its outcome"""
+        if not self.winfo_exists():
+            return
+        if self.thread.is_alive():
+            self.status_var.set(f"Exported {self.exported:,} rows...")
+            self.after(200, self.poll)
+            return
+        result, error = self.outcome
+        if error is not None:
+            self.failed(error)
+        else:
+            self.finished(result)
+
+    def finished(self, result):
+        if self.winfo_exists():
+            self.export_button.state(["!disabled"])
+            self.status_var.set(f"Wrote {result.rows:,} rows for {result.orders:,} orders to {result.path}")
+
+    def failed(self, error):
+        if self.winfo_exists():
+            self.export_button.state(["!disabled"])
+            self.status_var.set("")
+            messagebox.showerror("Error", f"Export failed: {error}", parent=self)
@@ -1,7 +1,14 @@
 import sqlite3
 import tkinter as tk
 from tkinter import ttk, messagebox
-import hashlib
+from migrations import migrate
+from admin_browsers import BulkStatusDialog, ExportDialog, OrderBrowser, UserBrowser
+from sales_dashboard import SalesDashboard
+from db_executor import DatabaseExecutor
+import os
+from database import MAIN_DB, connect, health_check
+from marketplace_client import SERVER_ENV, MarketplaceClient
+from marketplace_core import ORDER_STATUSES, AccountService, AuthenticationError, NotFoundError, OrderService, SalesService
 
 class AdminTerminal:
     def __init__(self, root):
@@ -11,11 +18,15 @@ class AdminTerminal:
         self.root.resizable(False, False)  # Prevent resizing for consistent layout
         
         # Database connections
-        self.conn_main = sqlite3.connect("jewelry_marketplace.db")
-        self.conn_main.row_factory = sqlite3.Row
-        self.cur_main = self.conn_main.cursor()
-        self.conn_hash = sqlite3.connect("hashed_passwords.db")
-        self.cur_hash = self.conn_hash.cursor()
+        self.conn_main = connect(MAIN_DB)
+        migrate(self.conn_main)
+        # Browsing queries run on worker threads so large listings never block the UI
+        self.db = DatabaseExecutor(self.root, MAIN_DB)
+        self.orders = OrderService(self.conn_main)
+        # With a marketplace_server configured, admin reads and status changes go through it
+        self.remote = MarketplaceClient(os.environ[SERVER_ENV]) if os.environ.get(SERVER_ENV) else None
+        for problem in health_check(self.conn_main):
+            print(f"Database health check: {problem}")
         
         # Setup style
         self.style = ttk.Style()
@@ -50,52 +61,40 @@ class AdminTerminal:
         # Set focus to username field
         self.username_entry.focus_set()
     
-    def hash_password(self, password):
-        """Hash password using SHA-256"""
-        print(f"Hashing string: '{password}'")  # Debug what’s being hashed
-        return hashlib.sha256(password.encode()).hexdigest()
-    
     def login(self):
         """Handle admin login"""
         username = self.username_entry.get().strip()
         password = self.password_entry.get().strip()
         
-        print(f"Raw username input: '{username}'")
-        print(f"Raw password input: '{password}'")
-        
         if not username or not password:
             messagebox.showerror("Error", "Please enter both username and password")
             return
         
-        try:
-            self.cur_main.execute("SELECT * FROM Users WHERE username = ?", (username,))
-            user = self.cur_main.fetchone()
-            
-            if user:
-                print(f"Found user: {user['username']}, ID: {user['id']}")
-                self.cur_hash.execute("SELECT hashed_password FROM HashedPasswords WHERE user_id = ?", (user['id'],))
-                stored_hash = self.cur_hash.fetchone()
-                
-                if stored_hash:
-                    input_hash = self.hash_password(password)  # Ensure password is used
-                    print(f"Stored hash: {stored_hash[0]}")
-                    print(f"Input hash: {input_hash}")
-                    if stored_hash[0] == input_hash and username == "admin":
-                        print("Login successful")
-                        messagebox.showinfo("Success", "Login successful")
-                        self.show_admin_panel()
-                    else:
-                        print("Failed: Invalid credentials or not an admin user")
-                        messagebox.showerror("Error", "Invalid credentials or not an admin user")
-                else:
-                    print("No hashed password found for user")
-                    messagebox.showerror("Error", "No hashed password found for user")
-            else:
-                print(f"User not found: {username}")
-                messagebox.showerror("Error", "User not found")
-        except sqlite3.Error as e:
-            print(f"Database error: {e}")
-            messagebox.showerror("Error", f"Database error: {e}")
+        # The KDF runs on a worker so the login screen stays responsive
+        self.db.submit(self.authenticate, username, password, on_done=self.finish_login,
+                       on_error=lambda e: self.login_failed(username, e), key="login")
+    
+    def authenticate(self, conn, username, password):
+        """Return the admin User or raise AuthenticationError (worker thread)"""
+        if self.remote:
+            return self.remote.authenticate_admin(username, password)
+        # The credential database is attached to the worker's connection
+        return AccountService(conn).authenticate_admin(username, password)
+    
+    def login_failed(self, username, error):
+        """Report a rejected or failed login"""
+        if isinstance(error, AuthenticationError):
+            print(f"Admin login failed for '{username}': {error}")
+            messagebox.showerror("Error", str(error))
+        else:
+            print(f"Database error: {error}")
+            messagebox.showerror("Error", f"Database error: {error}")
+    
+    def finish_login(self, user):
+        """Open the admin panel for an authenticated admin"""
+        print(f"Admin login: {user.username}, ID: {user.id}")
+        messagebox.showinfo("Success", "Login successful")
+        self.show_admin_panel()
         
     def show_admin_panel(self):
         """Show admin panel after successful login"""
@@ -113,37 +112,14 @@ class AdminTerminal:
         ttk.Button(admin_frame, text="View All Orders", command=self.view_orders).grid(row=1, column=0, pady=10, padx=10, sticky=tk.EW)
         ttk.Button(admin_frame, text="Update Order Status", command=self.update_order_status).grid(row=1, column=1, pady=10, padx=10, sticky=tk.EW)
         ttk.Button(admin_frame, text="View All Users", command=self.view_users).grid(row=2, column=0, pady=10, padx=10, sticky=tk.EW)
-        ttk.Button(admin_frame, text="Logout", command=self.logout).grid(row=3, column=0, columnspan=2, pady=20, sticky=tk.EW)
+        ttk.Button(admin_frame, text="Bulk Status Update", command=self.bulk_update_status).grid(row=2, column=1, pady=10, padx=10, sticky=tk.EW)
+        ttk.Button(admin_frame, text="Sales Dashboard", command=self.view_sales).grid(row=3, column=0, pady=10, padx=10, sticky=tk.EW)
+        ttk.Button(admin_frame, text="Export Orders", command=self.export_orders).grid(row=3, column=1, pady=10, padx=10, sticky=tk.EW)
+        ttk.Button(admin_frame, text="Logout", command=self.logout).grid(row=4, column=0, columnspan=2, pady=20, sticky=tk.EW)
     
     def view_orders(self):
-        """View all orders"""
-        orders_window = tk.Toplevel(self.root)
-        orders_window.title("All Orders")
-        orders_window.geometry("800x600")
-        
-        tree = ttk.Treeview(orders_window, columns=("ID", "User", "Date", "Total", "Status"), show="headings")
-        tree.heading("ID", text="Order ID")
-        tree.heading("User", text="Username")
-        tree.heading("Date", text="Date")
-        tree.heading("Total", text="Total")
-        tree.heading("Status", text="Status")
-        tree.column("ID", width=100)
-        tree.column("User", width=150)
-        tree.column("Date", width=150)
-        tree.column("Total", width=100)
-        tree.column("Status", width=100)
-        
-        self.cur_main.execute("""
-            SELECT o.id, u.username, o.order_date, o.total_amount, o.status
-            FROM Orders o
-            JOIN Users u ON o.user_id = u.id
-            ORDER BY o.order_date DESC
-        """)
-        
-        for row in self.cur_main.fetchall():
-            tree.insert("", tk.END, values=(row['id'], row['username'], row['order_date'], f"${row['total_amount']:.2f}", row['status']))
-        
-        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        """Browse all orders, filtered and paged in SQL"""
+        OrderBrowser(self.root, self.db, lambda conn: self.remote or OrderService(conn))
     
     def update_order_status(self):
         """Update order status"""
@@ -151,10 +127,9 @@ class AdminTerminal:
         if not order_id:
             return
         
-        self.cur_main.execute("SELECT status FROM Orders WHERE id = ?", (order_id,))
-        order = self.cur_main.fetchone()
+        status = (self.remote or self.orders).order_status(order_id)
         
-        if not order:
+        if status is None:
             messagebox.showerror("Error", "Order not found")
             return
         
@@ -163,53 +138,47 @@ class AdminTerminal:
         status_window.geometry("300x200")
         
         ttk.Label(status_window, text="Select New Status:").pack(pady=10)
-        status_var = tk.StringVar(value=order['status'])
+        status_var = tk.StringVar(value=status)
         status_combo = ttk.Combobox(status_window, textvariable=status_var, state="readonly")
-        status_combo['values'] = ('pending', 'shipped', 'delivered')
+        status_combo['values'] = ORDER_STATUSES
         status_combo.pack(pady=10)
         
         def submit_status():
             try:
-                new_status = status_var.get()
-                self.cur_main.execute("UPDATE Orders SET status = ? WHERE id = ?", (new_status, order_id))
-                self.conn_main.commit()
+                (self.remote or self.orders).set_status(order_id, status_var.get())
                 messagebox.showinfo("Success", "Order status updated")
                 status_window.destroy()
+            except NotFoundError as e:
+                messagebox.showerror("Error", str(e))
             except sqlite3.Error as e:
                 messagebox.showerror("Error", f"Database error: {e}")
         
         ttk.Button(status_window, text="Update Status", command=submit_status).pack(pady=15)
     
+    def bulk_update_status(self):
+        """Move many orders to one status in a single transaction"""
+        BulkStatusDialog(self.root, self.db, lambda conn: self.remote or OrderService(conn))
+    
     def view_users(self):
-        """View all users"""
-        users_window = tk.Toplevel(self.root)
-        users_window.title("All Users")
-        users_window.geometry("800x600")
-        
-        tree = ttk.Treeview(users_window, columns=("ID", "Username", "Email", "Name"), show="headings")
-        tree.heading("ID", text="User ID")
-        tree.heading("Username", text="Username")
-        tree.heading("Email", text="Email")
-        tree.heading("Name", text="Full Name")
-        tree.column("ID", width=100)
-        tree.column("Username", width=150)
-        tree.column("Email", width=200)
-        tree.column("Name", width=200)
-        
-        self.cur_main.execute("SELECT id, username, email, firstname, lastname FROM Users")
-        for row in self.cur_main.fetchall():
-            tree.insert("", tk.END, values=(row['id'], row['username'], row['email'], f"{row['firstname']} {row['lastname']}"))
-        
-        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        """Browse all users, filtered and paged in SQL"""
+        UserBrowser(self.root, self.db, lambda conn: self.remote or AccountService(conn))
+    
+    def view_sales(self):
+        """Revenue, units and orders from the sales rollups"""
+        SalesDashboard(self.root, self.db, lambda conn: self.remote or SalesService(conn))
+    
+    def export_orders(self):
+        """Stream orders, items and payments to a CSV or JSON Lines file"""
+        ExportDialog(self.root, MAIN_DB)
     
     def logout(self):
         """Handle logout"""
+        self.db.shutdown()
         self.root.destroy()
     
     def __del__(self):
         """Cleanup database connections"""
         self.conn_main.close()
-        self.conn_hash.close()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,53 @@
+import importlib
+import sys
+import time
+
+from startup_profiler import profiler
+
+# Optional integrations, imported on first use instead of at startup.
+# Values are "module:attribute" paths so registering a backend costs nothing.
+BACKENDS = {
+    "sms": {
+        "twilio": "twilio_transport:TwilioTransport",
+        "stub": "sms_outbox:StubTransport",
+    },
+}
+
+_environment_loaded = False
+
+
+def register_backend(kind, name, target):
+    """Register a backend as a "module:attribute" path or an already loaded object"""
+    BACKENDS.setdefault(kind, {})[name] = target
+
+
+def lazy_import(module_name):
+    """Import a module on first use and record how long the import took"""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    profiler.record_lazy_import(module_name, time.perf_counter() - start)
+    return module
+
+
+def get_backend(kind, name):
+    """Return the backend registered under kind/name, importing it if needed"""
+    try:
+        target = BACKENDS[kind][name]
+    except KeyError:
+        raise ValueError(f"Unknown {kind} backend: {name}") from None
+
+    if isinstance(target, str):
+        module_name, _, attribute = target.partition(":")
+        target = getattr(lazy_import(module_name), attribute)
+        BACKENDS[kind][name] = target
+    return target
+
+
+def load_environment():
+    """Load .env settings once, the first time an integration needs them"""
+    global _environment_loaded
+    if not _environment_loaded:
+        lazy_import("dotenv").load_dotenv()
+        _environment_loaded = True
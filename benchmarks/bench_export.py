@@ -0,0 +1,69 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_outbox import create_scratch_db
+from marketplace_core import OrderExporter
+
+
+def add_orders(conn, rng, start, count, users, products):
+    """Append count orders with two items and a payment each, ids from start + 1"""
+    conn.executemany("""
+        INSERT INTO Orders (id, user_id, order_date, total_amount, status)
+        VALUES (?, ?, ?, ?, ?)
+    """, ((i, rng.randint(1, users), f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00",
+           round(rng.uniform(1, 9999), 2), rng.choice(("pending", "shipped", "delivered")))
+          for i in range(start + 1, start + count + 1)))
+    conn.executemany("""
+        INSERT INTO Order_Items (order_id, product_id, quantity, unit_price)
+        VALUES (?, ?, ?, ?)
+    """, ((i // 2, rng.randint(1, products), rng.randint(1, 3), 10.0)
+          for i in range(2 * (start + 1), 2 * (start + count + 1))))
+    conn.executemany("""
+        INSERT INTO Payments (order_id, amount, payment_method, payment_status, transaction_id)
+        VALUES (?, ?, 'Credit Card', 'completed', ?)
+    """, ((i, 10.0, f"TRANS_{i}") for i in range(start + 1, start + count + 1)))
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show export memory stays flat as the order history grows")
+    parser.add_argument("--orders", type=int, nargs="+", default=[50000, 200000, 500000],
+                        help="order counts to export at, ascending")
+    parser.add_argument("--format", default="csv", choices=("csv", "jsonl"))
+    parser.add_argument("--gzip", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    users, products = 1000, 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = create_scratch_db(os.path.join(tmp, "bench.db"))
+        conn.execute("INSERT INTO Categories (name) VALUES ('Rings')")
+        conn.executemany("""
+            INSERT INTO Users (username, password, email, firstname, lastname, address, phone)
+            VALUES (?, 'x', ?, 'Bench', 'User', '1 Bench St', '+910000000000')
+        """, [(f"user{i}", f"user{i}@example.com") for i in range(users)])
+        conn.executemany("INSERT INTO Products (name, description, price, stock_quantity, category_id) VALUES (?, '', 10, 0, 1)",
+                         [(f"Product {i}",) for i in range(products)])
+        conn.commit()
+
+        seeded = 0
+        path = os.path.join(tmp, f"orders.{args.format}" + (".gz" if args.gzip else ""))
+        for target in args.orders:
+            add_orders(conn, rng, seeded, target - seeded, users, products)
+            seeded = target
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = OrderExporter(conn).export(path)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{target:>9} orders: {result.rows:>9} rows in {elapsed:6.1f}s ({result.rows / elapsed:8.0f} rows/s), "
+                  f"peak Python memory {peak / 1024:7.0f} KiB, file {os.path.getsize(path) / 2 ** 20:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import statistics
+import time
+import tkinter as tk
+
+from gradient import GradientBackground
+
+COLOR1 = "#4ECDC4"
+COLOR2 = "#FF6B6B"
+SIZES = [(1200, 900), (1920, 1080), (2560, 1440)]
+
+
+def legacy_render(canvas, width, height):
+    """Original per-line renderer from JewelryMarketplaceApp.create_gradient"""
+    canvas.delete("gradient")
+    for i in range(height):
+        r1, g1, b1 = [int(x) for x in canvas.winfo_rgb(COLOR1)]
+        r2, g2, b2 = [int(x) for x in canvas.winfo_rgb(COLOR2)]
+        r = int(r1 + (r2 - r1) * i / height)
+        g = int(g1 + (g2 - g1) * i / height)
+        b = int(b1 + (b2 - b1) * i / height)
+        color = f'#{r:02x}{g:02x}{b:02x}'
+        canvas.create_line(0, i, width, i, fill=color, tags="gradient")
+
+
+def time_frames(root, render, repeat):
+    """Return per-frame times in milliseconds, including the Tk redraw"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render()
+        root.update_idletasks()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare gradient background frame times")
+    parser.add_argument("--repeat", type=int, default=5, help="frames per size and renderer")
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    canvas = tk.Canvas(root, highlightthickness=0)
+    canvas.pack(fill=tk.BOTH, expand=True)
+
+    print(f"{'size':>11}  {'legacy ms':>10}  {'cold ms':>10}  {'cached ms':>10}")
+    for width, height in SIZES:
+        root.geometry(f"{width}x{height}")
+        root.update()
+
+        legacy = time_frames(root, lambda: legacy_render(canvas, width, height), args.repeat)
+        canvas.delete("gradient")
+
+        def cold():
+            gradient = GradientBackground(root, canvas, COLOR1, COLOR2)
+            gradient.draw()
+            canvas.delete("gradient")
+
+        cold_times = time_frames(root, cold, args.repeat)
+
+        gradient = GradientBackground(root, canvas, COLOR1, COLOR2)
+        gradient.draw()
+
+        def cached():
+            # Force a redraw of an already rendered size
+            gradient.current_size = None
+            gradient.draw()
+
+        cached_times = time_frames(root, cached, args.repeat)
+        canvas.delete("gradient")
+
+        print(f"{width:>5}x{height:<5}  {statistics.median(legacy):>10.1f}  "
+              f"{statistics.median(cold_times):>10.1f}  {statistics.median(cached_times):>10.1f}")
+
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_outbox import create_scratch_db
+from database import connect
+from marketplace_core import AccountService, KdfParams, PasswordHasher, hash_password
+from marketplace_core.credentials import CREDENTIALS, attach_credentials
+
+PASSWORD = "correct horse battery staple"
+
+
+def seed(conn, users, params):
+    """Create users sharing one pre-computed hash in both stores, so seeding costs a single KDF"""
+    stored = hash_password(PASSWORD, params)
+    conn.executemany("""
+        INSERT INTO Users (username, password, email, firstname, lastname, address, phone)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [(f"user{i}", stored, f"user{i}@example.com", "Bench", "User", "1 Bench St", "+910000000000")
+          for i in range(users)])
+    conn.commit()
+    attach_credentials(conn)
+    conn.execute(f"INSERT INTO {CREDENTIALS}.HashedPasswords (user_id, hashed_password) SELECT id, password FROM Users")
+    conn.commit()
+
+
+def run(path, hasher, clients, logins):
+    """Log in logins times from clients threads; return (elapsed seconds, sorted latencies)"""
+    latencies = []
+    lock = threading.Lock()
+    local = threading.local()
+
+    def login(i):
+        if not hasattr(local, "accounts"):
+            local.accounts = AccountService(connect(path), hasher)
+        start = time.perf_counter()
+        user = local.accounts.login(f"user{i % clients}", PASSWORD)
+        elapsed = time.perf_counter() - start
+        assert user is not None
+        with lock:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(login, range(logins)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure scrypt login throughput and latency per worker count")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent login requests")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="KDF pool sizes to compare (default: 1 and every core)")
+    parser.add_argument("--n", type=int, default=2 ** 14)
+    parser.add_argument("--r", type=int, default=8)
+    parser.add_argument("--p", type=int, default=1)
+    parser.add_argument("--processes", action="store_true", help="run the KDF in processes instead of threads")
+    args = parser.parse_args()
+
+    params = KdfParams(args.n, args.r, args.p)
+    cores = os.cpu_count() or 1
+    workers = args.workers or sorted({1, cores})
+    print(f"scrypt n={params.n} r={params.r} p={params.p} ({128 * params.n * params.r // 1024} KiB per hash), "
+          f"{args.clients} clients, {cores} cores")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        conn = create_scratch_db(path)
+        seed(conn, args.clients, params)
+        conn.close()
+
+        for count in workers:
+            hasher = PasswordHasher(params, count, args.processes)
+            try:
+                elapsed, latencies = run(path, hasher, args.clients, args.logins)
+            finally:
+                hasher.shutdown()
+            rate = args.logins / elapsed
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[int(len(latencies) * 0.99)] * 1000
+            print(f"{count:>3} workers: {rate:8.1f} logins/s  {rate / min(count, cores):7.1f} /s per core  "
+                  f"p50 {p50:7.1f} ms  p99 {p99:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from migrations import migrate
+from sms_outbox import OutboxWorker, StubTransport, enqueue
+
+
+def create_scratch_db(path):
+    """Create an empty marketplace database at path"""
+    conn = sqlite3.connect(path)
+    with open("schema.sql", "r") as schema_file:
+        conn.executescript(schema_file.read())
+    migrate(conn)
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test registrations with the SMS outbox and a stub transport")
+    parser.add_argument("--registrations", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8, help="outbox send concurrency")
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated send latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        conn = create_scratch_db(path)
+        transport = StubTransport(latency=args.latency, failure_rate=args.failure_rate)
+        worker = OutboxWorker(path, transport, concurrency=args.concurrency, base_delay=0.05, poll_interval=0.05)
+        worker.start()
+
+        cur = conn.cursor()
+        start = time.perf_counter()
+        for i in range(args.registrations):
+            cur.execute("""
+                INSERT INTO Users (username, password, email, firstname, lastname, address, phone)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (f"user{i}", "x", f"user{i}@example.com", "Load", "Test", "1 Bench St", "+910000000000"))
+            enqueue(cur, "+910000000000", f"Welcome user{i}")
+            conn.commit()
+            worker.wake()
+        elapsed = time.perf_counter() - start
+        print(f"registrations: {args.registrations} in {elapsed:.2f}s ({args.registrations / elapsed:.0f}/s)")
+
+        while conn.execute("SELECT COUNT(*) FROM SmsOutbox WHERE status IN ('pending', 'sending')").fetchone()[0]:
+            time.sleep(0.05)
+        drained = time.perf_counter() - start
+        worker.stop()
+
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM SmsOutbox GROUP BY status").fetchall())
+        print(f"outbox drained after {drained:.2f}s: {counts}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
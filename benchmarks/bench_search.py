@@ -0,0 +1,87 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_outbox import create_scratch_db
+from catalog_repository import CatalogFilter, CatalogRepository, match_query
+
+CATEGORIES = ("Rings", "Necklaces", "Bracelets", "Earrings", "Pendants")
+COMMON_WORDS = ("gold", "silver", "diamond", "ring", "necklace", "pearl", "elegant", "classic")
+
+
+def vocabulary(rng, size):
+    """Made-up words so rare terms really are rare"""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)]
+
+
+def seed(conn, items, rng):
+    """Insert items products (and items // 10 sets); triggers fill the search index"""
+    words = vocabulary(rng, 20000)
+
+    def text(count):
+        return " ".join(rng.choice(COMMON_WORDS) if rng.random() < 0.2 else rng.choice(words) for _ in range(count))
+
+    conn.executemany("INSERT INTO Categories (name) VALUES (?)", [(name,) for name in CATEGORIES])
+    conn.executemany("""
+        INSERT INTO Products (name, description, price, stock_quantity, category_id)
+        VALUES (?, ?, ?, ?, ?)
+    """, ((text(3), text(15), round(rng.uniform(1, 9999), 2), 10, rng.randint(1, len(CATEGORIES)))
+          for _ in range(items)))
+    conn.executemany("""
+        INSERT INTO Sets (name, description, price, stock_quantity)
+        VALUES (?, ?, ?, ?)
+    """, ((text(3), text(15), round(rng.uniform(1, 9999), 2), 10) for _ in range(items // 10)))
+    conn.commit()
+    conn.execute("ANALYZE")
+    return words
+
+
+def timed(fn, repeat):
+    """Best of repeat runs, in milliseconds, and the last result"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time full-text catalog search on a large scratch catalog")
+    parser.add_argument("--items", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = create_scratch_db(os.path.join(tmp, "search.db"))
+        start = time.perf_counter()
+        words = seed(conn, args.items, rng)
+        print(f"seeded {args.items} products and their search index in {time.perf_counter() - start:.1f}s")
+
+        repository = CatalogRepository(conn)
+        searches = [
+            ("rare word", words[0]),
+            ("rare prefix", words[1][:4]),
+            ("two words", f"{words[2]} {COMMON_WORDS[0]}"),
+            ("common word", COMMON_WORDS[0]),
+        ]
+        for label, search in searches:
+            for sort in ("relevance", "price_asc", "name_asc"):
+                for category_id in (None, 1):
+                    filters = CatalogFilter(100, 5000, category_id, search)
+                    first_ms, (rows, cursor) = timed(lambda: repository.page_products(filters, sort, None, 100), args.repeat)
+                    next_ms, _ = timed(lambda: repository.page_products(filters, sort, cursor, 100), args.repeat) if cursor else (0.0, None)
+                    matches = conn.execute("SELECT COUNT(*) FROM ProductSearch WHERE ProductSearch MATCH ?",
+                                           (match_query(search),)).fetchone()[0]
+                    print(f"{label:12} {sort:10} {category_id or 'all':3} matches {matches:7}  "
+                          f"first page {first_ms:7.2f}ms  next page {next_ms:7.2f}ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import argparse
+import datetime
+import os
+import random
+import re
+import sys
+import tempfile
+
+from benchmarks.bench_outbox import create_scratch_db
+from catalog_repository import CatalogFilter, CatalogRepository, SORTS
+from change_tracker import ChangeTracker
+from marketplace_core import (
+    ORDER_SORTS, USER_SORTS, AccountService, AuthenticationError, OrderExporter, OrderFilter, OrderService,
+    SalesService, UserFilter,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose literal execute() SQL is checked; queries built at runtime
+# are captured by running them in traced_queries instead
+SOURCES = ("marketplace.py", "admin_terminal.py", "marketplace_core/accounts.py", "marketplace_core/catalog_admin.py",
+           "marketplace_core/orders.py", "marketplace_core/reviews.py")
+EXECUTE_SQL = re.compile(r'execute\(\s*("""|")(.*?)\1', re.S)
+
+CATEGORIES = ("Rings", "Necklaces", "Bracelets", "Earrings", "Pendants")
+
+# Whole-table scans that are intended, keyed by a pattern of the normalized SQL
+ALLOWED_SCANS = {
+    r"FROM Users u (WHERE \+u\.\S+ >= .* )?ORDER BY u\.id (ASC|DESC) LIMIT":
+        "first user browser page in rowid order, prefixes checked per row; LIMIT ends the scan",
+    r"Search MATCH .* ORDER BY": "search results are sorted after matching; cost follows the match count",
+    r"^SELECT count\(\*\) FROM \(SELECT 1 .* LIMIT \d+\)$": "capped counts read at most COUNT_CAP + 1 rows",
+    r"FROM Sales(Daily|ByCategory|ByItem) WHERE day BETWEEN": "rollup rows in the date range are grouped; O(days), not O(orders)",
+    r"FROM Orders o LEFT JOIN Users u .* ORDER BY o\.id, oi\.id$": "exports stream orders in id order; reading them all is the export",
+}
+
+
+def normalize(sql):
+    return " ".join(sql.split())
+
+
+def seed(conn, scale):
+    """Fill the scratch database with scale products, orders and reviews"""
+    rng = random.Random(42)
+    start = datetime.datetime(2024, 1, 1)
+
+    def timestamp():
+        return (start + datetime.timedelta(seconds=rng.randrange(365 * 24 * 3600))).strftime("%Y-%m-%d %H:%M:%S")
+
+    users = max(scale // 10, 10)
+    conn.executemany("INSERT INTO Categories (name) VALUES (?)", [(name,) for name in CATEGORIES])
+    conn.executemany("""
+        INSERT INTO Users (username, password, email, firstname, lastname, address, phone)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [(f"user{i}", "x", f"user{i}@example.com", "Plan", "Check", "1 Plan St", "+910000000000")
+          for i in range(users)])
+    conn.executemany("""
+        INSERT INTO Products (name, description, price, stock_quantity, category_id)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(f"Product {i}", "d" * 200, round(rng.uniform(1, 9999), 2), rng.randrange(100), rng.randint(1, len(CATEGORIES)))
+          for i in range(scale)])
+    conn.executemany("""
+        INSERT INTO Sets (name, description, price, stock_quantity)
+        VALUES (?, ?, ?, ?)
+    """, [(f"Set {i}", "d" * 200, round(rng.uniform(1, 9999), 2), rng.randrange(100)) for i in range(scale // 10)])
+    conn.executemany("INSERT OR IGNORE INTO Set_Items (set_id, product_id) VALUES (?, ?)",
+                     [(i // 3 + 1, rng.randint(1, scale)) for i in range(3 * (scale // 10))])
+    conn.executemany("""
+        INSERT INTO Orders (user_id, order_date, total_amount, status)
+        VALUES (?, ?, ?, ?)
+    """, [(rng.randint(1, users), timestamp(), round(rng.uniform(1, 9999), 2), rng.choice(("pending", "shipped", "delivered")))
+          for _ in range(scale)])
+    conn.executemany("""
+        INSERT INTO Order_Items (order_id, product_id, quantity, unit_price)
+        VALUES (?, ?, ?, ?)
+    """, [(i + 1, rng.randint(1, scale), 1, 10.0) for i in range(scale)])
+    conn.executemany("""
+        INSERT INTO Payments (order_id, amount, payment_method, payment_status, transaction_id)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(i + 1, 10.0, "Credit Card", "completed", f"TRANS_{i + 1}") for i in range(scale)])
+    conn.executemany("""
+        INSERT INTO Reviews (user_id, product_id, set_id, rating, comment, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(rng.randint(1, users), *((rng.randint(1, scale), None) if i % 5 else (None, rng.randint(1, scale // 10))),
+           rng.randint(1, 5), "ok", timestamp()) for i in range(scale)])
+    conn.executemany("INSERT INTO HashedPasswords (user_id, hashed_password) VALUES (?, ?)",
+                     [(i + 1, "x") for i in range(users)])
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def literal_queries():
+    """Yield (location, sql) for every literal execute() in SOURCES"""
+    for source in SOURCES:
+        with open(os.path.join(ROOT, source), "r") as source_file:
+            text = source_file.read()
+        for match in EXECUTE_SQL.finditer(text):
+            line = text.count("\n", 0, match.start()) + 1
+            yield f"{source}:{line}", match.group(2)
+
+
+def traced_queries(conn):
+    """Run the queries built at runtime and yield (location, sql) as executed"""
+    statements = []
+    conn.set_trace_callback(statements.append)
+
+    repository = CatalogRepository(conn)
+    for sort in SORTS:
+        for category_id in (None, 1):
+            filters = CatalogFilter(100, 5000, category_id)
+            _, cursor = repository.page_products(filters, sort, None, 50)
+            repository.page_products(filters, sort, cursor, 50)
+            filters = CatalogFilter(100, 5000, category_id, "prod")
+            _, cursor = repository.page_products(filters, sort, None, 50)
+            repository.page_products(filters, sort, cursor, 50)
+        for search in (None, "set"):
+            filters = CatalogFilter(100, 5000, search=search)
+            _, cursor = repository.page_sets(filters, sort, None, 50)
+            repository.page_sets(filters, sort, cursor, 50)
+    repository.product_row(1, CatalogFilter(category_id=1))
+    repository.product_row(1, CatalogFilter(category_id=1, search="prod"))
+    repository.set_row(1, CatalogFilter())
+    repository.set_row(1, CatalogFilter(search="set"))
+    repository.get_product(1)
+    repository.get_set(1)
+    repository.set_items(1)
+    repository.set_product_ids(1)
+    repository.product_summaries()
+    repository.categories()
+    for item_type in ("product", "set"):
+        for rating in (None, 5):
+            _, cursor = repository.page_reviews(item_type, 1, rating, None, 2)
+            repository.page_reviews(item_type, 1, rating, cursor, 2)
+    repository.get_review(1)
+
+    orders = OrderService(conn)
+    _, cursor = orders.page_user_orders(1, None, 5)
+    orders.page_user_orders(1, cursor, 5)
+    orders.user_order(1, 1)
+    for sort in ORDER_SORTS:
+        for filters in (OrderFilter(), OrderFilter(status="pending"), OrderFilter(username="user1"),
+                        OrderFilter(date_from="2024-01-01", date_to="2024-03-31"),
+                        OrderFilter("shipped", "2024-01-01", "2024-03-31")):
+            _, cursor = orders.page_all_orders(filters, sort, None, 5)
+            orders.page_all_orders(filters, sort, cursor or ("2024-01-01", 1), 5)
+            orders.count_all_orders(filters)
+    orders.transition_orders([1, 2, 3], "shipped")
+    # Same shape as stale_filter, narrowed to one day so few UPDATEs are traced
+    orders.transition_matching(OrderFilter("pending", date_to="2024-01-01"), "shipped")
+    orders.count_all_orders(OrderFilter("pending", min_age_days=2))
+    accounts = AccountService(conn)
+    accounts.login("user1", "x")
+    try:
+        accounts.authenticate_admin("user1", "x")
+    except AuthenticationError:
+        pass
+    accounts.get_user(1)
+    for sort in USER_SORTS:
+        for filters in (UserFilter(), UserFilter(*(("user1", None) if sort != "email_asc" else (None, "user1")))):
+            _, cursor = accounts.page_users(filters, sort, None, 5)
+            accounts.page_users(filters, sort, cursor or ("user1", 1), 5)
+            accounts.count_users(filters)
+
+    SalesService(conn).sales_dashboard("2024-01-01", "2024-03-31")
+    exporter = OrderExporter(conn)
+    for _ in exporter.rows("2024-01-01", "2024-01-31"):
+        pass
+    for _ in exporter.rows(after_order_id=exporter.last_exported("plans") or 49990):
+        pass
+
+    tracker = ChangeTracker(conn)
+    tracker.poll()
+    tracker.prune()
+
+    conn.set_trace_callback(None)
+    seen = set()
+    for sql in statements:
+        sql = normalize(sql)
+        if sql.split(" ", 1)[0].upper() in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") and sql not in seen:
+            seen.add(sql)
+            yield "traced", sql
+
+
+def plan_problems(details):
+    """Return the plan steps that scan a whole table or sort in a temp B-tree"""
+    problems = []
+    for detail in details:
+        if detail.startswith("USE TEMP B-TREE") or "AUTOMATIC" in detail:
+            problems.append(detail)
+        elif detail.startswith("SCAN ") and "INDEX" not in detail and detail != "SCAN CONSTANT ROW":
+            problems.append(detail)
+    return problems
+
+
+def check_plans(conn):
+    """Yield (location, sql, details, problems, allowed reason or None) for every shipped query"""
+    for location, sql in list(literal_queries()) + list(traced_queries(conn)):
+        params = [1] * sql.count("?")
+        details = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        allowed = next((reason for pattern, reason in ALLOWED_SCANS.items()
+                        if re.search(pattern, normalize(sql))), None)
+        yield location, sql, details, plan_problems(details), allowed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if any shipped query plans a full table scan or temp B-tree sort")
+    parser.add_argument("--scale", type=int, default=50000, help="products, orders and reviews to seed")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = create_scratch_db(os.path.join(tmp, "plans.db"))
+        seed(conn, args.scale)
+
+        checked = failures = 0
+        for location, sql, details, problems, allowed in check_plans(conn):
+            checked += 1
+            if problems and allowed is None:
+                failures += 1
+                print(f"FAIL {location}: {normalize(sql)}")
+                for problem in problems:
+                    print(f"    {problem}")
+            elif args.verbose:
+                print(f"ok   {location}: {normalize(sql)}" + (f"  [allowed: {allowed}]" if problems else ""))
+                for detail in details:
+                    print(f"    {detail}")
+        conn.close()
+
+    print(f"{checked} queries checked, {failures} with full scans or temp B-tree sorts")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+import argparse
+import hashlib
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.bench_outbox import create_scratch_db
+from catalog_repository import CatalogFilter, CatalogRepository, SORTS
+from checkout_engine import CartLine, CheckoutEngine, OutOfStockError
+
+CATEGORIES = ("Rings", "Necklaces", "Bracelets", "Earrings", "Pendants")
+PASSWORD = "shopper"
+
+
+def is_busy(error):
+    """True for SQLITE_BUSY ("database is locked") after the busy timeout ran out"""
+    return isinstance(error, sqlite3.OperationalError) and (
+        getattr(error, "sqlite_errorcode", None) == sqlite3.SQLITE_BUSY or "locked" in str(error))
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection that adds up the time spent waiting in BEGIN IMMEDIATE for the write lock"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock_wait = 0.0
+
+    def execute(self, sql, *args):
+        if not sql.startswith("BEGIN"):
+            return super().execute(sql, *args)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, *args)
+        finally:
+            self.lock_wait += time.perf_counter() - start
+
+
+def seed(conn, shoppers, products, sets, stock):
+    """Create one account per shopper and a stocked catalog"""
+    rng = random.Random(11)
+    password = hashlib.sha256(PASSWORD.encode()).hexdigest()
+    conn.executemany("INSERT INTO Categories (name) VALUES (?)", [(name,) for name in CATEGORIES])
+    conn.executemany("""
+        INSERT INTO Users (username, password, email, firstname, lastname, address, phone)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [(f"shopper{i}", password, f"shopper{i}@example.com", "Load", "Test", "1 Bench St", "+910000000000")
+          for i in range(shoppers)])
+    conn.executemany("""
+        INSERT INTO Products (name, description, price, stock_quantity, category_id)
+        VALUES (?, ?, ?, ?, ?)
+    """, [(f"Product {i}", "d" * 200, round(rng.uniform(1, 9999), 2), stock, rng.randint(1, len(CATEGORIES)))
+          for i in range(products)])
+    conn.executemany("""
+        INSERT INTO Sets (name, description, price, stock_quantity)
+        VALUES (?, ?, ?, ?)
+    """, [(f"Set {i}", "d" * 200, round(rng.uniform(1, 9999), 2), stock) for i in range(sets)])
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def shopper(index, path, deadline, timeout, results):
+    """One shopper process: login, browse, fill a cart and check out until deadline"""
+    rng = random.Random(index)
+    conn = sqlite3.connect(path, timeout=timeout, factory=TimedConnection)
+    repository = CatalogRepository(conn)
+    engine = CheckoutEngine(conn)
+    password = hashlib.sha256(PASSWORD.encode()).hexdigest()
+    stats = {"orders": 0, "out_of_stock": 0, "busy": 0, "errors": 0, "latencies": [], "browse": []}
+
+    while time.time() < deadline:
+        try:
+            user = conn.execute("SELECT * FROM Users WHERE username = ? AND password = ?",
+                                (f"shopper{index}", password)).fetchone()
+
+            start = time.perf_counter()
+            sort = rng.choice([sort for sort in SORTS if sort != "relevance"])
+            cursor = None
+            rows = []
+            for _ in range(rng.randint(1, 3)):
+                page, cursor = repository.page_products(CatalogFilter(), sort, cursor, 100)
+                rows += page
+                if cursor is None:
+                    break
+            sets, _ = repository.page_sets(CatalogFilter(), sort, None, 100)
+            stats["browse"].append(time.perf_counter() - start)
+
+            lines = [CartLine("product", row.id, rng.randint(1, 2), row.price)
+                     for row in rng.sample(rows, min(len(rows), rng.randint(1, 4))) if row.stock_quantity]
+            if sets and rng.random() < 0.3:
+                row = rng.choice(sets)
+                lines.append(CartLine("set", row.id, 1, row.price))
+            if not lines:
+                continue
+
+            start = time.perf_counter()
+            try:
+                engine.place_order(user[0], lines, "Credit Card")
+                stats["orders"] += 1
+            except OutOfStockError:
+                stats["out_of_stock"] += 1
+            stats["latencies"].append(time.perf_counter() - start)
+        except sqlite3.Error as e:
+            if is_busy(e):
+                stats["busy"] += 1
+            else:
+                stats["errors"] += 1
+                print(f"shopper {index}: {e}")
+
+    stats["lock_wait"] = conn.lock_wait
+    conn.close()
+    results.put(stats)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run concurrent shopper processes against a scratch database")
+    parser.add_argument("--shoppers", type=int, default=8, help="concurrent shopper processes")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--sets", type=int, default=500)
+    parser.add_argument("--stock", type=int, default=50, help="starting stock of every item")
+    parser.add_argument("--timeout", type=float, default=5.0, help="sqlite busy timeout in seconds")
+    parser.add_argument("--journal-mode", help="PRAGMA journal_mode for the scratch database, e.g. wal")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "load.db")
+        conn = create_scratch_db(path)
+        if args.journal_mode:
+            conn.execute(f"PRAGMA journal_mode = {args.journal_mode}")
+        seed(conn, args.shoppers, args.products, args.sets, args.stock)
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+
+        results = multiprocessing.Queue()
+        deadline = time.time() + args.duration
+        processes = [multiprocessing.Process(target=shopper, args=(i, path, deadline, args.timeout, results))
+                     for i in range(args.shoppers)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        stats = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        orders = sum(s["orders"] for s in stats)
+        latencies = [latency for s in stats for latency in s["latencies"]]
+        browse = [latency for s in stats for latency in s["browse"]]
+        lock_wait = sum(s["lock_wait"] for s in stats)
+        recorded = conn.execute("SELECT COUNT(*) FROM Orders").fetchone()[0]
+        negative = conn.execute("""
+            SELECT (SELECT COUNT(*) FROM Products WHERE stock_quantity < 0)
+                 + (SELECT COUNT(*) FROM Sets WHERE stock_quantity < 0)
+        """).fetchone()[0]
+        conn.close()
+
+    print(f"{args.shoppers} shoppers for {elapsed:.1f}s, journal_mode={journal_mode}")
+    print(f"orders: {orders} ({orders / elapsed:.1f}/s), out of stock: {sum(s['out_of_stock'] for s in stats)}, "
+          f"busy: {sum(s['busy'] for s in stats)}, other errors: {sum(s['errors'] for s in stats)}")
+    print(f"checkout latency: p50 {percentile(latencies, 0.50) * 1000:.1f}ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f}ms  max {max(latencies, default=0) * 1000:.1f}ms")
+    print(f"browse latency:   p50 {percentile(browse, 0.50) * 1000:.1f}ms  "
+          f"p99 {percentile(browse, 0.99) * 1000:.1f}ms")
+    print(f"lock wait: {lock_wait:.2f}s total, {lock_wait / max(len(latencies), 1) * 1000:.1f}ms per checkout")
+    if recorded != orders or negative:
+        print(f"INCONSISTENT: {recorded} orders recorded for {orders} placed, {negative} items below zero stock")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+from collections import namedtuple
+
+# Listing rows carry only a description preview; use get_product/get_set for the full text.
+# avg_rating is 0 for unrated items. rank is the BM25 score of a search result
+# (lower is better) and None outside a search.
+ProductRow = namedtuple("ProductRow", "id name description price stock_quantity category_id avg_rating review_count rank",
+                        defaults=(None,))
+SetRow = namedtuple("SetRow", "id name description price stock_quantity avg_rating review_count rank", defaults=(None,))
+RatingSummary = namedtuple("RatingSummary", "review_count avg_rating stars")
+# Review list rows carry a comment preview; use get_review for the full text
+ReviewRow = namedtuple("ReviewRow", "id username rating comment created_at")
+Product = namedtuple("Product", "id name description price stock_quantity category_id")
+SetInfo = namedtuple("SetInfo", "id name description price stock_quantity")
+SetItem = namedtuple("SetItem", "name description price")
+ProductSummary = namedtuple("ProductSummary", "id name")
+
+CatalogFilter = namedtuple("CatalogFilter", "min_price max_price category_id search", defaults=(0, 10000, None, None))
+
+DESCRIPTION_PREVIEW = 80
+COMMENT_PREVIEW = 120
+
+# Column of Reviews that points at each reviewable item type
+REVIEW_COLUMNS = {"product": "product_id", "set": "set_id"}
+
+# Listing columns, ratings included; RatingSummary is kept current by triggers so
+# listings read one row per item instead of aggregating Reviews
+PRODUCT_COLUMNS = f"""p.id, p.name, substr(p.description, 1, {DESCRIPTION_PREVIEW}), p.price, p.stock_quantity,
+    p.category_id, r.avg_rating, r.review_count"""
+SET_COLUMNS = f"""st.id, st.name, substr(st.description, 1, {DESCRIPTION_PREVIEW}), st.price, st.stock_quantity,
+    r.avg_rating, r.review_count"""
+
+# Stable sort orders: (label, sort column, descending). The id tie-breaker makes
+# every order total, which is what keyset pagination needs.
+SORTS = {
+    "price_asc": ("Price: Low to High", "price", False),
+    "price_desc": ("Price: High to Low", "price", True),
+    "name_asc": ("Name: A to Z", "name", False),
+    "name_desc": ("Name: Z to A", "name", True),
+    "rating_desc": ("Rating: High to Low", "avg_rating", True),
+    "relevance": ("Best Match", "rank", False),
+}
+DEFAULT_SORT = "price_asc"
+# Only meaningful while searching; listings without a search fall back to DEFAULT_SORT
+SEARCH_SORT = "relevance"
+
+
+def match_query(text):
+    """Turn search box text into an FTS5 query matching every word as a prefix"""
+    if not text:
+        return None
+    # Quoting each word keeps FTS5 operators and punctuation in user input literal
+    terms = [word.replace('"', "") for word in text.split()]
+    return " ".join(f'"{term}"*' for term in terms if term) or None
+
+
+def rating_join(item_type, id_column, by_rating=False):
+    """JOIN clause adding RatingSummary as r.
+
+    A rating-sorted page has to be read in idx_rating_summary_avg order, so
+    the primary key lookup on r is disabled to stop the planner driving the
+    join from the item table and sorting afterwards.
+    """
+    item_id = "+r.item_id" if by_rating else "r.item_id"
+    return f"JOIN RatingSummary r ON r.item_type = '{item_type}' AND {item_id} = {id_column}"
+
+
+def effective_sort(filters, sort):
+    """The sort a listing actually uses: relevance needs a search"""
+    if sort == SEARCH_SORT and match_query(filters.search) is None:
+        return DEFAULT_SORT
+    return sort
+
+
+class CatalogRepository:
+    """All catalog reads, with keyset pagination over stable sort orders"""
+
+    # SQL text per query shape, shared by the repositories on every connection;
+    # identical strings hit each connection's sqlite3 statement cache
+    sql_cache = {}
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def page_products(self, filters, sort=DEFAULT_SORT, after=None, limit=100):
+        """Return (rows, next_cursor) for one page of products after cursor"""
+        match = match_query(filters.search)
+        sort = effective_sort(filters, sort)
+        if match is not None:
+            sql = self.product_search_sql(sort, filters.category_id is not None, after is not None)
+            params = [match, filters.min_price, filters.max_price]
+        else:
+            sql = self.product_page_sql(sort, filters.category_id is not None, after is not None)
+            params = self.price_params(filters, sort, after)
+        if filters.category_id is not None:
+            params.append(filters.category_id)
+        if after is not None:
+            params += after
+        params.append(limit)
+        rows = [ProductRow(*row) for row in self.conn.execute(sql, params)]
+        return rows, self.next_cursor(rows, sort, limit)
+
+    def page_sets(self, filters, sort=DEFAULT_SORT, after=None, limit=100):
+        """Return (rows, next_cursor) for one page of sets after cursor"""
+        match = match_query(filters.search)
+        sort = effective_sort(filters, sort)
+        if match is not None:
+            sql = self.set_search_sql(sort, after is not None)
+            params = [match, filters.min_price, filters.max_price]
+        else:
+            sql = self.set_page_sql(sort, after is not None)
+            params = self.price_params(filters, sort, after)
+        if after is not None:
+            params += after
+        params.append(limit)
+        rows = [SetRow(*row) for row in self.conn.execute(sql, params)]
+        return rows, self.next_cursor(rows, sort, limit)
+
+    def next_cursor(self, rows, sort, limit):
+        """Cursor that continues after the last row, or None on the last page"""
+        if len(rows) < limit:
+            return None
+        return self.sort_key(rows[-1], sort)
+
+    def sort_key(self, row, sort):
+        """Position of a listing row within a sort order, as a (column, id) pair"""
+        return (getattr(row, SORTS[sort][1]), row.id)
+
+    def product_row(self, product_id, filters):
+        """Return the listing row for one product, or None if it is gone or filtered out"""
+        match = match_query(filters.search)
+        if match is not None:
+            query = f"""
+                SELECT {PRODUCT_COLUMNS}, s.rank
+                FROM ProductSearch s
+                JOIN Products p ON p.id = s.rowid
+                {rating_join('product', 'p.id')}
+                WHERE ProductSearch MATCH ? AND s.rowid = ? AND p.price BETWEEN ? AND ?
+            """
+            params = [match, product_id, filters.min_price, filters.max_price]
+        else:
+            query = f"""
+                SELECT {PRODUCT_COLUMNS}
+                FROM Products p
+                {rating_join('product', 'p.id')}
+                WHERE p.id = ? AND p.price BETWEEN ? AND ?
+            """
+            params = [product_id, filters.min_price, filters.max_price]
+        if filters.category_id is not None:
+            query += " AND p.category_id = ?"
+            params.append(filters.category_id)
+        row = self.conn.execute(query, params).fetchone()
+        return ProductRow(*row) if row else None
+
+    def set_row(self, set_id, filters):
+        """Return the listing row for one set, or None if it is gone or filtered out"""
+        match = match_query(filters.search)
+        if match is not None:
+            row = self.conn.execute(f"""
+                SELECT {SET_COLUMNS}, s.rank
+                FROM SetSearch s
+                JOIN Sets st ON st.id = s.rowid
+                {rating_join('set', 'st.id')}
+                WHERE SetSearch MATCH ? AND s.rowid = ? AND st.price BETWEEN ? AND ?
+            """, (match, set_id, filters.min_price, filters.max_price)).fetchone()
+        else:
+            row = self.conn.execute(f"""
+                SELECT {SET_COLUMNS}
+                FROM Sets st
+                {rating_join('set', 'st.id')}
+                WHERE st.id = ? AND st.price BETWEEN ? AND ?
+            """, (set_id, filters.min_price, filters.max_price)).fetchone()
+        return SetRow(*row) if row else None
+
+    def price_clause(self, alias, sort, has_cursor):
+        """Price filter for a page query, shaped so the keyset bound drives the index"""
+        _, column, descending = SORTS[sort]
+        if column != "price":
+            # Unary + keeps the planner from choosing a price index over the sort index
+            return f"+{alias}price BETWEEN ? AND ?"
+        if has_cursor:
+            # Rows after the cursor already satisfy the near bound; dropping it
+            # leaves the keyset comparison as the only start of the index range
+            return f"{alias}price {'>=' if descending else '<='} ?"
+        return f"{alias}price BETWEEN ? AND ?"
+
+    def price_params(self, filters, sort, after):
+        """Parameters matching price_clause"""
+        _, column, descending = SORTS[sort]
+        if column == "price" and after is not None:
+            return [filters.min_price if descending else filters.max_price]
+        return [filters.min_price, filters.max_price]
+
+    def sort_columns(self, alias, column):
+        """SQL for a sort column and its id tie-breaker"""
+        if column == "avg_rating":
+            # idx_rating_summary_avg is ordered by (avg_rating, item_id)
+            return "r.avg_rating", "r.item_id"
+        if column == "rank":
+            return "s.rank", f"{alias}id"
+        return f"{alias}{column}", f"{alias}id"
+
+    def product_page_sql(self, sort, by_category, has_cursor):
+        """Build (once) the SQL for one products page shape"""
+        key = ("products", sort, by_category, has_cursor)
+        sql = self.sql_cache.get(key)
+        if sql is None:
+            _, column, descending = SORTS[sort]
+            direction = "DESC" if descending else "ASC"
+            sort_column, id_column = self.sort_columns("p.", column)
+            sql = f"""
+                SELECT {PRODUCT_COLUMNS}
+                FROM Products p
+                {rating_join('product', 'p.id', column == 'avg_rating')}
+                WHERE {self.price_clause("p.", sort, has_cursor)}
+            """
+            if by_category:
+                # Sorting by rating walks the rating index, so keep the category indexes out of it
+                sql += f" AND {'+' if column == 'avg_rating' else ''}p.category_id = ?"
+            if has_cursor:
+                sql += f" AND ({sort_column}, {id_column}) {'<' if descending else '>'} (?, ?)"
+            sql += f" ORDER BY {sort_column} {direction}, {id_column} {direction} LIMIT ?"
+            self.sql_cache[key] = sql
+        return sql
+
+    def set_page_sql(self, sort, has_cursor):
+        """Build (once) the SQL for one sets page shape"""
+        key = ("sets", sort, has_cursor)
+        sql = self.sql_cache.get(key)
+        if sql is None:
+            _, column, descending = SORTS[sort]
+            direction = "DESC" if descending else "ASC"
+            sort_column, id_column = self.sort_columns("st.", column)
+            sql = f"""
+                SELECT {SET_COLUMNS}
+                FROM Sets st
+                {rating_join('set', 'st.id', column == 'avg_rating')}
+                WHERE {self.price_clause("st.", sort, has_cursor)}
+            """
+            if has_cursor:
+                sql += f" AND ({sort_column}, {id_column}) {'<' if descending else '>'} (?, ?)"
+            sql += f" ORDER BY {sort_column} {direction}, {id_column} {direction} LIMIT ?"
+            self.sql_cache[key] = sql
+        return sql
+
+    def product_search_sql(self, sort, by_category, has_cursor):
+        """Build (once) the SQL for one page of product search results.
+
+        Full-text matches drive the query; they are then filtered and sorted,
+        by BM25 rank for the relevance sort, so cost follows the match count.
+        """
+        key = ("product_search", sort, by_category, has_cursor)
+        sql = self.sql_cache.get(key)
+        if sql is None:
+            _, column, descending = SORTS[sort]
+            direction = "DESC" if descending else "ASC"
+            sort_column, id_column = self.sort_columns("p.", column)
+            # BM25 is only computed when it decides the order; scoring every match is the costly part
+            rank = ", s.rank" if column == "rank" else ""
+            sql = f"""
+                SELECT {PRODUCT_COLUMNS}{rank}
+                FROM ProductSearch s
+                JOIN Products p ON p.id = s.rowid
+                {rating_join('product', 'p.id')}
+                WHERE ProductSearch MATCH ? AND p.price BETWEEN ? AND ?
+            """
+            if by_category:
+                sql += " AND p.category_id = ?"
+            if has_cursor:
+                sql += f" AND ({sort_column}, {id_column}) {'<' if descending else '>'} (?, ?)"
+            sql += f" ORDER BY {sort_column} {direction}, {id_column} {direction} LIMIT ?"
+            self.sql_cache[key] = sql
+        return sql
+
+    def set_search_sql(self, sort, has_cursor):
+        """Build (once) the SQL for one page of set search results"""
+        key = ("set_search", sort, has_cursor)
+        sql = self.sql_cache.get(key)
+        if sql is None:
+            _, column, descending = SORTS[sort]
+            direction = "DESC" if descending else "ASC"
+            sort_column, id_column = self.sort_columns("st.", column)
+            rank = ", s.rank" if column == "rank" else ""
+            sql = f"""
+                SELECT {SET_COLUMNS}{rank}
+                FROM SetSearch s
+                JOIN Sets st ON st.id = s.rowid
+                {rating_join('set', 'st.id')}
+                WHERE SetSearch MATCH ? AND st.price BETWEEN ? AND ?
+            """
+            if has_cursor:
+                sql += f" AND ({sort_column}, {id_column}) {'<' if descending else '>'} (?, ?)"
+            sql += f" ORDER BY {sort_column} {direction}, {id_column} {direction} LIMIT ?"
+            self.sql_cache[key] = sql
+        return sql
+
+    def get_product(self, product_id):
+        """Return the full Product, or None if it does not exist"""
+        row = self.conn.execute("""
+            SELECT id, name, description, price, stock_quantity, category_id
+            FROM Products WHERE id = ?
+        """, (product_id,)).fetchone()
+        return Product(*row) if row else None
+
+    def get_set(self, set_id):
+        """Return the full SetInfo, or None if it does not exist"""
+        row = self.conn.execute("""
+            SELECT id, name, description, price, stock_quantity
+            FROM Sets WHERE id = ?
+        """, (set_id,)).fetchone()
+        return SetInfo(*row) if row else None
+
+    def set_items(self, set_id):
+        """Return the products that make up a set"""
+        return [SetItem(*row) for row in self.conn.execute("""
+            SELECT p.name, p.description, p.price
+            FROM Set_Items si
+            JOIN Products p ON si.product_id = p.id
+            WHERE si.set_id = ?
+        """, (set_id,))]
+
+    def set_product_ids(self, set_id):
+        """Return the ids of the products in a set"""
+        return {row[0] for row in self.conn.execute("SELECT product_id FROM Set_Items WHERE set_id = ?", (set_id,))}
+
+    def product_summaries(self):
+        """Return (id, name) for every product, for pickers"""
+        return [ProductSummary(*row) for row in self.conn.execute("SELECT id, name FROM Products ORDER BY name, id")]
+
+    def rating_summary(self, item_type, item_id):
+        """Return the RatingSummary of a 'product' or 'set', or None"""
+        row = self.conn.execute("""
+            SELECT review_count, avg_rating, stars_1, stars_2, stars_3, stars_4, stars_5
+            FROM RatingSummary WHERE item_type = ? AND item_id = ?
+        """, (item_type, item_id)).fetchone()
+        return RatingSummary(row[0], row[1], row[2:]) if row else None
+
+    def page_reviews(self, item_type, item_id, rating=None, after=None, limit=50):
+        """Return (rows, next_cursor) for one page of an item's reviews, newest first.
+
+        rating limits the page to reviews with that many stars; the cursor is
+        the (created_at, id) of the last row, so every page is an index seek.
+        """
+        key = ("reviews", item_type, rating is not None, after is not None)
+        sql = self.sql_cache.get(key)
+        if sql is None:
+            sql = f"""
+                SELECT r.id, u.username, r.rating, substr(r.comment, 1, {COMMENT_PREVIEW}), r.created_at
+                FROM Reviews r
+                JOIN Users u ON u.id = r.user_id
+                WHERE r.{REVIEW_COLUMNS[item_type]} = ?
+            """
+            if rating is not None:
+                sql += " AND r.rating = ?"
+            if after is not None:
+                sql += " AND (r.created_at, r.id) < (?, ?)"
+            sql += " ORDER BY r.created_at DESC, r.id DESC LIMIT ?"
+            self.sql_cache[key] = sql
+        params = [item_id]
+        if rating is not None:
+            params.append(rating)
+        if after is not None:
+            params += after
+        params.append(limit)
+        rows = [ReviewRow(*row) for row in self.conn.execute(sql, params)]
+        return rows, ((rows[-1].created_at, rows[-1].id) if len(rows) == limit else None)
+
+    def get_review(self, review_id):
+        """Return one ReviewRow with its full comment, or None"""
+        row = self.conn.execute("""
+            SELECT r.id, u.username, r.rating, r.comment, r.created_at
+            FROM Reviews r
+            JOIN Users u ON u.id = r.user_id
+            WHERE r.id = ?
+        """, (review_id,)).fetchone()
+        return ReviewRow(*row) if row else None
+
+    def categories(self):
+        """Return (id, name) for every category; see reference_cache.CategoryCache"""
+        return self.conn.execute("SELECT id, name FROM Categories ORDER BY name").fetchall()
@@ -0,0 +1,271 @@
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right, insort
+from types import MappingProxyType
+
+from catalog_repository import (
+    DEFAULT_SORT, PRODUCT_COLUMNS, SET_COLUMNS, SORTS, CatalogRepository, ProductRow, SetRow, effective_sort,
+    match_query, rating_join,
+)
+from database import MAIN_DB, connect
+
+# Tables whose ChangeLog entries invalidate a snapshot; Set_Items is only
+# written together with its Sets row, so set membership follows Sets
+SNAPSHOT_TABLES = ("Products", "Sets", "Categories")
+
+# A delta touching more rows than this is cheaper to reload in one scan
+PATCH_LIMIT = 500
+
+# Columns a snapshot keeps a sorted order for; descending sorts walk it backwards
+SORT_COLUMNS = tuple(sorted({column for _, column, _ in SORTS.values() if column != "rank"}))
+
+
+def sorted_order(rows, column):
+    """Keyset cursors (column value, id) of rows in ascending order"""
+    return sorted((getattr(row, column), row.id) for row in rows)
+
+
+def spliced_order(keys, column, before, after, changed):
+    """keys updated for the changed ids, given the rows by id before and after the change.
+
+    Only rows whose column value moved are spliced, each with one bisect;
+    if none moved, keys itself is returned and the new snapshot shares it.
+    keys is never modified, as older snapshots may still be reading it.
+    """
+    moved = [(before.get(row_id), after.get(row_id)) for row_id in changed]
+    moved = [(old, new) for old, new in moved
+             if old is None or new is None or getattr(old, column) != getattr(new, column)]
+    if not moved:
+        return keys
+    keys = list(keys)
+    for old, new in moved:
+        if old is not None:
+            del keys[bisect_left(keys, (getattr(old, column), old.id))]
+        if new is not None:
+            insort(keys, (getattr(new, column), new.id))
+    return keys
+
+
+class CatalogSnapshot:
+    """Immutable in-memory copy of the browsable catalog at one ChangeLog position.
+
+    Answers the same page_products/page_sets calls as CatalogRepository,
+    with identical rows and cursors, for every filter except full-text
+    search, which needs FTS5 and stays in SQLite. A newer snapshot is
+    built beside this one and shares every row that did not change, so
+    readers holding this one never see it move.
+    """
+
+    def __init__(self, seq, products, sets, set_members, categories, product_orders=None, set_orders=None):
+        self.seq = seq
+        self.products = MappingProxyType(products)
+        self.sets = MappingProxyType(sets)
+        self.set_members = MappingProxyType(set_members)
+        self.categories = tuple(categories)
+        # column -> sorted keyset cursors; sorted here unless a patch spliced them
+        if product_orders is None:
+            product_orders = {column: sorted_order(products.values(), column) for column in SORT_COLUMNS}
+        if set_orders is None:
+            set_orders = {column: sorted_order(sets.values(), column) for column in SORT_COLUMNS}
+        self.product_orders = MappingProxyType(product_orders)
+        self.set_orders = MappingProxyType(set_orders)
+
+    def answers(self, filters):
+        """True if filters can be served from memory, i.e. there is no search"""
+        return match_query(filters.search) is None
+
+    def page_products(self, filters, sort=DEFAULT_SORT, after=None, limit=100):
+        """Return (rows, next_cursor) for one page of products after cursor"""
+        return self.page(self.products, self.product_orders, filters, effective_sort(filters, sort), after, limit,
+                         filters.category_id)
+
+    def page_sets(self, filters, sort=DEFAULT_SORT, after=None, limit=100):
+        """Return (rows, next_cursor) for one page of sets after cursor"""
+        return self.page(self.sets, self.set_orders, filters, effective_sort(filters, sort), after, limit, None)
+
+    def page(self, by_id, orders, filters, sort, after, limit, category_id):
+        """Walk one sorted order from the cursor, keeping rows that pass the filters"""
+        _, column, descending = SORTS[sort]
+        keys = orders[column]
+        if descending:
+            start = bisect_left(keys, tuple(after)) if after is not None else len(keys)
+            if column == "price":
+                start = min(start, bisect_right(keys, (filters.max_price, float("inf"))))
+            candidates = (by_id[keys[i][1]] for i in range(start - 1, -1, -1))
+        else:
+            start = bisect_right(keys, tuple(after)) if after is not None else 0
+            if column == "price":
+                start = max(start, bisect_left(keys, (filters.min_price,)))
+            candidates = (by_id[keys[i][1]] for i in range(start, len(keys)))
+
+        rows = []
+        for row in candidates:
+            if not filters.min_price <= row.price <= filters.max_price:
+                if column == "price":
+                    # Walking by price, every later row is out of range too
+                    break
+                continue
+            if category_id is not None and row.category_id != category_id:
+                continue
+            rows.append(row)
+            if len(rows) == limit:
+                return rows, (getattr(row, column), row.id)
+        return rows, None
+
+    def set_product_ids(self, set_id):
+        """Return the ids of the products in a set"""
+        return self.set_members.get(set_id, frozenset())
+
+
+class SnapshotStore:
+    """Keep a current CatalogSnapshot, rebuilt in a background thread.
+
+    The thread polls PRAGMA data_version, which only moves when another
+    connection commits; only then does it read the ChangeLog entries
+    after the snapshot's position. If any touch the catalog, it builds a
+    new snapshot from the old one plus the changed rows and swaps it in
+    with one attribute assignment, so readers never block and never see
+    a half-applied refresh.
+    """
+
+    def __init__(self, db_path=MAIN_DB, poll_interval=1.0):
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.current = None
+        # ChangeLog position read up to, at or past current.seq
+        self.last_seq = 0
+        self.ready = threading.Event()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Build the first snapshot and keep refreshing in a daemon thread"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="catalog-snapshot", daemon=True)
+            self.thread.start()
+
+    def wake(self):
+        """Check for changes now instead of at the next poll"""
+        self.wakeup.set()
+
+    def stop(self, timeout=5.0):
+        """Stop the refresh thread"""
+        self.stopping.set()
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def run(self):
+        """Refresh loop"""
+        conn = connect(self.db_path)
+        try:
+            data_version = None
+            while not self.stopping.is_set():
+                try:
+                    # Read the version first: a commit landing during the
+                    # refresh moves it again and is picked up next time
+                    version = conn.execute("PRAGMA data_version").fetchone()[0]
+                    if version != data_version:
+                        self.refresh(conn)
+                        data_version = version
+                except sqlite3.Error as e:
+                    print(f"Catalog snapshot refresh failed: {e}")
+                self.ready.set()
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+        finally:
+            conn.close()
+
+    def refresh(self, conn):
+        """Swap in a snapshot reflecting every committed catalog change"""
+        # One read transaction, so the snapshot matches a single commit
+        conn.execute("BEGIN")
+        try:
+            snapshot = self.current
+            if snapshot is None:
+                self.current = self.build(conn)
+                self.last_seq = self.current.seq
+                return
+            changes = {table: set() for table in SNAPSHOT_TABLES}
+            seq = self.last_seq
+            for seq, table_name, row_id in conn.execute(
+                    "SELECT seq, table_name, row_id FROM ChangeLog WHERE seq > ? ORDER BY seq", (self.last_seq,)):
+                if table_name in changes:
+                    changes[table_name].add(row_id)
+            # Entries for other tables (orders) are skipped for good
+            self.last_seq = seq
+            if not any(changes.values()):
+                return
+            if sum(map(len, changes.values())) > PATCH_LIMIT:
+                self.current = self.build(conn)
+            else:
+                self.current = self.patch(conn, snapshot, seq, changes)
+        finally:
+            conn.commit()
+
+    def build(self, conn):
+        """Read the whole catalog into a new snapshot"""
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM ChangeLog").fetchone()[0]
+        products = {row[0]: ProductRow(*row) for row in conn.execute(f"""
+            SELECT {PRODUCT_COLUMNS}
+            FROM Products p
+            {rating_join('product', 'p.id')}
+        """)}
+        sets = {row[0]: SetRow(*row) for row in conn.execute(f"""
+            SELECT {SET_COLUMNS}
+            FROM Sets st
+            {rating_join('set', 'st.id')}
+        """)}
+        members = {}
+        for set_id, product_id in conn.execute("SELECT set_id, product_id FROM Set_Items"):
+            members.setdefault(set_id, set()).add(product_id)
+        members = {set_id: frozenset(product_ids) for set_id, product_ids in members.items()}
+        return CatalogSnapshot(seq, products, sets, members, CatalogRepository(conn).categories())
+
+    def patch(self, conn, snapshot, seq, changes):
+        """Copy snapshot, re-reading only the rows in changes.
+
+        The sorted orders are spliced rather than re-sorted, and shared
+        with snapshot for any column no changed row moved in, so a stock
+        change from a checkout touches no order at all.
+        """
+        # The proxies' copy() copies the underlying dicts in C, unlike dict() over the proxy
+        products = snapshot.products.copy()
+        for product_id in changes["Products"]:
+            row = conn.execute(f"""
+                SELECT {PRODUCT_COLUMNS}
+                FROM Products p
+                {rating_join('product', 'p.id')}
+                WHERE p.id = ?
+            """, (product_id,)).fetchone()
+            if row:
+                products[product_id] = ProductRow(*row)
+            else:
+                products.pop(product_id, None)
+
+        sets = snapshot.sets.copy()
+        members = snapshot.set_members.copy()
+        for set_id in changes["Sets"]:
+            row = conn.execute(f"""
+                SELECT {SET_COLUMNS}
+                FROM Sets st
+                {rating_join('set', 'st.id')}
+                WHERE st.id = ?
+            """, (set_id,)).fetchone()
+            if row:
+                sets[set_id] = SetRow(*row)
+                members[set_id] = frozenset(product_id for (product_id,) in conn.execute(
+                    "SELECT product_id FROM Set_Items WHERE set_id = ?", (set_id,)))
+            else:
+                sets.pop(set_id, None)
+                members.pop(set_id, None)
+
+        categories = CatalogRepository(conn).categories() if changes["Categories"] else snapshot.categories
+        product_orders = {column: spliced_order(snapshot.product_orders[column], column, snapshot.products, products,
+                                                changes["Products"])
+                          for column in SORT_COLUMNS}
+        set_orders = {column: spliced_order(snapshot.set_orders[column], column, snapshot.sets, sets, changes["Sets"])
+                      for column in SORT_COLUMNS}
+        return CatalogSnapshot(seq, products, sets, members, categories, product_orders, set_orders)
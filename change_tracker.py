@@ -0,0 +1,56 @@
+import time
+
+# Tables whose rows are listed or cached in the UI; migrations 3 and 6 log
+# every insert, update and delete on them into ChangeLog
+TRACKED_TABLES = ("Products", "Sets", "Orders", "Categories")
+
+# Log entries older than this are pruned; a tracker that falls further
+# behind than the retained log is told to reload instead of diffing
+RETENTION_SECONDS = 24 * 60 * 60
+
+
+class ChangeTracker:
+    """Report which tracked rows changed since the last poll"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.last_seq = self.current_seq()
+        self.data_version = self.read_data_version()
+
+    def current_seq(self):
+        """Highest change sequence number written so far"""
+        return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM ChangeLog").fetchone()[0]
+
+    def read_data_version(self):
+        """PRAGMA data_version, which moves when another connection commits"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def external_change(self):
+        """Return True if another connection committed since the last check"""
+        version = self.read_data_version()
+        changed = version != self.data_version
+        self.data_version = version
+        return changed
+
+    def poll(self):
+        """Return {table: set(row ids)} changed since the last poll.
+
+        Returns None if changes were pruned before this tracker saw them,
+        in which case the caller should reload everything.
+        """
+        oldest = self.conn.execute("SELECT MIN(seq) FROM ChangeLog").fetchone()[0]
+        if oldest is not None and oldest > self.last_seq + 1 and self.last_seq:
+            self.last_seq = self.current_seq()
+            return None
+
+        changes = {table: set() for table in TRACKED_TABLES}
+        for seq, table_name, row_id in self.conn.execute(
+                "SELECT seq, table_name, row_id FROM ChangeLog WHERE seq > ? ORDER BY seq", (self.last_seq,)):
+            changes[table_name].add(row_id)
+            self.last_seq = seq
+        return changes
+
+    def prune(self, retention=RETENTION_SECONDS):
+        """Delete log entries older than retention seconds"""
+        self.conn.execute("DELETE FROM ChangeLog WHERE changed_at < ?", (time.time() - retention,))
+        self.conn.commit()
@@ -0,0 +1,144 @@
+import datetime
+from collections import namedtuple
+
+CartLine = namedtuple("CartLine", "item_type item_id quantity unit_price")
+# requested is the cart's total for the item, available its stock at checkout
+# time, or None if the item no longer exists
+Shortfall = namedtuple("Shortfall", "index item_type item_id requested available")
+Receipt = namedtuple("Receipt", "order_id total transaction_id")
+
+# Stocked table and Order_Items column per cart line type
+STOCK_TABLES = {"product": ("Products", "product_id"), "set": ("Sets", "set_id")}
+
+
+class OutOfStockError(Exception):
+    """Raised when cart lines ask for more than is in stock; nothing was written"""
+
+    def __init__(self, shortfalls):
+        super().__init__(f"{len(shortfalls)} cart line(s) exceed available stock")
+        self.shortfalls = shortfalls
+
+
+class CheckoutEngine:
+    """Place an order, its items, stock decrements and payment as one transaction.
+
+    BEGIN IMMEDIATE takes the write lock up front, so two terminals checking
+    out the same item queue behind each other instead of both reading the
+    old stock. Decrements only apply WHERE stock_quantity >= the quantity;
+    if any of them misses, the whole order is rolled back and the short
+    lines are reported.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def place_order(self, user_id, lines, payment_method):
+        """Write the order for lines and return its Receipt.
+
+        Raises OutOfStockError listing the short lines, ValueError for a line
+        of unknown type or a quantity below 1, or sqlite3.Error if the
+        database is busy; in every case nothing is committed.
+        """
+        demand = self.demand(lines)
+        total = sum(line.unit_price * line.quantity for line in lines)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute("SAVEPOINT stock")
+            if not self.decrement_stock(demand):
+                # Undo the decrements that did apply so the stock reads are exact;
+                # the write lock is still held, so nothing can change in between
+                self.conn.execute("ROLLBACK TO stock")
+                shortfalls = self.shortfalls(lines, demand)
+                raise OutOfStockError(shortfalls)
+            self.conn.execute("RELEASE stock")
+
+            order_id = self.conn.execute("""
+                INSERT INTO Orders (user_id, total_amount, status)
+                VALUES (?, ?, 'pending')
+            """, (user_id, total)).lastrowid
+            for item_type, (_, column) in STOCK_TABLES.items():
+                rows = [(order_id, line.item_id, line.quantity, line.unit_price)
+                        for line in lines if line.item_type == item_type]
+                if rows:
+                    self.conn.executemany(f"""
+                        INSERT INTO Order_Items (order_id, {column}, quantity, unit_price)
+                        VALUES (?, ?, ?, ?)
+                    """, rows)
+
+            transaction_id = f"TRANS_{order_id}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}"
+            self.conn.execute("""
+                INSERT INTO Payments (order_id, amount, payment_method, payment_status, transaction_id)
+                VALUES (?, ?, ?, 'completed', ?)
+            """, (order_id, total, payment_method, transaction_id))
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        return Receipt(order_id, total, transaction_id)
+
+    def price_lines(self, lines):
+        """Return lines with unit_price replaced by each item's current price.
+
+        For callers that must not trust the price a line arrives with. A line
+        whose item no longer exists raises OutOfStockError, as place_order
+        would for it.
+        """
+        self.demand(lines)
+        prices = {}
+        for item_type, (table, _) in STOCK_TABLES.items():
+            ids = list({line.item_id for line in lines if line.item_type == item_type})
+            if ids:
+                for item_id, price in self.conn.execute(
+                        f"SELECT id, price FROM {table} WHERE id IN ({', '.join('?' * len(ids))})", ids):
+                    prices[(item_type, item_id)] = price
+        missing = [Shortfall(index, line.item_type, line.item_id, line.quantity, None)
+                   for index, line in enumerate(lines) if (line.item_type, line.item_id) not in prices]
+        if missing:
+            raise OutOfStockError(missing)
+        return [line._replace(unit_price=prices[(line.item_type, line.item_id)]) for line in lines]
+
+    def demand(self, lines):
+        """Total quantity per (item_type, item_id); a cart may list an item twice"""
+        demand = {}
+        for line in lines:
+            if line.item_type not in STOCK_TABLES:
+                raise ValueError(f"Unknown cart line type: {line.item_type}")
+            # A negative quantity would pass the stock check and raise stock instead
+            if not isinstance(line.quantity, int) or line.quantity < 1:
+                raise ValueError(f"Cart line quantity must be a whole number of at least 1: {line.quantity!r}")
+            key = (line.item_type, line.item_id)
+            demand[key] = demand.get(key, 0) + line.quantity
+        return demand
+
+    def decrement_stock(self, demand):
+        """Apply every conditional decrement; return False if any item was short"""
+        for item_type, (table, _) in STOCK_TABLES.items():
+            rows = [(quantity, item_id, quantity) for (line_type, item_id), quantity in demand.items()
+                    if line_type == item_type]
+            if not rows:
+                continue
+            cursor = self.conn.executemany(f"""
+                UPDATE {table}
+                SET stock_quantity = stock_quantity - ?
+                WHERE id = ? AND stock_quantity >= ?
+            """, rows)
+            if cursor.rowcount != len(rows):
+                return False
+        return True
+
+    def shortfalls(self, lines, demand):
+        """Return a Shortfall for every line whose item cannot cover the demand"""
+        stock = {}
+        for item_type, (table, _) in STOCK_TABLES.items():
+            ids = [item_id for line_type, item_id in demand if line_type == item_type]
+            if ids:
+                for item_id, quantity in self.conn.execute(
+                        f"SELECT id, stock_quantity FROM {table} WHERE id IN ({', '.join('?' * len(ids))})", ids):
+                    stock[(item_type, item_id)] = quantity
+        shortfalls = []
+        for index, line in enumerate(lines):
+            key = (line.item_type, line.item_id)
+            available = stock.get(key)
+            if available is None or available < demand[key]:
+                shortfalls.append(Shortfall(index, line.item_type, line.item_id, demand[key], available))
+        return shortfalls
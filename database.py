@@ -0,0 +1,95 @@
+import sqlite3
+import threading
+from collections import namedtuple
+
+MAIN_DB = "jewelry_marketplace.db"
+HASH_DB = "hashed_passwords.db"
+
+# journal_mode and synchronous are None where the profile cannot change them
+Profile = namedtuple("Profile", "journal_mode synchronous busy_timeout cache_size mmap_size temp_store read_only")
+
+PROFILES = {
+    # The GUIs, admin terminal and workers: WAL lets readers run alongside the
+    # one writer, and NORMAL only syncs at checkpoints, which is safe in WAL
+    "interactive": Profile("wal", "normal", 5000, -16000, 256 * 1024 * 1024, "memory", False),
+    # Seeding, imports and export_orders.py: jobs that can simply be re-run after a
+    # crash, so durability is traded for speed; waits longer for the write lock
+    "bulk": Profile("wal", "off", 30000, -128000, 256 * 1024 * 1024, "memory", False),
+    # Read-only connections such as marketplace_server's readers; mode=ro makes any write fail
+    "kiosk": Profile(None, None, 5000, -16000, 256 * 1024 * 1024, "memory", True),
+}
+
+
+def connect(path=MAIN_DB, profile="interactive", row_factory=None, check_same_thread=True):
+    """Open a connection to path with the pragmas of a named profile"""
+    settings = PROFILES[profile]
+    if settings.read_only:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=settings.busy_timeout / 1000,
+                               check_same_thread=check_same_thread)
+    else:
+        conn = sqlite3.connect(path, timeout=settings.busy_timeout / 1000, check_same_thread=check_same_thread)
+    if settings.journal_mode is not None:
+        conn.execute(f"PRAGMA journal_mode = {settings.journal_mode}")
+    if settings.synchronous is not None:
+        conn.execute(f"PRAGMA synchronous = {settings.synchronous}")
+    conn.execute(f"PRAGMA busy_timeout = {settings.busy_timeout}")
+    conn.execute(f"PRAGMA cache_size = {settings.cache_size}")
+    conn.execute(f"PRAGMA mmap_size = {settings.mmap_size}")
+    conn.execute(f"PRAGMA temp_store = {settings.temp_store}")
+    if row_factory is not None:
+        conn.row_factory = row_factory
+    return conn
+
+
+def health_check(conn, profile="interactive", integrity=False):
+    """Return a list of problems with an open connection; empty when healthy.
+
+    integrity=True adds PRAGMA quick_check, which reads the whole file and
+    is too slow for every startup on a large database.
+    """
+    settings = PROFILES[profile]
+    try:
+        conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+    except sqlite3.DatabaseError as e:
+        return [f"database cannot be read: {e}"]
+
+    problems = []
+    journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    if settings.journal_mode is not None and journal_mode != settings.journal_mode:
+        # e.g. WAL is unavailable on some network file systems
+        problems.append(f"journal_mode is {journal_mode}, expected {settings.journal_mode}")
+    if integrity:
+        result = [row[0] for row in conn.execute("PRAGMA quick_check(10)")]
+        if result != ["ok"]:
+            problems += result
+    return problems
+
+
+class ConnectionPool:
+    """One connection per thread, opened with a profile on first use"""
+
+    def __init__(self, path=MAIN_DB, profile="interactive", row_factory=None):
+        self.path = path
+        self.profile = profile
+        self.row_factory = row_factory
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def get(self):
+        """Return the calling thread's connection"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            # Closed by close_all from whichever thread shuts down, hence check_same_thread=False
+            conn = connect(self.path, self.profile, self.row_factory, check_same_thread=False)
+            self.local.conn = conn
+            with self.lock:
+                self.connections.append(conn)
+        return conn
+
+    def close_all(self):
+        """Close every connection the pool opened"""
+        with self.lock:
+            for conn in self.connections:
+                conn.close()
+            self.connections.clear()
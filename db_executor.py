@@ -0,0 +1,111 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from database import ConnectionPool
+
+
+class DatabaseExecutor:
+    """Run queries on worker threads and deliver results on the Tk thread.
+
+    Each worker thread has its own connection from a ConnectionPool. submit(fn, *args) runs
+    fn(conn, *args) on a worker and returns a Future; its result or error is
+    handed to on_done/on_error from root.after, so callbacks may touch
+    widgets. Requests submitted with the same key supersede each other: the
+    older one is cancelled (or interrupted if already running) and its
+    callbacks never fire.
+    """
+
+    def __init__(self, root, db_path, workers=2, row_factory=None, profile="interactive", poll_interval=15):
+        self.root = root
+        self.poll_interval = poll_interval
+
+        self.connections = ConnectionPool(db_path, profile, row_factory)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db",
+                                       initializer=self.connections.get)
+
+        # Finished futures waiting to be delivered on the Tk thread
+        self.finished = queue.SimpleQueue()
+        self.outstanding = 0
+        self.poll_scheduled = False
+        # key -> (future, request) of the newest request for that key
+        self.latest = {}
+
+    def submit(self, fn, *args, on_done=None, on_error=None, key=None):
+        """Run fn(conn, *args) on a worker thread and return its Future"""
+        # conn is set only while fn runs, and changes only under lock
+        request = {"conn": None, "lock": threading.Lock()}
+        if key is not None:
+            self.supersede(key)
+        future = self.pool.submit(self.run, request, fn, args)
+        if key is not None:
+            self.latest[key] = (future, request)
+        self.outstanding += 1
+        future.add_done_callback(lambda done: self.finished.put((key, done, on_done, on_error)))
+        self.schedule_poll()
+        return future
+
+    def run(self, request, fn, args):
+        """Worker side of submit: expose the connection so it can be interrupted"""
+        conn = self.connections.get()
+        with request["lock"]:
+            request["conn"] = conn
+        try:
+            return fn(conn, *args)
+        finally:
+            # Once cleared, supersede can no longer reach this thread's connection,
+            # whose next query may belong to another request
+            with request["lock"]:
+                request["conn"] = None
+
+    def supersede(self, key):
+        """Cancel the pending request for key, interrupting it if already running"""
+        previous = self.latest.pop(key, None)
+        if previous is None:
+            return
+        future, request = previous
+        if not future.cancel():
+            # Holding the lock keeps the worker from finishing and starting its next query meanwhile
+            with request["lock"]:
+                if request["conn"] is not None:
+                    request["conn"].interrupt()
+
+    def schedule_poll(self):
+        """Check for finished requests on the next poll tick"""
+        if not self.poll_scheduled:
+            self.poll_scheduled = True
+            self.root.after(self.poll_interval, self.poll)
+
+    def poll(self):
+        """Deliver finished requests on the Tk thread"""
+        self.poll_scheduled = False
+        while True:
+            try:
+                key, future, on_done, on_error = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            self.outstanding -= 1
+            if key is not None:
+                latest = self.latest.get(key)
+                if latest is None or latest[0] is not future:
+                    continue  # Superseded
+                del self.latest[key]
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is not None:
+                if on_error is not None:
+                    on_error(error)
+                else:
+                    print(f"Database error: {error}")
+            elif on_done is not None:
+                on_done(future.result())
+        if self.outstanding:
+            self.schedule_poll()
+
+    def shutdown(self):
+        """Stop the workers and close their connections"""
+        for key in list(self.latest):
+            self.supersede(key)
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.connections.close_all()
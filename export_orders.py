@@ -0,0 +1,35 @@
+import argparse
+import sys
+
+from database import MAIN_DB, connect
+from marketplace_core import EXPORT_FORMATS, OrderExporter, ValidationError
+from migrations import migrate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream orders, their items and payments to CSV or JSON Lines")
+    parser.add_argument("path", help="output file; the format follows .csv/.jsonl and a trailing .gz compresses")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="override the format taken from the extension")
+    parser.add_argument("--from", dest="date_from", default="", help="first order day, YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", default="", help="last order day, YYYY-MM-DD")
+    parser.add_argument("--since", metavar="NAME", help="only orders added since the last export with this name")
+    parser.add_argument("--gzip", action="store_true", default=None, help="compress whatever the extension")
+    parser.add_argument("--db", default=MAIN_DB)
+    args = parser.parse_args()
+
+    # A long read that ends with one small write (the --since mark); an export lost
+    # to a crash is simply run again
+    conn = connect(args.db, "bulk")
+    migrate(conn)
+    try:
+        result = OrderExporter(conn).export(args.path, args.format, args.date_from, args.date_to, args.since, args.gzip,
+                                            progress=lambda rows: print(f"\r{rows:,} rows", end="", file=sys.stderr))
+    except ValidationError as e:
+        parser.error(str(e))
+    finally:
+        conn.close()
+    print(f"\nWrote {result.rows:,} rows for {result.orders:,} orders to {result.path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
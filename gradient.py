@@ -0,0 +1,99 @@
+import tkinter as tk
+from collections import OrderedDict
+
+
+def hex_to_rgb(color):
+    """Convert a #RRGGBB color string to an (r, g, b) tuple"""
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def gradient_colors(color1, color2, height):
+    """Return one #RRGGBB color per pixel row blending color1 into color2"""
+    r1, g1, b1 = hex_to_rgb(color1)
+    r2, g2, b2 = hex_to_rgb(color2)
+    colors = []
+    for i in range(height):
+        r = int(r1 + (r2 - r1) * i / height)
+        g = int(g1 + (g2 - g1) * i / height)
+        b = int(b1 + (b2 - b1) * i / height)
+        colors.append(f'#{r:02x}{g:02x}{b:02x}')
+    return colors
+
+
+class GradientBackground:
+    """Vertical gradient drawn as a single cached image on a canvas"""
+
+    def __init__(self, root, canvas, color1, color2, delay=100, max_cached=3):
+        self.root = root
+        self.canvas = canvas
+        self.color1 = color1
+        self.color2 = color2
+        self.delay = delay
+        self.max_cached = max_cached
+
+        # Rendered images keyed by (width, height), least recently used first
+        self.cache = OrderedDict()
+        self.current_size = None
+        self.pending = None
+        self.image_item = None
+
+    def bind(self):
+        """Redraw on root resize, coalescing bursts of <Configure> events"""
+        self.root.bind('<Configure>', self.schedule, add='+')
+
+    def schedule(self, event=None):
+        """Queue a redraw after the resize burst settles"""
+        # <Configure> bubbles up from every child widget; only the root's
+        # own geometry decides the background size
+        if event is not None and event.widget is not self.root:
+            return
+        if self.pending is not None:
+            self.root.after_cancel(self.pending)
+        self.pending = self.root.after(self.delay, self.draw)
+
+    def draw(self):
+        """Draw the gradient for the current canvas size"""
+        self.pending = None
+        width = self.canvas.winfo_width() or self.root.winfo_width()
+        height = self.canvas.winfo_height() or self.root.winfo_height()
+        if width <= 1 or height <= 1 or (width, height) == self.current_size:
+            return
+
+        image = self.get_image(width, height)
+        if self.image_item is None:
+            self.image_item = self.canvas.create_image(0, 0, anchor=tk.NW, image=image, tags="gradient")
+        else:
+            self.canvas.itemconfigure(self.image_item, image=image)
+        self.canvas.tag_lower(self.image_item)
+        self.current_size = (width, height)
+
+    def get_image(self, width, height):
+        """Return the gradient image for a size, rendering it on a cache miss"""
+        key = (width, height)
+        image = self.cache.get(key)
+        if image is not None:
+            self.cache.move_to_end(key)
+            return image
+
+        image = self.render(width, height)
+        self.cache[key] = image
+        while len(self.cache) > self.max_cached:
+            self.cache.popitem(last=False)
+        return image
+
+    def render(self, width, height):
+        """Render a width x height gradient image"""
+        # Build a one-pixel-wide column with a single put() call and let Tk
+        # stretch it horizontally in C
+        column = tk.PhotoImage(master=self.canvas, width=1, height=height)
+        rows = " ".join("{%s}" % color for color in gradient_colors(self.color1, self.color2, height))
+        column.put(rows, to=(0, 0))
+        if width == 1:
+            return column
+        return column.zoom(width, 1)
+
+    def invalidate(self):
+        """Drop cached images and force the next draw to re-render"""
+        self.cache.clear()
+        self.current_size = None
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+
+from backends import lazy_import
+
+
+class ImageAssetCache:
+    """Decode image assets once and hand out shared, pre-scaled PhotoImages"""
+
+    def __init__(self, master=None, budget_bytes=16 * 1024 * 1024):
+        self.master = master
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+
+        # Decoded source images keyed by path
+        self.sources = {}
+        # Rendered PhotoImages keyed by (path, base_size, scale), least recently used first
+        self.photos = OrderedDict()
+
+    def load(self, path):
+        """Decode an asset from disk once and keep the pixels in memory"""
+        source = self.sources.get(path)
+        if source is None:
+            # Pillow is only imported once the first asset is requested
+            Image = lazy_import("PIL.Image")
+            with Image.open(path) as image:
+                image.load()
+                source = image.copy()
+            self.sources[path] = source
+        return source
+
+    def get(self, path, base_size=None, scale=1.0):
+        """Return the PhotoImage for an asset at base_size times scale"""
+        key = (path, base_size, scale)
+        photo = self.photos.get(key)
+        if photo is not None:
+            self.photos.move_to_end(key)
+            return photo
+
+        source = self.load(path)
+        width, height = base_size or source.size
+        size = (int(width * scale), int(height * scale))
+        if size != source.size:
+            rendered = source.resize(size, lazy_import("PIL.Image").Resampling.LANCZOS)
+        else:
+            rendered = source
+        photo = lazy_import("PIL.ImageTk").PhotoImage(rendered, master=self.master)
+
+        self.photos[key] = photo
+        self.used_bytes += self.cost(photo)
+        self.evict(keep=key)
+        return photo
+
+    def prerender(self, path, base_size=None, scales=(1.0,)):
+        """Render every scale factor an animation will use ahead of time"""
+        return [self.get(path, base_size, scale) for scale in scales]
+
+    def cost(self, photo):
+        """Approximate memory held by a PhotoImage (RGBA pixels)"""
+        return photo.width() * photo.height() * 4
+
+    def evict(self, keep=None):
+        """Drop least recently used images until the cache fits its budget"""
+        while self.used_bytes > self.budget_bytes and len(self.photos) > 1:
+            key = next(iter(self.photos))
+            if key == keep:
+                break
+            photo = self.photos.pop(key)
+            self.used_bytes -= self.cost(photo)
+
+    def clear(self):
+        """Release every decoded source and rendered image"""
+        self.sources.clear()
+        self.photos.clear()
+        self.used_bytes = 0
@@ -1,14 +1,34 @@
-import sqlite3
+from startup_profiler import profiler  # Imported first so it can time the imports below
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-import hashlib
-import datetime
 import os
-import re
 from tkinter.scrolledtext import ScrolledText
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
-from dotenv import load_dotenv
+from gradient import GradientBackground
+from migrations import migrate
+from sms_outbox import OutboxWorker
+from virtual_list import VirtualList
+from admin_browsers import BulkStatusDialog
+from sales_dashboard import SalesDashboard
+from catalog_repository import CatalogFilter, CatalogRepository, SORTS, DEFAULT_SORT, SEARCH_SORT, effective_sort
+from catalog_snapshot import SnapshotStore
+from change_tracker import ChangeTracker
+from reference_cache import CategoryCache
+from db_executor import DatabaseExecutor
+from database import MAIN_DB, connect, health_check
+from marketplace_client import SERVER_ENV, MarketplaceClient
+from review_viewer import ReviewViewer, rating_text
+from marketplace_core import (
+    ADMIN_USERNAME, ORDER_STATUSES, AccountService, AuthenticationError, CartLine, CatalogAdmin, CheckoutEngine,
+    ConflictError, NotFoundError, OrderService, OutOfStockError, ProfileUpdate, Registration, ReviewService,
+    SalesService, ServiceUnavailableError, ValidationError, product_input, set_input,
+)
+
+profiler.mark("imports")
+
+# How often to check whether another connection (e.g. the admin terminal) committed
+CHANGE_POLL_MS = 2000
+# Search boxes reload their listing once typing pauses for this long
+SEARCH_DELAY_MS = 250
 
 class JewelryMarketplaceApp:
     def __init__(self, root):
@@ -16,22 +36,42 @@ class JewelryMarketplaceApp:
         self.root.title("Jewelry Marketplace")
         self.root.geometry("1200x900")
         
-        # Load environment variables for Twilio
-        load_dotenv()
-        self.twilio_client = Client(os.getenv('TWILIO_ACCOUNT_SID'), os.getenv('TWILIO_AUTH_TOKEN'))
-        self.twilio_from_number = os.getenv('TWILIO_PHONE_NUMBER')
+        # Initialize database
+        self.create_database()
+        self.catalog = CatalogRepository(self.conn)
+        self.categories = CategoryCache(self.catalog)
+        self.orders = OrderService(self.conn)
+        self.reviews = ReviewService(self.conn)
+        self.catalog_admin = CatalogAdmin(self.conn)
+        self.changes = ChangeTracker(self.conn)
+        self.changes.prune()
+        # Listing queries run on worker threads so slow pages never block the UI
+        self.db = DatabaseExecutor(self.root, MAIN_DB)
+        # Browsing without a search is answered from an in-memory snapshot
+        # that a background thread rebuilds when the catalog changes
+        self.snapshots = SnapshotStore(MAIN_DB)
+        self.snapshots.start()
+        # With a marketplace_server configured, logins, listings and checkout
+        # go through it so its writer serializes every terminal's orders
+        self.remote = MarketplaceClient(os.environ[SERVER_ENV]) if os.environ.get(SERVER_ENV) else None
+        profiler.mark("database bootstrap")
+        
+        # Deliver queued SMS notifications in the background; the transport
+        # (and its SDK) is only loaded once there is something to send
+        self.outbox = OutboxWorker("jewelry_marketplace.db")
+        self.outbox.start()
         
         # Create gradient background
         self.canvas = tk.Canvas(self.root, highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
-        self.create_gradient()
-        
-        # Initialize database
-        self.create_database()
+        self.gradient = GradientBackground(self.root, self.canvas, "#4ECDC4", "#FF6B6B")  # Teal to coral
+        self.gradient.draw()
         
         # Initialize user state
         self.current_user = None
         self.cart = []
+        # Set while an order is in flight so a second click cannot place it twice
+        self.placing_order = False
         
         # Setup custom style for vibrant UI
         self.style = ttk.Style()
@@ -73,27 +113,12 @@ class JewelryMarketplaceApp:
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         
         # Bind window resize to update gradient
-        self.root.bind('<Configure>', self.create_gradient)
-
-    def create_gradient(self, event=None):
-        """Create a gradient background"""
-        self.canvas.delete("gradient")
-        width = self.canvas.winfo_width() or self.root.winfo_width()
-        height = self.canvas.winfo_height() or self.root.winfo_height()
-        
-        # Gradient colors
-        color1 = "#4ECDC4"  # Teal
-        color2 = "#FF6B6B"  # Coral
-        
-        # Create gradient
-        for i in range(height):
-            r1, g1, b1 = [int(x) for x in self.canvas.winfo_rgb(color1)]
-            r2, g2, b2 = [int(x) for x in self.canvas.winfo_rgb(color2)]
-            r = int(r1 + (r2 - r1) * i / height)
-            g = int(g1 + (g2 - g1) * i / height)
-            b = int(b1 + (b2 - b1) * i / height)
-            color = f'#{r:02x}{g:02x}{b:02x}'
-            self.canvas.create_line(0, i, width, i, fill=color, tags="gradient")
+        self.gradient.bind()
+        
+        # Pick up changes committed by other connections
+        self.root.after(CHANGE_POLL_MS, self.poll_changes)
+        
+        profiler.mark("widget construction")
 
     def setup_styles(self):
         """Setup custom styles for vibrant UI"""
@@ -118,8 +143,10 @@ class JewelryMarketplaceApp:
 
     def create_database(self):
         """Create the database if it doesn't exist and initialize tables"""
-        db_exists = os.path.exists("jewelry_marketplace.db")
-        self.conn = sqlite3.connect("jewelry_marketplace.db")
+        db_exists = os.path.exists(MAIN_DB)
+        self.conn = connect(MAIN_DB)
+        for problem in health_check(self.conn):
+            print(f"Database health check: {problem}")
         self.cur = self.conn.cursor()
         
         if not db_exists:
@@ -133,23 +160,8 @@ class JewelryMarketplaceApp:
             
             self.conn.commit()
             print("Database created and initialized with sample data.")
-
-    def hash_password(self, password):
-        """Hash password using SHA-256"""
-        return hashlib.sha256(password.encode()).hexdigest()
-
-    def send_sms(self, to_number, message):
-        """Send SMS using Twilio"""
-        try:
-            message = self.twilio_client.messages.create(
-                body=message,
-                from_=self.twilio_from_number,
-                to=to_number
-            )
-            print(f"SMS sent successfully: {message.sid}")
-        except TwilioRestException as e:
-            print(f"Failed to send SMS: {e}")
-            messagebox.showerror("Error", "Failed to send SMS notification")
+        
+        migrate(self.conn)
 
     def setup_login_frame(self):
         """Setup the login frame"""
@@ -208,6 +220,11 @@ class JewelryMarketplaceApp:
         filter_frame = ttk.Frame(self.products_frame, padding=15, style='TFrame')
         filter_frame.pack(fill=tk.X)
         
+        ttk.Label(filter_frame, text="Search:").pack(side=tk.LEFT, padx=10)
+        self.product_search_var = tk.StringVar()
+        product_search_entry = ttk.Entry(filter_frame, textvariable=self.product_search_var, width=20)
+        product_search_entry.pack(side=tk.LEFT)
+        
         ttk.Label(filter_frame, text="Category:").pack(side=tk.LEFT, padx=10)
         self.category_var = tk.StringVar()
         self.category_combo = ttk.Combobox(filter_frame, textvariable=self.category_var, state="readonly", width=20)
@@ -220,32 +237,26 @@ class JewelryMarketplaceApp:
         self.max_price_var = tk.StringVar(value="10000")
         ttk.Entry(filter_frame, textvariable=self.max_price_var, width=10).pack(side=tk.LEFT)
         
+        ttk.Label(filter_frame, text="Sort:").pack(side=tk.LEFT, padx=10)
+        self.product_sort_combo = self.create_sort_combo(filter_frame)
+        self.bind_search(product_search_entry, self.product_search_var, self.product_sort_combo, self.load_products)
+        
         ttk.Button(filter_frame, text="Apply Filters", command=self.load_products).pack(side=tk.LEFT, padx=15)
         ttk.Button(filter_frame, text="Clear Filters", command=self.clear_product_filters).pack(side=tk.LEFT)
         
         list_frame = ttk.Frame(self.products_frame, padding=15, style='TFrame')
         list_frame.pack(fill=tk.BOTH, expand=True)
         
-        columns = ("ID", "Name", "Description", "Price", "Stock", "Category")
-        self.products_tree = ttk.Treeview(list_frame, columns=columns, show="headings")
-        
-        for col in columns:
-            self.products_tree.heading(col, text=col)
-            width = 120 if col != "Description" else 350
-            self.products_tree.column(col, width=width)
+        columns = [(col, col, 120 if col != "Description" else 350)
+                   for col in ("ID", "Name", "Description", "Price", "Stock", "Category", "Rating")]
+        self.products_list = VirtualList(list_frame, columns, self.fetch_product_page, xscroll=True, executor=self.db,
+                                         format_row=lambda row: row[:5] + (self.categories.name_for(row.category_id),
+                                                                           rating_text(row.avg_rating, row.review_count)))
+        self.products_list.pack(fill=tk.BOTH, expand=True)
+        self.products_tree = self.products_list.tree
         
         self.products_tree.bind("<Double-1>", self.view_product_details)
         
-        y_scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.products_tree.yview)
-        self.products_tree.configure(yscrollcommand=y_scroll.set)
-        
-        x_scroll = ttk.Scrollbar(list_frame, orient=tk.HORIZONTAL, command=self.products_tree.xview)
-        self.products_tree.configure(xscrollcommand=x_scroll.set)
-        
-        self.products_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
-        
         action_frame = ttk.Frame(self.products_frame, padding=15, style='TFrame')
         action_frame.pack(fill=tk.X)
         
@@ -260,6 +271,11 @@ class JewelryMarketplaceApp:
         filter_frame = ttk.Frame(self.sets_frame, padding=15, style='TFrame')
         filter_frame.pack(fill=tk.X)
         
+        ttk.Label(filter_frame, text="Search:").pack(side=tk.LEFT, padx=10)
+        self.set_search_var = tk.StringVar()
+        set_search_entry = ttk.Entry(filter_frame, textvariable=self.set_search_var, width=20)
+        set_search_entry.pack(side=tk.LEFT)
+        
         ttk.Label(filter_frame, text="Price Range:").pack(side=tk.LEFT, padx=10)
         self.set_min_price_var = tk.StringVar(value="0")
         ttk.Entry(filter_frame, textvariable=self.set_min_price_var, width=10).pack(side=tk.LEFT)
@@ -267,32 +283,25 @@ class JewelryMarketplaceApp:
         self.set_max_price_var = tk.StringVar(value="10000")
         ttk.Entry(filter_frame, textvariable=self.set_max_price_var, width=10).pack(side=tk.LEFT)
         
+        ttk.Label(filter_frame, text="Sort:").pack(side=tk.LEFT, padx=10)
+        self.set_sort_combo = self.create_sort_combo(filter_frame)
+        self.bind_search(set_search_entry, self.set_search_var, self.set_sort_combo, self.load_sets)
+        
         ttk.Button(filter_frame, text="Apply Filters", command=self.load_sets).pack(side=tk.LEFT, padx=15)
         ttk.Button(filter_frame, text="Clear Filters", command=self.clear_set_filters).pack(side=tk.LEFT)
         
         list_frame = ttk.Frame(self.sets_frame, padding=15, style='TFrame')
         list_frame.pack(fill=tk.BOTH, expand=True)
         
-        columns = ("ID", "Name", "Description", "Price", "Stock")
-        self.sets_tree = ttk.Treeview(list_frame, columns=columns, show="headings")
-        
-        for col in columns:
-            self.sets_tree.heading(col, text=col)
-            width = 120 if col != "Description" else 350
-            self.sets_tree.column(col, width=width)
+        columns = [(col, col, 120 if col != "Description" else 350)
+                   for col in ("ID", "Name", "Description", "Price", "Stock", "Rating")]
+        self.sets_list = VirtualList(list_frame, columns, self.fetch_set_page, xscroll=True, executor=self.db,
+                                     format_row=lambda row: row[:5] + (rating_text(row.avg_rating, row.review_count),))
+        self.sets_list.pack(fill=tk.BOTH, expand=True)
+        self.sets_tree = self.sets_list.tree
         
         self.sets_tree.bind("<Double-1>", self.view_set_details)
         
-        y_scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.sets_tree.yview)
-        self.sets_tree.configure(yscrollcommand=y_scroll.set)
-        
-        x_scroll = ttk.Scrollbar(list_frame, orient=tk.HORIZONTAL, command=self.sets_tree.xview)
-        self.sets_tree.configure(xscrollcommand=x_scroll.set)
-        
-        self.sets_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
-        
         action_frame = ttk.Frame(self.sets_frame, padding=15, style='TFrame')
         action_frame.pack(fill=tk.X)
         
@@ -301,6 +310,36 @@ class JewelryMarketplaceApp:
         ttk.Button(action_frame, text="View Reviews", command=self.view_set_reviews).pack(side=tk.LEFT, padx=10)
         ttk.Button(action_frame, text="Add Review", command=self.add_set_review).pack(side=tk.LEFT, padx=10)
 
+    def create_sort_combo(self, parent):
+        """Create a readonly combobox listing the catalog sort orders"""
+        combo = ttk.Combobox(parent, state="readonly", width=18, values=[label for label, _, _ in SORTS.values()])
+        combo.set(SORTS[DEFAULT_SORT][0])
+        combo.pack(side=tk.LEFT, padx=10)
+        return combo
+
+    def bind_search(self, entry, search_var, sort_combo, load):
+        """Reload a listing when its search text changes, once typing pauses"""
+        pending = None
+        
+        def on_change(*args):
+            nonlocal pending
+            # Rank results by relevance while searching, unless another sort was picked
+            searching = bool(search_var.get().strip())
+            if searching and self.selected_sort(sort_combo) == DEFAULT_SORT:
+                sort_combo.set(SORTS[SEARCH_SORT][0])
+            elif not searching and self.selected_sort(sort_combo) == SEARCH_SORT:
+                sort_combo.set(SORTS[DEFAULT_SORT][0])
+            if pending is not None:
+                self.root.after_cancel(pending)
+            pending = self.root.after(SEARCH_DELAY_MS, load)
+        
+        search_var.trace_add("write", on_change)
+        entry.bind("<Return>", lambda event: load())
+
+    def selected_sort(self, combo):
+        """Return the SORTS key for a sort combobox selection"""
+        return list(SORTS)[combo.current()] if combo.current() >= 0 else DEFAULT_SORT
+
     def setup_cart_frame(self):
         """Setup the cart frame"""
         list_frame = ttk.Frame(self.cart_frame, padding=15, style='TFrame')
@@ -345,21 +384,14 @@ class JewelryMarketplaceApp:
         list_frame = ttk.Frame(self.orders_frame, padding=15, style='TFrame')
         list_frame.pack(fill=tk.BOTH, expand=True)
         
-        columns = ("ID", "Date", "Total", "Status")
-        self.orders_tree = ttk.Treeview(list_frame, columns=columns, show="headings")
-        
-        for col in columns:
-            self.orders_tree.heading(col, text=col)
-            self.orders_tree.column(col, width=150)
+        columns = [(col, col, 150) for col in ("ID", "Date", "Total", "Status")]
+        self.orders_list = VirtualList(list_frame, columns, self.fetch_order_page, executor=self.db,
+                                       format_row=lambda row: (row[0], row[1], f"${row[2]:.2f}", row[3].capitalize()))
+        self.orders_list.pack(fill=tk.BOTH, expand=True)
+        self.orders_tree = self.orders_list.tree
         
         self.orders_tree.bind("<Double-1>", self.view_order_details)
         
-        y_scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.orders_tree.yview)
-        self.orders_tree.configure(yscrollcommand=y_scroll.set)
-        
-        self.orders_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        
         action_frame = ttk.Frame(self.orders_frame, padding=15, style='TFrame')
         action_frame.pack(fill=tk.X)
         
@@ -418,15 +450,24 @@ class JewelryMarketplaceApp:
         
         ttk.Label(frame, text="Manage Orders", font=("Segoe UI", 14)).grid(row=7, column=0, columnspan=2, pady=10)
         ttk.Button(frame, text="Update Order Status", command=self.update_order_status).grid(row=8, column=0, pady=10, padx=10)
+        ttk.Button(frame, text="Bulk Status Update", command=self.bulk_update_status).grid(row=8, column=1, pady=10, padx=10)
+        ttk.Button(frame, text="Sales Dashboard", command=self.view_sales).grid(row=9, column=0, columnspan=2, pady=10, padx=10)
 
     def login(self):
-        """Handle user login"""
+        """Handle user login; the password is checked on a worker so the KDF never blocks the UI"""
         username = self.username_entry.get()
-        password = self.hash_password(self.password_entry.get())
-        
-        self.cur.execute("SELECT * FROM Users WHERE username = ? AND password = ?", (username, password))
-        user = self.cur.fetchone()
-        
+        self.status_var.set("Signing in...")
+        self.db.submit(self.authenticate, username, self.password_entry.get(),
+                       on_done=lambda user: self.finish_login(username, user),
+                       on_error=lambda e: messagebox.showerror("Login Failed", f"Could not sign in: {e}"),
+                       key="login")
+
+    def authenticate(self, conn, username, password):
+        """Return the User for matching credentials, or None (worker thread)"""
+        return (self.remote or AccountService(conn)).login(username, password)
+
+    def finish_login(self, username, user):
+        """Open the shop for a logged-in user, or report bad credentials"""
         if user:
             self.current_user = user
             self.notebook.add(self.products_frame, text="Products")
@@ -435,7 +476,7 @@ class JewelryMarketplaceApp:
             self.notebook.add(self.orders_frame, text="Orders")
             self.notebook.add(self.profile_frame, text="Profile")
             
-            if username == "admin":
+            if username == ADMIN_USERNAME:
                 self.notebook.add(self.admin_frame, text="Admin")
             
             self.notebook.forget(self.login_frame)
@@ -446,89 +487,86 @@ class JewelryMarketplaceApp:
             self.load_orders()
             self.load_profile()
         else:
+            self.status_var.set("Welcome to Jewelry Marketplace")
             messagebox.showerror("Login Failed", "Invalid username or password")
 
     def register(self):
-        """Handle user registration with SMS notification"""
-        username = self.reg_username.get()
-        password = self.reg_password.get()
-        confirm_password = self.reg_confirm_password.get()
-        email = self.reg_email.get()
-        firstname = self.reg_firstname.get()
-        lastname = self.reg_lastname.get()
-        address = self.reg_address.get()
-        phone = self.reg_phone.get()
-        
-        # Validation
-        if not all([username, password, email, firstname, lastname, address, phone]):
-            messagebox.showerror("Error", "All fields are required")
-            return
-        
-        if password != confirm_password:
-            messagebox.showerror("Error", "Passwords do not match")
-            return
-        
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
-            messagebox.showerror("Error", "Invalid email format")
-            return
-        
-        # Phone number validation: must be exactly 10 digits
-        if not (phone.isdigit() and len(phone) == 10):
-            messagebox.showerror("Error", "Phone number must be exactly 10 digits")
-            return
-        
-        full_phone = f"+91{phone}"
-        
-        try:
-            hashed_password = self.hash_password(password)
-            self.cur.execute("""
-                INSERT INTO Users (username, password, email, firstname, lastname, address, phone)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (username, hashed_password, email, firstname, lastname, address, full_phone))
-            self.conn.commit()
-            
-            # Send SMS notification
-            sms_message = f"Welcome to Jewelry Marketplace, {firstname}! Your account has been successfully created."
-            self.send_sms(full_phone, sms_message)
-            
-            messagebox.showinfo("Success", "Registration successful! Please login.")
-            self.notebook.select(0)
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Error", "Username or email already exists")
+        """Handle user registration with SMS notification; hashing runs on a worker like login"""
+        form = Registration(
+            self.reg_username.get(),
+            self.reg_password.get(),
+            self.reg_confirm_password.get(),
+            self.reg_email.get(),
+            self.reg_firstname.get(),
+            self.reg_lastname.get(),
+            self.reg_address.get(),
+            self.reg_phone.get()
+        )
+        
+        # The welcome SMS is queued in the same transaction as the account;
+        # the outbox worker delivers it in the background
+        self.status_var.set("Creating account...")
+        self.db.submit(lambda conn: AccountService(conn).register(form), on_done=self.finish_register,
+                       on_error=self.account_failed)
+
+    def finish_register(self, user_id):
+        """Confirm a registration once its transaction has committed"""
+        self.outbox.wake()
+        self.status_var.set("Welcome to Jewelry Marketplace")
+        messagebox.showinfo("Success", "Registration successful! Please login.")
+        self.notebook.select(0)
+
+    def account_failed(self, error):
+        """Report a failed registration or profile update"""
+        self.status_var.set("Welcome to Jewelry Marketplace" if not self.current_user else
+                            f"Welcome, {self.current_user[4]} {self.current_user[5]}")
+        if isinstance(error, (ValidationError, ConflictError)):
+            messagebox.showerror("Error", str(error))
+        else:
+            messagebox.showerror("Error", f"Database error: {error}")
 
     def load_categories(self):
         """Load categories for product filtering"""
-        self.cur.execute("SELECT name FROM Categories")
-        categories = ["All"] + [row[0] for row in self.cur.fetchall()]
+        categories = ["All"] + self.categories.names()
         self.category_combo['values'] = categories
-        self.category_combo.set("All")
+        if self.category_var.get() not in categories:
+            self.category_combo.set("All")
 
     def load_products(self):
         """Load products based on filters"""
-        for item in self.products_tree.get_children():
-            self.products_tree.delete(item)
-        
-        query = """
-            SELECT p.id, p.name, p.description, p.price, p.stock_quantity, c.name
-            FROM Products p
-            JOIN Categories c ON p.category_id = c.id
-            WHERE p.price BETWEEN ? AND ?
-        """
-        params = [float(self.min_price_var.get()), float(self.max_price_var.get())]
-        
-        if self.category_var.get() != "All":
-            query += " AND c.name = ?"
-            params.append(self.category_var.get())
-        
-        self.cur.execute(query, params)
-        for row in self.cur.fetchall():
-            self.products_tree.insert("", tk.END, values=row)
+        # Capture the filters once so every page of this listing uses the same ones
+        category = self.category_var.get()
+        self.product_filters = CatalogFilter(
+            float(self.min_price_var.get()),
+            float(self.max_price_var.get()),
+            self.categories.id_for(category) if category != "All" else None,
+            self.product_search_var.get().strip() or None
+        )
+        self.product_sort = effective_sort(self.product_filters, self.selected_sort(self.product_sort_combo))
+        self.products_list.reload()
+
+    def catalog_source(self, conn, filters):
+        """Where listing pages for filters come from: the service, the snapshot or SQLite"""
+        if self.remote:
+            return self.remote
+        snapshot = self.snapshots.current
+        if snapshot is not None and snapshot.answers(filters):
+            return snapshot
+        return CatalogRepository(conn)
+
+    def fetch_product_page(self, conn, cursor, limit):
+        """Fetch one page of filtered products for the products list (worker thread)"""
+        if not hasattr(self, 'product_filters'):
+            return [], None
+        return self.catalog_source(conn, self.product_filters).page_products(self.product_filters, self.product_sort, cursor, limit)
 
     def clear_product_filters(self):
         """Clear product filters"""
+        self.product_search_var.set("")
         self.category_var.set("All")
         self.min_price_var.set("0")
         self.max_price_var.set("10000")
+        self.product_sort_combo.set(SORTS[DEFAULT_SORT][0])
         self.load_products()
 
     def view_product_details(self, event):
@@ -538,8 +576,7 @@ class JewelryMarketplaceApp:
             item = self.products_tree.item(selected[0])
             product_id = item['values'][0]
             
-            self.cur.execute("SELECT * FROM Products WHERE id = ?", (product_id,))
-            product = self.cur.fetchone()
+            product = self.catalog.get_product(product_id)
             
             details = f"Name: {product[1]}\nDescription: {product[2]}\nPrice: ${product[3]:.2f}\nStock: {product[4]}"
             messagebox.showinfo("Product Details", details)
@@ -575,30 +612,12 @@ class JewelryMarketplaceApp:
         
         product_id = self.products_tree.item(selected[0])['values'][0]
         
-        self.cur.execute("""
-            SELECT u.username, r.rating, r.comment, r.created_at
-            FROM Reviews r
-            JOIN Users u ON r.user_id = u.id
-            WHERE r.product_id = ?
-        """, (product_id,))
-        
-        reviews = self.cur.fetchall()
-        if not reviews:
+        summary = self.catalog.rating_summary("product", product_id)
+        if summary is None or not summary.review_count:
             messagebox.showinfo("Reviews", "No reviews for this product")
             return
         
-        review_text = ""
-        for review in reviews:
-            review_text += f"User: {review[0]}\nRating: {review[1]}/5\nComment: {review[2]}\nDate: {review[3]}\n\n"
-        
-        review_window = tk.Toplevel(self.root)
-        review_window.title("Product Reviews")
-        review_window.geometry("500x400")
-        
-        text_area = ScrolledText(review_window, wrap=tk.WORD, width=60, height=20)
-        text_area.pack(padx=15, pady=15)
-        text_area.insert(tk.END, review_text)
-        text_area.configure(state='disabled')
+        ReviewViewer(self.root, self.db, self.catalog, "product", product_id, "Product Reviews")
 
     def add_product_review(self):
         """Add a review for selected product"""
@@ -627,18 +646,14 @@ class JewelryMarketplaceApp:
         comment_text.pack(pady=10)
         
         def submit_review():
-            rating = rating_var.get()
-            comment = comment_text.get("1.0", tk.END).strip()
-            
-            if not rating:
-                messagebox.showerror("Error", "Please select a rating")
+            try:
+                self.reviews.add_review(self.current_user[0], "product", product_id, rating_var.get(),
+                                        comment_text.get("1.0", tk.END).strip())
+            except ValidationError as e:
+                messagebox.showerror("Error", str(e))
                 return
-            
-            self.cur.execute("""
-                INSERT INTO Reviews (user_id, product_id, rating, comment)
-                VALUES (?, ?, ?, ?)
-            """, (self.current_user[0], product_id, int(rating), comment))
-            self.conn.commit()
+            # The rating triggers logged the item, so its listing row picks up the new average
+            self.refresh_views()
             messagebox.showinfo("Success", "Review submitted")
             review_window.destroy()
         
@@ -646,24 +661,26 @@ class JewelryMarketplaceApp:
 
     def load_sets(self):
         """Load sets based on filters"""
-        for item in self.sets_tree.get_children():
-            self.sets_tree.delete(item)
-        
-        query = """
-            SELECT id, name, description, price, stock_quantity
-            FROM Sets
-            WHERE price BETWEEN ? AND ?
-        """
-        params = [float(self.set_min_price_var.get()), float(self.set_max_price_var.get())]
-        
-        self.cur.execute(query, params)
-        for row in self.cur.fetchall():
-            self.sets_tree.insert("", tk.END, values=row)
+        self.set_filters = CatalogFilter(
+            float(self.set_min_price_var.get()),
+            float(self.set_max_price_var.get()),
+            search=self.set_search_var.get().strip() or None
+        )
+        self.set_sort = effective_sort(self.set_filters, self.selected_sort(self.set_sort_combo))
+        self.sets_list.reload()
+
+    def fetch_set_page(self, conn, cursor, limit):
+        """Fetch one page of filtered sets for the sets list (worker thread)"""
+        if not hasattr(self, 'set_filters'):
+            return [], None
+        return self.catalog_source(conn, self.set_filters).page_sets(self.set_filters, self.set_sort, cursor, limit)
 
     def clear_set_filters(self):
         """Clear set filters"""
+        self.set_search_var.set("")
         self.set_min_price_var.set("0")
         self.set_max_price_var.set("10000")
+        self.set_sort_combo.set(SORTS[DEFAULT_SORT][0])
         self.load_sets()
 
     def view_set_details(self, event):
@@ -673,8 +690,7 @@ class JewelryMarketplaceApp:
             item = self.sets_tree.item(selected[0])
             set_id = item['values'][0]
             
-            self.cur.execute("SELECT * FROM Sets WHERE id = ?", (set_id,))
-            set_info = self.cur.fetchone()
+            set_info = self.catalog.get_set(set_id)
             
             details = f"Name: {set_info[1]}\nDescription: {set_info[2]}\nPrice: ${set_info[3]:.2f}\nStock: {set_info[4]}"
             messagebox.showinfo("Set Details", details)
@@ -710,14 +726,7 @@ class JewelryMarketplaceApp:
         
         set_id = self.sets_tree.item(selected[0])['values'][0]
         
-        self.cur.execute("""
-            SELECT p.name, p.description, p.price
-            FROM Set_Items si
-            JOIN Products p ON si.product_id = p.id
-            WHERE si.set_id = ?
-        """, (set_id,))
-        
-        items = self.cur.fetchall()
+        items = self.catalog.set_items(set_id)
         if not items:
             messagebox.showinfo("Set Items", "No items in this set")
             return
@@ -744,30 +753,12 @@ class JewelryMarketplaceApp:
         
         set_id = self.sets_tree.item(selected[0])['values'][0]
         
-        self.cur.execute("""
-            SELECT u.username, r.rating, r.comment, r.created_at
-            FROM Reviews r
-            JOIN Users u ON r.user_id = u.id
-            WHERE r.set_id = ?
-        """, (set_id,))
-        
-        reviews = self.cur.fetchall()
-        if not reviews:
+        summary = self.catalog.rating_summary("set", set_id)
+        if summary is None or not summary.review_count:
             messagebox.showinfo("Reviews", "No reviews for this set")
             return
         
-        review_text = ""
-        for review in reviews:
-            review_text += f"User: {review[0]}\nRating: {review[1]}/5\nComment: {review[2]}\nDate: {review[3]}\n\n"
-        
-        review_window = tk.Toplevel(self.root)
-        review_window.title("Set Reviews")
-        review_window.geometry("500x400")
-        
-        text_area = ScrolledText(review_window, wrap=tk.WORD, width=60, height=20)
-        text_area.pack(padx=15, pady=15)
-        text_area.insert(tk.END, review_text)
-        text_area.configure(state='disabled')
+        ReviewViewer(self.root, self.db, self.catalog, "set", set_id, "Set Reviews")
 
     def add_set_review(self):
         """Add a review for selected set"""
@@ -796,18 +787,14 @@ class JewelryMarketplaceApp:
         comment_text.pack(pady=10)
         
         def submit_review():
-            rating = rating_var.get()
-            comment = comment_text.get("1.0", tk.END).strip()
-            
-            if not rating:
-                messagebox.showerror("Error", "Please select a rating")
+            try:
+                self.reviews.add_review(self.current_user[0], "set", set_id, rating_var.get(),
+                                        comment_text.get("1.0", tk.END).strip())
+            except ValidationError as e:
+                messagebox.showerror("Error", str(e))
                 return
-            
-            self.cur.execute("""
-                INSERT INTO Reviews (user_id, set_id, rating, comment)
-                VALUES (?, ?, ?, ?)
-            """, (self.current_user[0], set_id, int(rating), comment))
-            self.conn.commit()
+            # The rating triggers logged the item, so its listing row picks up the new average
+            self.refresh_views()
             messagebox.showinfo("Success", "Review submitted")
             review_window.destroy()
         
@@ -873,77 +860,120 @@ class JewelryMarketplaceApp:
             messagebox.showerror("Error", "Cart is empty")
             return
         
-        total = sum(item['price'] * item['quantity'] for item in self.cart)
-        
-        self.cur.execute("""
-            INSERT INTO Orders (user_id, total_amount, status)
-            VALUES (?, ?, ?)
-        """, (self.current_user[0], total, 'pending'))
-        order_id = self.cur.lastrowid
-        
-        for item in self.cart:
-            if item['type'] == 'product':
-                self.cur.execute("""
-                    INSERT INTO Order_Items (order_id, product_id, quantity, unit_price)
-                    VALUES (?, ?, ?, ?)
-                """, (order_id, item['id'], item['quantity'], item['price']))
-                
-                self.cur.execute("""
-                    UPDATE Products
-                    SET stock_quantity = stock_quantity - ?
-                    WHERE id = ?
-                """, (item['quantity'], item['id']))
-                
-            else:
-                self.cur.execute("""
-                    INSERT INTO Order_Items (order_id, set_id, quantity, unit_price)
-                    VALUES (?, ?, ?, ?)
-                """, (order_id, item['id'], item['quantity'], item['price']))
-                
-                self.cur.execute("""
-                    UPDATE Sets
-                    SET stock_quantity = stock_quantity - ?
-                    WHERE id = ?
-                """, (item['quantity'], item['id']))
-        
-        transaction_id = f"TRANS_{order_id}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}"
-        self.cur.execute("""
-            INSERT INTO Payments (order_id, amount, payment_method, payment_status, transaction_id)
-            VALUES (?, ?, ?, ?, ?)
-        """, (order_id, total, self.payment_method_var.get(), 'completed', transaction_id))
-        
-        self.conn.commit()
+        if self.placing_order:
+            return
         
+        # The cart is snapshotted so shortfall indexes still name the right items
+        cart = list(self.cart)
+        lines = [CartLine(item['type'], item['id'], item['quantity'], item['price']) for item in cart]
+        self.placing_order = True
+        self.status_var.set("Placing order...")
+        # With a server this is an HTTP round-trip, so it runs on a worker like every other write
+        self.db.submit(lambda conn, user_id, payment_method:
+                       (self.remote or CheckoutEngine(conn)).place_order(user_id, lines, payment_method),
+                       self.current_user[0], self.payment_method_var.get(),
+                       on_done=self.finish_checkout,
+                       on_error=lambda e: self.checkout_failed(cart, e))
+
+    def finish_checkout(self, receipt):
+        """Empty the cart once the order has committed"""
+        self.placing_order = False
         self.cart = []
         self.update_cart_display()
-        self.load_products()
-        self.load_sets()
-        self.load_orders()
+        self.refresh_views()
+        self.status_var.set(f"Welcome, {self.current_user[4]} {self.current_user[5]}")
+        
+        messagebox.showinfo("Success", f"Order placed successfully! Order ID: {receipt.order_id}")
+
+    def checkout_failed(self, cart, error):
+        """Explain why an order was not placed; the cart is kept so it can be retried"""
+        self.placing_order = False
+        self.status_var.set(f"Welcome, {self.current_user[4]} {self.current_user[5]}")
+        if isinstance(error, OutOfStockError):
+            problems = []
+            for shortfall in error.shortfalls:
+                name = cart[shortfall.index]['name']
+                if shortfall.available is None:
+                    problems.append(f"{name}: no longer available")
+                else:
+                    problems.append(f"{name}: {shortfall.requested} requested, {shortfall.available} in stock")
+            messagebox.showerror("Insufficient Stock", "Your order was not placed:\n\n" + "\n".join(problems))
+            self.refresh_views()
+        elif isinstance(error, ServiceUnavailableError):
+            messagebox.showerror("Error", f"Could not reach the marketplace server: {error}\n\n"
+                                          "Check your orders before trying again.")
+        elif isinstance(error, AuthenticationError):
+            messagebox.showerror("Error", f"Your session has ended, please log in again: {error}")
+        elif isinstance(error, (ValidationError, NotFoundError, ConflictError)):
+            messagebox.showerror("Error", f"Your order was not placed: {error}")
+        else:
+            messagebox.showerror("Error", f"Checkout failed, nothing was charged: {error}")
+
+    def refresh_views(self):
+        """Update only the listed rows that changed since the last refresh"""
+        self.snapshots.wake()
+        changes = self.changes.poll()
+        if changes is None:
+            # The change log was pruned past us, so diff against a full reload
+            if self.current_user:
+                self.load_products()
+                self.load_sets()
+                self.load_orders()
+            return
         
-        messagebox.showinfo("Success", f"Order placed successfully! Order ID: {order_id}")
+        if changes["Categories"]:
+            self.categories.invalidate()
+            self.load_categories()
+            if hasattr(self, 'product_filters'):
+                # Category names are shown in every product row
+                self.products_list.reload()
+                changes["Products"].clear()
+        if changes["Products"] and hasattr(self, 'product_filters'):
+            filters, sort = self.product_filters, self.product_sort
+            self.products_list.apply_changes(
+                changes["Products"],
+                lambda product_id: self.catalog.product_row(product_id, filters),
+                lambda row: self.catalog.sort_key(row, sort),
+                descending=SORTS[sort][2]
+            )
+        if changes["Sets"] and hasattr(self, 'set_filters'):
+            filters, sort = self.set_filters, self.set_sort
+            self.sets_list.apply_changes(
+                changes["Sets"],
+                lambda set_id: self.catalog.set_row(set_id, filters),
+                lambda row: self.catalog.sort_key(row, sort),
+                descending=SORTS[sort][2]
+            )
+        if changes["Orders"] and self.current_user:
+            self.orders_list.apply_changes(
+                changes["Orders"],
+                self.fetch_order_row,
+                lambda row: (row[1], row[0]),
+                descending=True
+            )
+
+    def poll_changes(self):
+        """Refresh the views when another connection has committed"""
+        if self.changes.external_change():
+            self.refresh_views()
+        self.root.after(CHANGE_POLL_MS, self.poll_changes)
 
     def load_orders(self):
         """Load user orders"""
         if not self.current_user:
             return
         
-        for item in self.orders_tree.get_children():
-            self.orders_tree.delete(item)
-        
-        self.cur.execute("""
-            SELECT id, order_date, total_amount, status
-            FROM Orders
-            WHERE user_id = ?
-            ORDER BY order_date DESC
-        """, (self.current_user[0],))
-        
-        for row in self.cur.fetchall():
-            self.orders_tree.insert("", tk.END, values=(
-                row[0],
-                row[1],
-                f"${row[2]:.2f}",
-                row[3].capitalize()
-            ))
+        self.orders_list.reload()
+
+    def fetch_order_page(self, conn, cursor, limit):
+        """Fetch one page of the current user's orders, newest first (worker thread)"""
+        if not self.current_user:
+            return [], None
+        return (self.remote or OrderService(conn)).page_user_orders(self.current_user[0], cursor, limit)
+
+    def fetch_order_row(self, order_id):
+        """Fetch one of the current user's orders as the orders list shows it"""
+        return self.orders.user_order(self.current_user[0], order_id)
 
     def view_order_details(self, event):
         """View order details on double-click"""
@@ -953,34 +983,25 @@ class JewelryMarketplaceApp:
         
         order_id = self.orders_tree.item(selected[0])['values'][0]
         
-        self.cur.execute("""
-            SELECT oi.quantity, oi.unit_price,
-                   COALESCE(p.name, s.name) as item_name,
-                   CASE WHEN p.id IS NOT NULL THEN 'product' ELSE 'set' END as item_type
-            FROM Order_Items oi
-            LEFT JOIN Products p ON oi.product_id = p.id
-            LEFT JOIN Sets s ON oi.set_id = s.id
-            WHERE oi.order_id = ?
-        """, (order_id,))
-        
-        items = self.cur.fetchall()
+        try:
+            order = self.orders.order_details(order_id)
+        except NotFoundError as e:
+            messagebox.showerror("Error", str(e))
+            return
         
         details = f"Order ID: {order_id}\n\nItems:\n"
         total = 0
-        for item in items:
-            subtotal = item[0] * item[1]
+        for line in order.lines:
+            subtotal = line.quantity * line.unit_price
             total += subtotal
-            details += f"{item[3].capitalize()}: {item[2]}\n"
-            details += f"Quantity: {item[0]}\n"
-            details += f"Unit Price: ${item[1]:.2f}\n"
+            details += f"{line.item_type.capitalize()}: {line.item_name}\n"
+            details += f"Quantity: {line.quantity}\n"
+            details += f"Unit Price: ${line.unit_price:.2f}\n"
             details += f"Subtotal: ${subtotal:.2f}\n\n"
         
         details += f"Total: ${total:.2f}"
-        
-        self.cur.execute("SELECT status, order_date FROM Orders WHERE id = ?", (order_id,))
-        order = self.cur.fetchone()
-        details += f"\nStatus: {order[0].capitalize()}"
-        details += f"\nOrder Date: {order[1]}"
+        details += f"\nStatus: {order.status.capitalize()}"
+        details += f"\nOrder Date: {order.order_date}"
         
         order_window = tk.Toplevel(self.root)
         order_window.title("Order Details")
@@ -1015,71 +1036,36 @@ class JewelryMarketplaceApp:
         self.profile_phone.insert(0, self.current_user[7])
 
     def update_profile(self):
-        """Update user profile"""
+        """Update user profile; a new password is hashed on a worker"""
         if not self.current_user:
             return
         
-        email = self.profile_email.get()
-        firstname = self.profile_firstname.get()
-        lastname = self.profile_lastname.get()
-        address = self.profile_address.get()
-        phone = self.profile_phone.get()
-        password = self.profile_password.get()
-        confirm_password = self.profile_confirm_password.get()
-        
-        if not all([email, firstname, lastname, address, phone]):
-            messagebox.showerror("Error", "All fields are required")
-            return
-        
-        if password and password != confirm_password:
-            messagebox.showerror("Error", "Passwords do not match")
-            return
-        
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
-            messagebox.showerror("Error", "Invalid email format")
-            return
-        
-        # Validate phone number format
-        phone_digits = phone.replace('+91', '') if phone.startswith('+91') else phone
-        if not (phone_digits.isdigit() and len(phone_digits) == 10):
-            messagebox.showerror("Error", "Phone number must be exactly 10 digits")
-            return
-        
-        full_phone = f"+91{phone_digits}"
-        
-        try:
-            update_query = """
-                UPDATE Users
-                SET email = ?, firstname = ?, lastname = ?, address = ?, phone = ?
-                WHERE id = ?
-            """
-            params = [email, firstname, lastname, address, full_phone, self.current_user[0]]
-            
-            if password:
-                update_query = """
-                    UPDATE Users
-                    SET email = ?, firstname = ?, lastname = ?, address = ?, phone = ?, password = ?
-                    WHERE id = ?
-                """
-                params = [email, firstname, lastname, address, full_phone, self.hash_password(password), self.current_user[0]]
-            
-            self.cur.execute(update_query, params)
-            self.conn.commit()
-            
-            self.cur.execute("SELECT * FROM Users WHERE id = ?", (self.current_user[0],))
-            self.current_user = self.cur.fetchone()
-            
-            messagebox.showinfo("Success", "Profile updated successfully")
-            self.profile_password.delete(0, tk.END)
-            self.profile_confirm_password.delete(0, tk.END)
-            self.status_var.set(f"Welcome, {self.current_user[4]} {self.current_user[5]}")
-            
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Error", "Email already exists")
+        update = ProfileUpdate(
+            self.profile_email.get(),
+            self.profile_firstname.get(),
+            self.profile_lastname.get(),
+            self.profile_address.get(),
+            self.profile_phone.get(),
+            self.profile_password.get(),
+            self.profile_confirm_password.get()
+        )
+        
+        self.status_var.set("Saving profile...")
+        self.db.submit(lambda conn, user_id: AccountService(conn).update_profile(user_id, update),
+                       self.current_user[0], on_done=self.finish_update_profile,
+                       on_error=self.account_failed)
+
+    def finish_update_profile(self, user):
+        """Show the saved profile"""
+        self.current_user = user
+        messagebox.showinfo("Success", "Profile updated successfully")
+        self.profile_password.delete(0, tk.END)
+        self.profile_confirm_password.delete(0, tk.END)
+        self.status_var.set(f"Welcome, {self.current_user[4]} {self.current_user[5]}")
 
     def add_product(self):
         """Add new product (admin)"""
-        if not self.current_user or self.current_user[1] != "admin":
+        if not self.current_user or self.current_user[1] != ADMIN_USERNAME:
             return
         
         product_window = tk.Toplevel(self.root)
@@ -1102,8 +1088,7 @@ class JewelryMarketplaceApp:
                 entry.grid(row=i, column=1, pady=10)
             elif key == "category":
                 entry = ttk.Combobox(product_window, width=27)
-                self.cur.execute("SELECT name FROM Categories")
-                entry['values'] = [row[0] for row in self.cur.fetchall()]
+                entry['values'] = self.categories.names()
                 entry.grid(row=i, column=1, pady=10)
             else:
                 entry = ttk.Entry(product_window, width=30)
@@ -1111,44 +1096,28 @@ class JewelryMarketplaceApp:
             entries[key] = entry
         
         def submit_product():
-            name = entries['name'].get()
-            description = entries['description'].get("1.0", tk.END).strip()
-            price = entries['price'].get()
-            stock = entries['stock'].get()
-            category = entries['category'].get()
-            
-            if not all([name, price, stock, category]):
-                messagebox.showerror("Error", "All fields except description are required")
+            try:
+                product = product_input(
+                    entries['name'].get(),
+                    entries['description'].get("1.0", tk.END).strip(),
+                    entries['price'].get(),
+                    entries['stock'].get(),
+                    self.categories.id_for(entries['category'].get())
+                )
+            except ValidationError as e:
+                messagebox.showerror("Error", str(e))
                 return
             
-            try:
-                price = float(price)
-                stock = int(stock)
-                
-                self.cur.execute("SELECT id FROM Categories WHERE name = ?", (category,))
-                category_id = self.cur.fetchone()
-                if not category_id:
-                    messagebox.showerror("Error", "Invalid category")
-                    return
-                
-                self.cur.execute("""
-                    INSERT INTO Products (name, description, price, stock_quantity, category_id)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (name, description, price, stock, category_id[0]))
-                self.conn.commit()
-                
-                messagebox.showinfo("Success", "Product added successfully")
-                self.load_products()
-                product_window.destroy()
-                
-            except ValueError:
-                messagebox.showerror("Error", "Price must be a number and stock must be an integer")
+            self.catalog_admin.add_product(product)
+            messagebox.showinfo("Success", "Product added successfully")
+            self.refresh_views()
+            product_window.destroy()
         
         ttk.Button(product_window, text="Add Product", command=submit_product).grid(row=len(fields), column=0, columnspan=2, pady=15)
 
     def update_product(self):
         """Update existing product (admin)"""
-        if not self.current_user or self.current_user[1] != "admin":
+        if not self.current_user or self.current_user[1] != ADMIN_USERNAME:
             return
         
         selected = self.products_tree.selection()
@@ -1162,14 +1131,13 @@ class JewelryMarketplaceApp:
         product_window.title("Update Product")
         product_window.geometry("400x500")
         
-        self.cur.execute("SELECT name, description, price, stock_quantity, category_id FROM Products WHERE id = ?", (product_id,))
-        product = self.cur.fetchone()
+        product = self.catalog.get_product(product_id)
         
         fields = [
-            ("Name:", "name", product[0]),
-            ("Description:", "description", product[1]),
-            ("Price:", "price", str(product[2])),
-            ("Stock Quantity:", "stock", str(product[3]))
+            ("Name:", "name", product.name),
+            ("Description:", "description", product.description),
+            ("Price:", "price", str(product.price)),
+            ("Stock Quantity:", "stock", str(product.stock_quantity))
         ]
         
         entries = {}
@@ -1187,54 +1155,34 @@ class JewelryMarketplaceApp:
         
         ttk.Label(product_window, text="Category:").grid(row=len(fields), column=0, sticky=tk.W, pady=10)
         category_combo = ttk.Combobox(product_window, width=27)
-        self.cur.execute("SELECT name FROM Categories")
-        categories = [row[0] for row in self.cur.fetchall()]
-        category_combo['values'] = categories
-        self.cur.execute("SELECT name FROM Categories WHERE id = ?", (product[4],))
-        category_combo.set(self.cur.fetchone()[0])
+        category_combo['values'] = self.categories.names()
+        category_combo.set(self.categories.name_for(product.category_id))
         category_combo.grid(row=len(fields), column=1, pady=10)
         entries['category'] = category_combo
         
         def submit_update():
-            name = entries['name'].get()
-            description = entries['description'].get("1.0", tk.END).strip()
-            price = entries['price'].get()
-            stock = entries['stock'].get()
-            category = entries['category'].get()
-            
-            if not all([name, price, stock, category]):
-                messagebox.showerror("Error", "All fields except description are required")
+            try:
+                product = product_input(
+                    entries['name'].get(),
+                    entries['description'].get("1.0", tk.END).strip(),
+                    entries['price'].get(),
+                    entries['stock'].get(),
+                    self.categories.id_for(entries['category'].get())
+                )
+            except ValidationError as e:
+                messagebox.showerror("Error", str(e))
                 return
             
-            try:
-                price = float(price)
-                stock = int(stock)
-                
-                self.cur.execute("SELECT id FROM Categories WHERE name = ?", (category,))
-                category_id = self.cur.fetchone()
-                if not category_id:
-                    messagebox.showerror("Error", "Invalid category")
-                    return
-                
-                self.cur.execute("""
-                    UPDATE Products
-                    SET name = ?, description = ?, price = ?, stock_quantity = ?, category_id = ?
-                    WHERE id = ?
-                """, (name, description, price, stock, category_id[0], product_id))
-                self.conn.commit()
-                
-                messagebox.showinfo("Success", "Product updated successfully")
-                self.load_products()
-                product_window.destroy()
-                
-            except ValueError:
-                messagebox.showerror("Error", "Price must be a number and stock must be an integer")
+            self.catalog_admin.update_product(product_id, product)
+            messagebox.showinfo("Success", "Product updated successfully")
+            self.refresh_views()
+            product_window.destroy()
         
         ttk.Button(product_window, text="Update Product", command=submit_update).grid(row=len(fields)+1, column=0, columnspan=2, pady=15)
 
     def delete_product(self):
         """Delete selected product (admin)"""
-        if not self.current_user or self.current_user[1] != "admin":
+        if not self.current_user or self.current_user[1] != ADMIN_USERNAME:
             return
         
         selected = self.products_tree.selection()
@@ -1246,16 +1194,15 @@ class JewelryMarketplaceApp:
         
         if messagebox.askyesno("Confirm", "Are you sure you want to delete this product?"):
             try:
-                self.cur.execute("DELETE FROM Products WHERE id = ?", (product_id,))
-                self.conn.commit()
+                self.catalog_admin.delete_product(product_id)
                 messagebox.showinfo("Success", "Product deleted successfully")
-                self.load_products()
-            except sqlite3.IntegrityError:
-                messagebox.showerror("Error", "Cannot delete product with existing orders or set items")
+                self.refresh_views()
+            except ConflictError as e:
+                messagebox.showerror("Error", str(e))
 
     def add_set(self):
         """Add new set (admin)"""
-        if not self.current_user or self.current_user[1] != "admin":
+        if not self.current_user or self.current_user[1] != ADMIN_USERNAME:
             return
         
         set_window = tk.Toplevel(self.root)
@@ -1285,8 +1232,7 @@ class JewelryMarketplaceApp:
         products_frame = ttk.Frame(set_window)
         products_frame.grid(row=len(fields)+1, column=0, columnspan=2, pady=10)
         
-        self.cur.execute("SELECT id, name FROM Products")
-        products = self.cur.fetchall()
+        products = self.catalog.product_summaries()
         
         selected_products = []
         for i, (pid, name) in enumerate(products):
@@ -1295,45 +1241,27 @@ class JewelryMarketplaceApp:
             selected_products.append((pid, var))
         
         def submit_set():
-            name = entries['name'].get()
-            description = entries['description'].get("1.0", tk.END).strip()
-            price = entries['price'].get()
-            stock = entries['stock'].get()
-            
-            if not all([name, price, stock]):
-                messagebox.showerror("Error", "Name, price, and stock quantity are required")
+            try:
+                set_info = set_input(
+                    entries['name'].get(),
+                    entries['description'].get("1.0", tk.END).strip(),
+                    entries['price'].get(),
+                    entries['stock'].get()
+                )
+            except ValidationError as e:
+                messagebox.showerror("Error", str(e))
                 return
             
-            try:
-                price = float(price)
-                stock = int(stock)
-                
-                self.cur.execute("""
-                    INSERT INTO Sets (name, description, price, stock_quantity)
-                    VALUES (?, ?, ?, ?)
-                """, (name, description, price, stock))
-                set_id = self.cur.lastrowid
-                
-                for pid, var in selected_products:
-                    if var.get():
-                        self.cur.execute("""
-                            INSERT INTO Set_Items (set_id, product_id)
-                            VALUES (?, ?)
-                        """, (set_id, pid))
-                
-                self.conn.commit()
-                messagebox.showinfo("Success", "Set added successfully")
-                self.load_sets()
-                set_window.destroy()
-                
-            except ValueError:
-                messagebox.showerror("Error", "Price must be a number and stock must be an integer")
+            self.catalog_admin.add_set(set_info, [pid for pid, var in selected_products if var.get()])
+            messagebox.showinfo("Success", "Set added successfully")
+            self.refresh_views()
+            set_window.destroy()
         
         ttk.Button(set_window, text="Add Set", command=submit_set).grid(row=len(fields)+2, column=0, columnspan=2, pady=15)
 
     def update_set(self):
         """Update existing set (admin)"""
-        if not self.current_user or self.current_user[1] != "admin":
+        if not self.current_user or self.current_user[1] != ADMIN_USERNAME:
             return
         
         selected = self.sets_tree.selection()
@@ -1347,14 +1275,13 @@ class JewelryMarketplaceApp:
         set_window.title("Update Set")
         set_window.geometry("600x600")
         
-        self.cur.execute("SELECT name, description, price, stock_quantity FROM Sets WHERE id = ?", (set_id,))
-        set_info = self.cur.fetchone()
+        set_info = self.catalog.get_set(set_id)
         
         fields = [
-            ("Name:", "name", set_info[0]),
-            ("Description:", "description", set_info[1]),
-            ("Price:", "price", str(set_info[2])),
-            ("Stock Quantity:", "stock", str(set_info[3]))
+            ("Name:", "name", set_info.name),
+            ("Description:", "description", set_info.description),
+            ("Price:", "price", str(set_info.price)),
+            ("Stock Quantity:", "stock", str(set_info.stock_quantity))
         ]
         
         entries = {}
@@ -1375,11 +1302,8 @@ class JewelryMarketplaceApp:
         products_frame = ttk.Frame(set_window)
         products_frame.grid(row=len(fields)+1, column=0, columnspan=2, pady=10)
         
-        self.cur.execute("SELECT id, name FROM Products")
-        products = self.cur.fetchall()
-        
-        self.cur.execute("SELECT product_id FROM Set_Items WHERE set_id = ?", (set_id,))
-        current_product_ids = set(row[0] for row in self.cur.fetchall())
+        products = self.catalog.product_summaries()
+        current_product_ids = self.catalog.set_product_ids(set_id)
         
         selected_products = []
         for i, (pid, name) in enumerate(products):
@@ -1388,47 +1312,27 @@ class JewelryMarketplaceApp:
             selected_products.append((pid, var))
         
         def submit_update():
-            name = entries['name'].get()
-            description = entries['description'].get("1.0", tk.END).strip()
-            price = entries['price'].get()
-            stock = entries['stock'].get()
-            
-            if not all([name, price, stock]):
-                messagebox.showerror("Error", "Name, price, and stock quantity are required")
+            try:
+                set_info = set_input(
+                    entries['name'].get(),
+                    entries['description'].get("1.0", tk.END).strip(),
+                    entries['price'].get(),
+                    entries['stock'].get()
+                )
+            except ValidationError as e:
+                messagebox.showerror("Error", str(e))
                 return
             
-            try:
-                price = float(price)
-                stock = int(stock)
-                
-                self.cur.execute("""
-                    UPDATE Sets
-                    SET name = ?, description = ?, price = ?, stock_quantity = ?
-                    WHERE id = ?
-                """, (name, description, price, stock, set_id))
-                
-                self.cur.execute("DELETE FROM Set_Items WHERE set_id = ?", (set_id,))
-                
-                for pid, var in selected_products:
-                    if var.get():
-                        self.cur.execute("""
-                            INSERT INTO Set_Items (set_id, product_id)
-                            VALUES (?, ?)
-                        """, (set_id, pid))
-                
-                self.conn.commit()
-                messagebox.showinfo("Success", "Set updated successfully")
-                self.load_sets()
-                set_window.destroy()
-                
-            except ValueError:
-                messagebox.showerror("Error", "Price must be a number and stock must be an integer")
+            self.catalog_admin.update_set(set_id, set_info, [pid for pid, var in selected_products if var.get()])
+            messagebox.showinfo("Success", "Set updated successfully")
+            self.refresh_views()
+            set_window.destroy()
         
         ttk.Button(set_window, text="Update Set", command=submit_update).grid(row=len(fields)+2, column=0, columnspan=2, pady=15)
 
     def delete_set(self):
         """Delete selected set (admin)"""
-        if not self.current_user or self.current_user[1] != "admin":
+        if not self.current_user or self.current_user[1] != ADMIN_USERNAME:
             return
         
         selected = self.sets_tree.selection()
@@ -1440,26 +1344,23 @@ class JewelryMarketplaceApp:
         
         if messagebox.askyesno("Confirm", "Are you sure you want to delete this set?"):
             try:
-                self.cur.execute("DELETE FROM Set_Items WHERE set_id = ?", (set_id,))
-                self.cur.execute("DELETE FROM Sets WHERE id = ?", (set_id,))
-                self.conn.commit()
+                self.catalog_admin.delete_set(set_id)
                 messagebox.showinfo("Success", "Set deleted successfully")
-                self.load_sets()
-            except sqlite3.IntegrityError:
-                messagebox.showerror("Error", "Cannot delete set with existing orders")
+                self.refresh_views()
+            except ConflictError as e:
+                messagebox.showerror("Error", str(e))
 
     def update_order_status(self):
         """Update order status (admin)"""
-        if not self.current_user or self.current_user[1] != "admin":
+        if not self.current_user or self.current_user[1] != ADMIN_USERNAME:
             return
         
         order_id = simpledialog.askinteger("Order ID", "Enter Order ID:")
         if not order_id:
             return
         
-        self.cur.execute("SELECT status FROM Orders WHERE id = ?", (order_id,))
-        order = self.cur.fetchone()
-        if not order:
+        status = self.orders.order_status(order_id)
+        if status is None:
             messagebox.showerror("Error", "Order not found")
             return
         
@@ -1468,22 +1369,38 @@ class JewelryMarketplaceApp:
         status_window.geometry("300x200")
         
         ttk.Label(status_window, text="Select New Status:").pack(pady=10)
-        status_var = tk.StringVar(value=order[0])
+        status_var = tk.StringVar(value=status)
         status_combo = ttk.Combobox(status_window, textvariable=status_var, state="readonly")
-        status_combo['values'] = ('pending', 'shipped', 'delivered')
+        status_combo['values'] = ORDER_STATUSES
         status_combo.pack(pady=10)
         
         def submit_status():
-            new_status = status_var.get()
-            self.cur.execute("UPDATE Orders SET status = ? WHERE id = ?", (new_status, order_id))
-            self.conn.commit()
+            try:
+                self.orders.set_status(order_id, status_var.get())
+            except NotFoundError as e:
+                messagebox.showerror("Error", str(e))
+                return
             messagebox.showinfo("Success", "Order status updated")
-            self.load_orders()
+            self.refresh_views()
             status_window.destroy()
         
         ttk.Button(status_window, text="Update Status", command=submit_status).pack(pady=15)
 
+    def bulk_update_status(self):
+        """Move many orders to one status in a single transaction (admin)"""
+        if not self.current_user or self.current_user[1] != ADMIN_USERNAME:
+            return
+        BulkStatusDialog(self.root, self.db, lambda conn: self.remote or OrderService(conn), on_change=self.refresh_views)
+
+    def view_sales(self):
+        """Revenue, units and orders from the sales rollups (admin)"""
+        if not self.current_user or self.current_user[1] != ADMIN_USERNAME:
+            return
+        SalesDashboard(self.root, self.db, lambda conn: self.remote or SalesService(conn))
+
 if __name__ == "__main__":
     root = tk.Tk()
+    profiler.mark("tk init")
     app = JewelryMarketplaceApp(root)
+    root.after_idle(profiler.finish)
     root.mainloop()
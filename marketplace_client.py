@@ -0,0 +1,180 @@
+import json
+import sqlite3
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+
+from catalog_repository import DEFAULT_SORT, ProductRow, SetRow
+from checkout_engine import Receipt, Shortfall
+from marketplace_core import (
+    AuthenticationError, ConflictError, NotFoundError, OutOfStockError, ServiceUnavailableError, User,
+    ValidationError,
+)
+from marketplace_core.accounts import DEFAULT_USER_SORT, UserFilter, UserRow
+from marketplace_core.orders import (
+    DEFAULT_ORDER_SORT, AdminOrderRow, OrderDetails, OrderFilter, OrderLine, OrderRow, TransitionResult,
+)
+from marketplace_core.sales import TOP_ROWS, CategorySales, DaySales, ItemSales, SalesDashboard, StatusSales
+
+# Environment variable naming a marketplace_server, e.g. http://127.0.0.1:8765
+SERVER_ENV = "MARKETPLACE_SERVER"
+
+# Exception raised for each error status the server returns
+ERRORS = {400: ValidationError, 401: AuthenticationError, 403: AuthenticationError, 404: NotFoundError,
+          409: ConflictError, 503: sqlite3.OperationalError}
+
+
+def cursor_value(cursor):
+    """JSON cursors arrive as lists; the services compare them as tuples"""
+    return tuple(cursor) if isinstance(cursor, list) else cursor
+
+
+class MarketplaceClient:
+    """Talk to a marketplace_server with the same method signatures as the services.
+
+    Rows come back as the same namedtuples and errors as the same
+    exceptions, so callers can swap a client in for CatalogRepository,
+    AccountService, OrderService, SalesService and CheckoutEngine. The
+    server knows who is logged in from the session token, so user_id
+    arguments are only kept for signature compatibility. Each call opens
+    its own HTTP request, so one client is safe to share with worker
+    threads.
+    """
+
+    def __init__(self, base_url, timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.token = None
+
+    def request(self, method, path, params=None, body=None):
+        """Send one request and return the decoded JSON body, raising the mapped error on failure"""
+        url = self.base_url + path
+        if params:
+            url += "?" + urlencode({name: value for name, value in params.items() if value is not None})
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(url, data=data, method=method)
+        req.add_header("Content-Type", "application/json")
+        if self.token:
+            req.add_header("Authorization", f"Bearer {self.token}")
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            payload = json.loads(e.read() or b"{}")
+            if e.code == 409 and "shortfalls" in payload:
+                raise OutOfStockError([Shortfall(**s) for s in payload["shortfalls"]])
+            raise ERRORS.get(e.code, sqlite3.Error)(payload.get("error", e.reason))
+        except (urllib.error.URLError, OSError) as e:
+            # Refused connections, DNS failures and timeouts, so no response to map
+            raise ServiceUnavailableError(f"{self.base_url} is unreachable: {getattr(e, 'reason', e)}") from e
+
+    def start_session(self, payload):
+        """Keep the session token and return the logged-in User"""
+        self.token = payload["token"]
+        return User(password=None, **payload["user"])
+
+    def page(self, path, row_type, params):
+        """One (rows, next_cursor) page of row_type"""
+        payload = self.request("GET", path, params)
+        return [row_type(**row) for row in payload["rows"]], cursor_value(payload["next"])
+
+    def page_params(self, after, limit):
+        return {"after": json.dumps(after) if after is not None else None, "limit": limit}
+
+    # AccountService
+
+    def login(self, username, password):
+        """Return the User for matching credentials, or None"""
+        try:
+            return self.start_session(self.request("POST", "/login", body={"username": username, "password": password}))
+        except AuthenticationError:
+            return None
+
+    def authenticate_admin(self, username, password):
+        """Return the admin User, or raise AuthenticationError"""
+        return self.start_session(self.request("POST", "/admin/login",
+                                               body={"username": username, "password": password}))
+
+    def user_params(self, filters):
+        return {"username_prefix": filters.username_prefix, "email_prefix": filters.email_prefix}
+
+    def page_users(self, filters=UserFilter(), sort=DEFAULT_USER_SORT, after=None, limit=100):
+        return self.page("/admin/users", UserRow,
+                         {**self.user_params(filters), "sort": sort, **self.page_params(after, limit)})
+
+    def count_users(self, filters=UserFilter()):
+        return self.request("GET", "/admin/users/count", self.user_params(filters))["count"]
+
+    # CatalogRepository
+
+    def catalog_params(self, filters, sort, after, limit):
+        return {"min_price": filters.min_price, "max_price": filters.max_price, "category_id": filters.category_id,
+                "search": filters.search, "sort": sort, **self.page_params(after, limit)}
+
+    def page_products(self, filters, sort=DEFAULT_SORT, after=None, limit=100):
+        return self.page("/products", ProductRow, self.catalog_params(filters, sort, after, limit))
+
+    def page_sets(self, filters, sort=DEFAULT_SORT, after=None, limit=100):
+        return self.page("/sets", SetRow, self.catalog_params(filters, sort, after, limit))
+
+    def categories(self):
+        """(id, name) of every category"""
+        return [(row["id"], row["name"]) for row in self.request("GET", "/categories")["categories"]]
+
+    # CheckoutEngine
+
+    def place_order(self, user_id, lines, payment_method):
+        """Place the order for lines; raises OutOfStockError like CheckoutEngine"""
+        payload = self.request("POST", "/checkout", body={"lines": [line._asdict() for line in lines],
+                                                          "payment_method": payment_method})
+        return Receipt(**payload)
+
+    # OrderService
+
+    def page_user_orders(self, user_id, after=None, limit=100):
+        return self.page("/orders", OrderRow, self.page_params(after, limit))
+
+    def order_details(self, order_id):
+        payload = self.request("GET", f"/orders/{order_id}")
+        return OrderDetails(payload["id"], payload["status"], payload["order_date"],
+                            [OrderLine(**line) for line in payload["lines"]])
+
+    def order_status(self, order_id):
+        """Return the status of an order, or None if it does not exist"""
+        try:
+            return self.order_details(order_id).status
+        except NotFoundError:
+            return None
+
+    def set_status(self, order_id, status):
+        self.request("POST", f"/admin/orders/{order_id}/status", body={"status": status})
+
+    def transitions(self, body):
+        return [TransitionResult(**result) for result in
+                self.request("POST", "/admin/orders/status", body=body)["results"]]
+
+    def transition_orders(self, order_ids, status):
+        return self.transitions({"order_ids": list(order_ids), "status": status})
+
+    def transition_matching(self, filters, status):
+        return self.transitions({"filters": filters._asdict(), "status": status})
+
+    def order_params(self, filters):
+        return filters._asdict()
+
+    def page_all_orders(self, filters=OrderFilter(), sort=DEFAULT_ORDER_SORT, after=None, limit=100):
+        return self.page("/admin/orders", AdminOrderRow,
+                         {**self.order_params(filters), "sort": sort, **self.page_params(after, limit)})
+
+    def count_all_orders(self, filters=OrderFilter()):
+        return self.request("GET", "/admin/orders/count", self.order_params(filters))["count"]
+
+    # SalesService
+
+    def sales_dashboard(self, date_from, date_to, limit=TOP_ROWS):
+        payload = self.request("GET", "/admin/sales", {"date_from": date_from, "date_to": date_to, "limit": limit})
+        return SalesDashboard(payload["date_from"], payload["date_to"],
+                              [DaySales(**row) for row in payload["days"]],
+                              [StatusSales(**row) for row in payload["statuses"]],
+                              [CategorySales(**row) for row in payload["categories"]],
+                              [ItemSales(**row) for row in payload["items"]])
@@ -0,0 +1,24 @@
+"""Headless marketplace services: typed inputs in, results or exceptions out.
+
+Nothing here touches Tk, so the same code backs the GUI, the admin
+terminal, benchmarks and any server. Services take a sqlite3 connection
+and commit their own writes; validation failures raise ValidationError
+with a message fit to show the user.
+"""
+from catalog_repository import CatalogFilter, CatalogRepository
+from checkout_engine import CartLine, CheckoutEngine, OutOfStockError
+from marketplace_core.accounts import (
+    ADMIN_USERNAME, USER_SORTS, AccountService, ProfileUpdate, Registration, User, UserFilter, user_filter,
+)
+from marketplace_core.catalog_admin import CatalogAdmin, ProductInput, SetInput, product_input, set_input
+from marketplace_core.exports import EXPORT_FORMATS, ExportResult, OrderExporter
+from marketplace_core.errors import (
+    AuthenticationError, ConflictError, NotFoundError, ServiceUnavailableError, ValidationError,
+)
+from marketplace_core.orders import (
+    COUNT_CAP, ORDER_SORTS, ORDER_STATUSES, ORDER_TRANSITIONS, OrderFilter, OrderService, TransitionResult,
+    order_filter, parse_order_ids, stale_filter,
+)
+from marketplace_core.passwords import KdfParams, PasswordHasher, hash_password, shared_hasher, verify_password
+from marketplace_core.reviews import ReviewService
+from marketplace_core.sales import SALES_RANGES, SalesDashboard, SalesService, sales_range
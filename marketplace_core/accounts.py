@@ -0,0 +1,244 @@
+import re
+import sqlite3
+from collections import namedtuple
+
+from marketplace_core.credentials import CREDENTIALS_JOIN, attach_credentials, save_hash
+from marketplace_core.errors import AuthenticationError, ConflictError, NotFoundError, ValidationError
+from marketplace_core.orders import COUNT_CAP, capped_count
+from marketplace_core.passwords import shared_hasher
+from sms_outbox import enqueue
+
+# Field order matches the Users table, so code indexing SELECT * rows keeps working
+User = namedtuple("User", "id username password email firstname lastname address phone")
+Registration = namedtuple("Registration", "username password confirm_password email firstname lastname address phone")
+UserRow = namedtuple("UserRow", "id username email firstname lastname")
+ProfileUpdate = namedtuple("ProfileUpdate", "email firstname lastname address phone password confirm_password")
+# Admin user browser filters; prefixes are case-sensitive
+UserFilter = namedtuple("UserFilter", "username_prefix email_prefix", defaults=(None, None))
+
+USER_COLUMNS = "id, username, password, email, firstname, lastname, address, phone"
+# USER_COLUMNS of Users u, then the credential store's hash (NULL if it has none)
+CREDENTIAL_COLUMNS = ", ".join(f"u.{column}" for column in User._fields) + ", h.hashed_password"
+EMAIL_PATTERN = re.compile(r"[^@]+@[^@]+\.[^@]+")
+PHONE_PREFIX = "+91"
+ADMIN_USERNAME = "admin"
+
+# Admin user browser sorts: (label, sort column, descending); username and email
+# have UNIQUE indexes and id is the rowid, so every page is read in order
+USER_SORTS = {
+    "id_asc": ("Oldest First", "id", False),
+    "id_desc": ("Newest First", "id", True),
+    "username_asc": ("Username: A to Z", "username", False),
+    "email_asc": ("Email: A to Z", "email", False),
+}
+DEFAULT_USER_SORT = "id_asc"
+
+
+def prefix_bounds(prefix):
+    """(low, high) such that low <= value < high exactly when value starts with prefix"""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def user_filter(username_prefix, email_prefix):
+    """Build a UserFilter from form fields; blank means no filter"""
+    return UserFilter(username_prefix.strip() or None, email_prefix.strip() or None)
+
+
+def validate_email(email):
+    """Raise ValidationError unless email looks like an address"""
+    if not EMAIL_PATTERN.match(email):
+        raise ValidationError("Invalid email format")
+
+
+def normalize_phone(phone):
+    """Return phone as +91 and 10 digits; a +91 prefix on the input is optional"""
+    digits = phone[len(PHONE_PREFIX):] if phone.startswith(PHONE_PREFIX) else phone
+    if not (digits.isdigit() and len(digits) == 10):
+        raise ValidationError("Phone number must be exactly 10 digits")
+    return f"{PHONE_PREFIX}{digits}"
+
+
+class AccountService:
+    """Login, registration, profiles and the user list, against the Users table.
+
+    Passwords are hashed and checked on passwords, a PasswordHasher that
+    defaults to the shared pool; hashes made with older parameters (or
+    the legacy unsalted SHA-256) are replaced on the next successful login.
+    The credential database is ATTACHed to conn (see credentials), so
+    construct services outside a transaction. Callers whose conn must not
+    write pass save_upgrade(user_id, stored), which is handed upgraded
+    hashes to save elsewhere instead.
+    """
+
+    def __init__(self, conn, passwords=None, credentials_path=None, save_upgrade=None):
+        self.conn = conn
+        self.passwords = passwords or shared_hasher()
+        self.save_upgrade = save_upgrade or self.save_upgraded_hash
+        attach_credentials(conn, credentials_path)
+
+    def get_user(self, user_id):
+        """Return the User with user_id, or None"""
+        row = self.conn.execute(f"SELECT {USER_COLUMNS} FROM Users WHERE id = ?", (user_id,)).fetchone()
+        return User(*row) if row else None
+
+    def user_conditions(self, filters, residual=False):
+        """WHERE conditions over Users u and their parameters for a UserFilter.
+
+        Prefixes become ranges rather than LIKE, so they can use the UNIQUE
+        indexes under the default binary collation. residual writes them
+        with unary +, checked per row of the order being walked instead.
+        """
+        conditions, params = [], []
+        for column, prefix in (("username", filters.username_prefix), ("email", filters.email_prefix)):
+            if prefix is not None:
+                value = f"+u.{column}" if residual else f"u.{column}"
+                conditions.append(f"{value} >= ? AND {value} < ?")
+                params += prefix_bounds(prefix)
+        return conditions, params
+
+    def page_users(self, filters=UserFilter(), sort=DEFAULT_USER_SORT, after=None, limit=100):
+        """Return (rows, next_cursor) for one page of the users matching filters"""
+        _, column, descending = USER_SORTS[sort]
+        direction = "DESC" if descending else "ASC"
+        # Sorted by id, pages walk the rowid and skip users outside the prefixes,
+        # stopping at limit, rather than sorting every user a prefix matches
+        conditions, params = self.user_conditions(filters, residual=column == "id")
+        if after is not None:
+            # Keyset pagination on (sort column, id); for the id sort that is just id
+            comparison = '<' if descending else '>'
+            if column == "id":
+                conditions.append(f"u.id {comparison} ?")
+                params.append(after[1])
+            else:
+                conditions.append(f"(u.{column}, u.id) {comparison} (?, ?)")
+                params += after
+        query = "SELECT u.id, u.username, u.email, u.firstname, u.lastname FROM Users u"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        order = f"u.id {direction}" if column == "id" else f"u.{column} {direction}, u.id {direction}"
+        query += f" ORDER BY {order} LIMIT ?"
+        params.append(limit)
+        rows = [UserRow(*row) for row in self.conn.execute(query, params)]
+        return rows, ((getattr(rows[-1], column), rows[-1].id) if len(rows) == limit else None)
+
+    def count_users(self, filters=UserFilter(), cap=COUNT_CAP):
+        """Number of users matching filters; cap + 1 means more than cap"""
+        conditions, params = self.user_conditions(filters)
+        query = "SELECT 1 FROM Users u"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return capped_count(self.conn, query, params, cap)
+
+    def login(self, username, password):
+        """Return the User for matching credentials, or None"""
+        found = self.lookup(username)
+        if found is None:
+            return None
+        user, stored = found
+        if not self.passwords.verify(password, stored or user.password):
+            return None
+        return self.upgrade_hash(user, stored, password)
+
+    def lookup(self, username):
+        """Return (User, credential store hash or None) in one joined query, or None"""
+        row = self.conn.execute(f"""
+            SELECT {CREDENTIAL_COLUMNS}
+            FROM Users u
+            {CREDENTIALS_JOIN}
+            WHERE u.username = ?
+        """, (username,)).fetchone()
+        return (User(*row[:-1]), row[-1]) if row else None
+
+    def upgrade_hash(self, user, stored, password):
+        """Rehash a verified password unless both stores hold the same current hash.
+
+        stored is the credential store's hash, None if it has none. Returns
+        the User with its current hash; a failed write is retried at the
+        next login.
+        """
+        if stored == user.password and not self.passwords.needs_rehash(stored):
+            return user
+        user = user._replace(password=self.passwords.hash(password))
+        self.save_upgrade(user.id, user.password)
+        return user
+
+    def save_upgraded_hash(self, user_id, stored):
+        """Write a login's upgraded hash to both stores and commit; on failure the next login retries"""
+        try:
+            save_hash(self.conn, user_id, stored)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"Password hash upgrade for user {user_id} deferred: {e}")
+
+    def register(self, form):
+        """Create the account in form and queue its welcome SMS; return the new user id.
+
+        The user, its credential store hash and the SMS commit together, so
+        the caller only has to wake the outbox worker afterwards.
+        """
+        if not all([form.username, form.password, form.email, form.firstname, form.lastname,
+                    form.address, form.phone]):
+            raise ValidationError("All fields are required")
+        if form.password != form.confirm_password:
+            raise ValidationError("Passwords do not match")
+        validate_email(form.email)
+        phone = normalize_phone(form.phone)
+
+        stored = self.passwords.hash(form.password)
+        cur = self.conn.cursor()
+        try:
+            cur.execute("""
+                INSERT INTO Users (username, password, email, firstname, lastname, address, phone)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (form.username, stored, form.email, form.firstname, form.lastname, form.address, phone))
+            user_id = cur.lastrowid
+            save_hash(cur, user_id, stored)
+            enqueue(cur, phone, f"Welcome to Jewelry Marketplace, {form.firstname}! "
+                                "Your account has been successfully created.")
+            self.conn.commit()
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            raise ConflictError("Username or email already exists")
+        return user_id
+
+    def update_profile(self, user_id, update):
+        """Apply update to the user's profile and return the updated User"""
+        if not all([update.email, update.firstname, update.lastname, update.address, update.phone]):
+            raise ValidationError("All fields are required")
+        if update.password and update.password != update.confirm_password:
+            raise ValidationError("Passwords do not match")
+        validate_email(update.email)
+        phone = normalize_phone(update.phone)
+
+        stored = self.passwords.hash(update.password) if update.password else None
+        try:
+            self.conn.execute("""
+                UPDATE Users SET email = ?, firstname = ?, lastname = ?, address = ?, phone = ?
+                WHERE id = ?
+            """, (update.email, update.firstname, update.lastname, update.address, phone, user_id))
+            if stored:
+                save_hash(self.conn, user_id, stored)
+            self.conn.commit()
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            raise ConflictError("Email already exists")
+        user = self.get_user(user_id)
+        if user is None:
+            raise NotFoundError(f"User {user_id} not found")
+        return user
+
+    def authenticate_admin(self, username, password):
+        """Return the admin User if password matches its credential store entry.
+
+        Raises AuthenticationError saying which check failed.
+        """
+        found = self.lookup(username)
+        if found is None:
+            raise AuthenticationError("User not found")
+        user, stored = found
+        if stored is None:
+            raise AuthenticationError("No hashed password found for user")
+        if username != ADMIN_USERNAME or not self.passwords.verify(password, stored):
+            raise AuthenticationError("Invalid credentials or not an admin user")
+        return self.upgrade_hash(user, stored, password)
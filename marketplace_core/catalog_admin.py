@@ -0,0 +1,100 @@
+import sqlite3
+from collections import namedtuple
+
+from marketplace_core.errors import ConflictError, ValidationError
+
+ProductInput = namedtuple("ProductInput", "name description price stock_quantity category_id")
+SetInput = namedtuple("SetInput", "name description price stock_quantity")
+
+
+def parse_price_and_stock(price, stock):
+    """Convert form text to (float price, int stock)"""
+    try:
+        return float(price), int(stock)
+    except ValueError:
+        raise ValidationError("Price must be a number and stock must be an integer")
+
+
+def product_input(name, description, price, stock, category_id):
+    """Validate product form fields; category_id is None for an unknown category"""
+    if not all([name, price, stock]):
+        raise ValidationError("All fields except description are required")
+    price, stock = parse_price_and_stock(price, stock)
+    if category_id is None:
+        raise ValidationError("Invalid category")
+    return ProductInput(name, description, price, stock, category_id)
+
+
+def set_input(name, description, price, stock):
+    """Validate set form fields"""
+    if not all([name, price, stock]):
+        raise ValidationError("Name, price, and stock quantity are required")
+    price, stock = parse_price_and_stock(price, stock)
+    return SetInput(name, description, price, stock)
+
+
+class CatalogAdmin:
+    """Admin writes to products and sets; every method commits"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def add_product(self, product):
+        """Insert a ProductInput and return its id"""
+        product_id = self.conn.execute("""
+            INSERT INTO Products (name, description, price, stock_quantity, category_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, product).lastrowid
+        self.conn.commit()
+        return product_id
+
+    def update_product(self, product_id, product):
+        """Overwrite a product with a ProductInput"""
+        self.conn.execute("""
+            UPDATE Products
+            SET name = ?, description = ?, price = ?, stock_quantity = ?, category_id = ?
+            WHERE id = ?
+        """, (*product, product_id))
+        self.conn.commit()
+
+    def delete_product(self, product_id):
+        """Delete a product that no order or set refers to"""
+        try:
+            self.conn.execute("DELETE FROM Products WHERE id = ?", (product_id,))
+            self.conn.commit()
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            raise ConflictError("Cannot delete product with existing orders or set items")
+
+    def add_set(self, set_info, product_ids):
+        """Insert a SetInput with its products and return its id"""
+        set_id = self.conn.execute("""
+            INSERT INTO Sets (name, description, price, stock_quantity)
+            VALUES (?, ?, ?, ?)
+        """, set_info).lastrowid
+        self.conn.executemany("INSERT INTO Set_Items (set_id, product_id) VALUES (?, ?)",
+                              [(set_id, product_id) for product_id in product_ids])
+        self.conn.commit()
+        return set_id
+
+    def update_set(self, set_id, set_info, product_ids):
+        """Overwrite a set and replace its products"""
+        self.conn.execute("""
+            UPDATE Sets
+            SET name = ?, description = ?, price = ?, stock_quantity = ?
+            WHERE id = ?
+        """, (*set_info, set_id))
+        self.conn.execute("DELETE FROM Set_Items WHERE set_id = ?", (set_id,))
+        self.conn.executemany("INSERT INTO Set_Items (set_id, product_id) VALUES (?, ?)",
+                              [(set_id, product_id) for product_id in product_ids])
+        self.conn.commit()
+
+    def delete_set(self, set_id):
+        """Delete a set and its item links unless an order refers to it"""
+        try:
+            self.conn.execute("DELETE FROM Set_Items WHERE set_id = ?", (set_id,))
+            self.conn.execute("DELETE FROM Sets WHERE id = ?", (set_id,))
+            self.conn.commit()
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            raise ConflictError("Cannot delete set with existing orders")
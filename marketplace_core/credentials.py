@@ -0,0 +1,47 @@
+"""Password hashes in the credential database, ATTACHed to the main connection.
+
+With both files on one connection a login is a single joined lookup and
+a registration writes Users and HashedPasswords in one transaction.
+SQLite makes such a commit atomic across files only under a rollback
+journal; in WAL mode each file commits atomically on its own, with main
+first. Users.password therefore keeps a copy of the hash, which is used
+whenever a user has no HashedPasswords row yet.
+"""
+import os
+
+from database import HASH_DB
+
+CREDENTIALS = "creds"
+
+# Add to a query over Users u to get h.hashed_password, NULL without a row
+CREDENTIALS_JOIN = f"LEFT JOIN {CREDENTIALS}.HashedPasswords h ON h.user_id = u.id"
+
+
+def credentials_path(conn):
+    """The credential database beside conn's main database file (in memory for an in-memory main)"""
+    main_file = next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main")
+    if not main_file:
+        return ":memory:"
+    return os.path.join(os.path.dirname(main_file), HASH_DB)
+
+
+def attach_credentials(conn, path=None):
+    """ATTACH the credential database to conn as creds unless it already is; call outside a transaction"""
+    if any(row[1] == CREDENTIALS for row in conn.execute("PRAGMA database_list")):
+        return
+    conn.execute(f"ATTACH DATABASE ? AS {CREDENTIALS}", (path or credentials_path(conn),))
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CREDENTIALS}.HashedPasswords (
+            user_id INTEGER PRIMARY KEY,
+            hashed_password VARCHAR(255) NOT NULL
+        )
+    """)
+
+
+def save_hash(conn, user_id, stored):
+    """Write a user's hash to both stores within the caller's transaction"""
+    conn.execute("UPDATE Users SET password = ? WHERE id = ?", (stored, user_id))
+    conn.execute(f"""
+        INSERT OR REPLACE INTO {CREDENTIALS}.HashedPasswords (user_id, hashed_password)
+        VALUES (?, ?)
+    """, (user_id, stored))
@@ -0,0 +1,18 @@
+class ValidationError(ValueError):
+    """Input rejected before touching the database; str() is the user-facing message"""
+
+
+class ConflictError(Exception):
+    """A write clashed with existing rows, e.g. a taken username or a referenced product"""
+
+
+class NotFoundError(LookupError):
+    """The row a request refers to does not exist"""
+
+
+class AuthenticationError(Exception):
+    """Credentials were rejected; str() says why"""
+
+
+class ServiceUnavailableError(ConnectionError):
+    """The marketplace server could not be reached or did not answer in time"""
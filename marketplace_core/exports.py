@@ -0,0 +1,187 @@
+"""Stream orders with their items and payment to CSV or JSON Lines.
+
+Rows come from one SELECT read with fetchmany in batches of FETCH_SIZE
+and are written as they arrive, so memory stays flat however many
+orders there are. The query walks Orders in id order and each order's
+items through idx_order_items_order, so SQLite never sorts either; a
+date range is first narrowed to the ids it spans through the date
+index, so a one-day export reads about one day of orders. A file
+is written under a temporary name and renamed when complete. A named
+since-last-export run records the highest order id it wrote in
+OrderExports only after the rename, so a failed run is simply repeated.
+"""
+import csv
+import gzip
+import json
+import os
+from collections import namedtuple
+
+from marketplace_core.errors import ValidationError
+from marketplace_core.orders import parse_day
+
+# One line per order item; orders without items get one line with empty item fields
+ExportRow = namedtuple("ExportRow", (
+    "order_id order_date user_id username status total_amount "
+    "item_id item_type item_ref item_name quantity unit_price "
+    "payment_method payment_status transaction_id payment_date"
+))
+ExportResult = namedtuple("ExportResult", "path rows orders last_order_id")
+
+EXPORT_FORMATS = ("csv", "jsonl")
+FETCH_SIZE = 1000
+
+
+def export_format(path, fmt=None):
+    """The format for path: fmt if given, else from the extension, ignoring .gz"""
+    if fmt is None:
+        name = path[:-3] if path.endswith(".gz") else path
+        fmt = os.path.splitext(name)[1].lstrip(".").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValidationError(f"Export format must be one of {', '.join(EXPORT_FORMATS)}")
+    return fmt
+
+
+def write_csv(rows, stream):
+    """Write a header and rows to a text stream; yields once per row so callers can count"""
+    writer = csv.writer(stream)
+    writer.writerow(ExportRow._fields)
+    for row in rows:
+        writer.writerow(row)
+        yield row
+
+
+def write_jsonl(rows, stream):
+    """Write one JSON object per row to a text stream; yields once per row"""
+    for row in rows:
+        stream.write(json.dumps(row._asdict()))
+        stream.write("\n")
+        yield row
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl}
+
+
+class OrderExporter:
+    """Streaming exports of Orders joined to Order_Items and Payments"""
+
+    def __init__(self, conn, fetch_size=FETCH_SIZE):
+        self.conn = conn
+        self.fetch_size = fetch_size
+
+    def rows(self, date_from=None, date_to=None, after_order_id=None):
+        """Yield an ExportRow per order item in order id order; dates are YYYY-MM-DD and inclusive"""
+        conditions, params = [], []
+        if after_order_id is not None:
+            conditions.append("o.id > ?")
+            params.append(after_order_id)
+        if date_from is not None or date_to is not None:
+            first, last = self.id_range(date_from, date_to)
+            if first is None:
+                return
+            conditions.append("o.id BETWEEN ? AND ?")
+            params += [first, last]
+            # Unary + checks the dates per row of that id range (ids and dates need
+            # not agree exactly) instead of sorting a date index range by id
+            if date_from is not None:
+                conditions.append("+o.order_date >= ?")
+                params.append(date_from)
+            if date_to is not None:
+                conditions.append("+o.order_date < date(?, '+1 day')")
+                params.append(date_to)
+        query = """
+            SELECT o.id, o.order_date, o.user_id, u.username, o.status, o.total_amount,
+                   oi.id, CASE WHEN oi.product_id IS NOT NULL THEN 'product' WHEN oi.set_id IS NOT NULL THEN 'set' END,
+                   COALESCE(oi.product_id, oi.set_id), COALESCE(pr.name, s.name), oi.quantity, oi.unit_price,
+                   p.payment_method, p.payment_status, p.transaction_id, p.payment_date
+            FROM Orders o
+            LEFT JOIN Users u ON u.id = o.user_id
+            LEFT JOIN Order_Items oi ON oi.order_id = o.id
+            LEFT JOIN Products pr ON pr.id = oi.product_id
+            LEFT JOIN Sets s ON s.id = oi.set_id
+            LEFT JOIN Payments p ON p.order_id = o.id
+        """
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY o.id, oi.id"
+        cursor = self.conn.execute(query, params)
+        try:
+            while True:
+                batch = cursor.fetchmany(self.fetch_size)
+                if not batch:
+                    return
+                for row in batch:
+                    yield ExportRow(*row)
+        finally:
+            cursor.close()
+
+    def id_range(self, date_from=None, date_to=None):
+        """(lowest, highest) id of the orders placed in the date range, read from idx_orders_date"""
+        conditions, params = [], []
+        if date_from is not None:
+            conditions.append("order_date >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            conditions.append("order_date < date(?, '+1 day')")
+            params.append(date_to)
+        return self.conn.execute(f"SELECT MIN(id), MAX(id) FROM Orders WHERE {' AND '.join(conditions)}",
+                                 params).fetchone()
+
+    def last_exported(self, name):
+        """Highest order id the named export has written, or None before its first run"""
+        row = self.conn.execute("SELECT last_order_id FROM OrderExports WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def mark_exported(self, name, last_order_id):
+        """Record that the named export has written every order up to last_order_id"""
+        self.conn.execute("""
+            INSERT INTO OrderExports (name, last_order_id) VALUES (?, ?)
+            ON CONFLICT (name) DO UPDATE SET last_order_id = excluded.last_order_id, exported_at = CURRENT_TIMESTAMP
+        """, (name, last_order_id))
+        self.conn.commit()
+
+    def export(self, path, fmt=None, date_from="", date_to="", since=None, compress=None, progress=None):
+        """Write matching rows to path and return an ExportResult.
+
+        since names an incremental export: only orders after its last run
+        are written, and the mark moves on once the file is in place. It
+        cannot be combined with a date range.
+        compress defaults to a .gz extension; progress(rows) is called
+        after every batch, from the calling thread.
+        """
+        fmt = export_format(path, fmt)
+        date_from, date_to = parse_day(date_from, "From"), parse_day(date_to, "To")
+        if date_from and date_to and date_from > date_to:
+            raise ValidationError("From date is after To date")
+        if since is not None:
+            if not since.strip():
+                raise ValidationError("Name the incremental export")
+            if date_from or date_to:
+                # The mark would skip older orders outside the range for good
+                raise ValidationError("An incremental export cannot also have a date range")
+        if compress is None:
+            compress = path.endswith(".gz")
+        after = self.last_exported(since) if since else None
+
+        partial = path + ".part"
+        opener = gzip.open if compress else open
+        count = orders = 0
+        last_order_id = after
+        try:
+            with opener(partial, "wt", encoding="utf-8", newline="") as stream:
+                for row in WRITERS[fmt](self.rows(date_from, date_to, after), stream):
+                    count += 1
+                    if row.order_id != last_order_id:
+                        orders += 1
+                        last_order_id = row.order_id
+                    if progress and count % self.fetch_size == 0:
+                        progress(count)
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        if progress:
+            progress(count)
+        if since and last_order_id is not None and last_order_id != after:
+            self.mark_exported(since, last_order_id)
+        return ExportResult(path, count, orders, last_order_id)
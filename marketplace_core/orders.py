@@ -0,0 +1,287 @@
+import datetime
+import re
+from collections import namedtuple
+
+from marketplace_core.errors import NotFoundError, ValidationError
+
+OrderRow = namedtuple("OrderRow", "id order_date total_amount status")
+OrderLine = namedtuple("OrderLine", "quantity unit_price item_name item_type")
+OrderDetails = namedtuple("OrderDetails", "id status order_date lines")
+AdminOrderRow = namedtuple("AdminOrderRow", "id username order_date total_amount status")
+# Admin order browser filters; dates are YYYY-MM-DD and both ends are inclusive.
+# min_age_days keeps orders placed at least that many 24-hour days before now
+OrderFilter = namedtuple("OrderFilter", "status date_from date_to username min_age_days",
+                         defaults=(None, None, None, None, None))
+
+ORDER_STATUSES = ("pending", "shipped", "delivered")
+
+# Statuses a bulk transition may move an order to from each status; orders
+# only move forward in bulk, set_status still corrects one order at a time
+ORDER_TRANSITIONS = {
+    "pending": ("shipped", "delivered"),
+    "shipped": ("delivered",),
+    "delivered": (),
+}
+
+# Outcome of one order in a bulk transition
+TransitionResult = namedtuple("TransitionResult", "order_id previous outcome")
+UPDATED, UNCHANGED, NOT_ALLOWED, NOT_FOUND = "updated", "unchanged", "not allowed", "not found"
+
+# Order ids per IN (...) lookup, well under SQLite's host parameter limit
+ID_CHUNK = 500
+
+# Admin order browser sorts: (label, sort column, descending), each with an index
+# (migrations 4 and 9) so pages are read in order; id breaks ties
+ORDER_SORTS = {
+    "date_desc": ("Newest First", "order_date", True),
+    "date_asc": ("Oldest First", "order_date", False),
+    "total_desc": ("Total: High to Low", "total_amount", True),
+    "total_asc": ("Total: Low to High", "total_amount", False),
+}
+DEFAULT_ORDER_SORT = "date_desc"
+
+# Match counts stop at COUNT_CAP + 1, so counting never walks a year of orders
+COUNT_CAP = 1000
+
+
+def parse_day(text, label):
+    """Validate a YYYY-MM-DD form field; blank is None"""
+    if not text:
+        return None
+    try:
+        return datetime.date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise ValidationError(f"{label} date must be YYYY-MM-DD")
+
+
+def parse_age_days(days):
+    """Validate a minimum order age in whole days; blank or None is None"""
+    if days is None or days == "":
+        return None
+    try:
+        days = int(days)
+    except (TypeError, ValueError):
+        raise ValidationError("Days must be a whole number")
+    if days < 0:
+        raise ValidationError("Days cannot be negative")
+    return days
+
+
+def order_filter(status, date_from, date_to, username, min_age_days=None):
+    """Validate order browser fields; a blank field or status None means no filter"""
+    if status is not None and status not in ORDER_STATUSES:
+        raise ValidationError(f"Unknown order status: {status}")
+    date_from, date_to = parse_day(date_from, "From"), parse_day(date_to, "To")
+    if date_from and date_to and date_from > date_to:
+        raise ValidationError("From date is after To date")
+    return OrderFilter(status, date_from, date_to, username.strip() or None, parse_age_days(min_age_days))
+
+
+def stale_filter(status, days):
+    """OrderFilter for orders in status placed at least days 24-hour days before now"""
+    if status not in ORDER_STATUSES:
+        raise ValidationError(f"Unknown order status: {status}")
+    days = parse_age_days(days)
+    if days is None:
+        raise ValidationError("Days must be a whole number")
+    return OrderFilter(status, min_age_days=days)
+
+
+def parse_order_ids(text):
+    """Order ids from pasted text separated by commas, semicolons or whitespace, duplicates dropped"""
+    ids = []
+    for token in re.split(r"[\s,;]+", text.strip()):
+        if not token:
+            continue
+        if not token.isdigit():
+            raise ValidationError(f"Not an order ID: {token}")
+        ids.append(int(token))
+    if not ids:
+        raise ValidationError("Enter at least one order ID")
+    return list(dict.fromkeys(ids))
+
+
+def capped_count(conn, query, params, cap):
+    """Count the rows of query, stopping after cap + 1"""
+    return conn.execute(f"SELECT count(*) FROM ({query} LIMIT ?)", [*params, cap + 1]).fetchone()[0]
+
+
+class OrderService:
+    """Order listings, details and status changes"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def page_user_orders(self, user_id, after=None, limit=100):
+        """Return (rows, next_cursor) for one page of a user's orders, newest first"""
+        query = """
+            SELECT id, order_date, total_amount, status
+            FROM Orders
+            WHERE user_id = ?
+        """
+        params = [user_id]
+        if after:
+            # Keyset pagination on (order_date, id), newest first
+            query += " AND (order_date, id) < (?, ?)"
+            params += after
+        query += " ORDER BY order_date DESC, id DESC LIMIT ?"
+        params.append(limit)
+        rows = [OrderRow(*row) for row in self.conn.execute(query, params)]
+        return rows, ((rows[-1].order_date, rows[-1].id) if len(rows) == limit else None)
+
+    def user_order(self, user_id, order_id):
+        """Return one of a user's orders as OrderRow, or None"""
+        row = self.conn.execute("""
+            SELECT id, order_date, total_amount, status
+            FROM Orders
+            WHERE id = ? AND user_id = ?
+        """, (order_id, user_id)).fetchone()
+        return OrderRow(*row) if row else None
+
+    def order_details(self, order_id):
+        """Return OrderDetails with every line of an order"""
+        order = self.conn.execute("SELECT status, order_date FROM Orders WHERE id = ?", (order_id,)).fetchone()
+        if order is None:
+            raise NotFoundError("Order not found")
+        lines = [OrderLine(*row) for row in self.conn.execute("""
+            SELECT oi.quantity, oi.unit_price,
+                   COALESCE(p.name, s.name) as item_name,
+                   CASE WHEN p.id IS NOT NULL THEN 'product' ELSE 'set' END as item_type
+            FROM Order_Items oi
+            LEFT JOIN Products p ON oi.product_id = p.id
+            LEFT JOIN Sets s ON oi.set_id = s.id
+            WHERE oi.order_id = ?
+        """, (order_id,))]
+        return OrderDetails(order_id, order[0], order[1], lines)
+
+    def order_status(self, order_id):
+        """Return the status of an order, or None if it does not exist"""
+        row = self.conn.execute("SELECT status FROM Orders WHERE id = ?", (order_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_status(self, order_id, status):
+        """Move an order to one of ORDER_STATUSES"""
+        if status not in ORDER_STATUSES:
+            raise ValidationError(f"Unknown order status: {status}")
+        updated = self.conn.execute("UPDATE Orders SET status = ? WHERE id = ?", (status, order_id)).rowcount
+        self.conn.commit()
+        if not updated:
+            raise NotFoundError("Order not found")
+
+    def transition_orders(self, order_ids, status):
+        """Move every order in order_ids to status in one transaction; return a TransitionResult per id"""
+        if not order_ids:
+            raise ValidationError("Enter at least one order ID")
+        order_ids = list(dict.fromkeys(order_ids))
+        return self.transition(status, lambda: self.current_statuses(order_ids), order_ids)
+
+    def transition_matching(self, filters, status):
+        """Move every order matching an OrderFilter to status in one transaction, like transition_orders"""
+        if filters == OrderFilter():
+            # An empty filter matches every order, which is never what a bulk update means
+            raise ValidationError("Choose at least one filter")
+        def matching():
+            conditions, params = self.order_conditions(filters)
+            query = "SELECT o.id, o.status FROM Orders o"
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            return dict(self.conn.execute(query, params).fetchall())
+        return self.transition(status, matching)
+
+    def current_statuses(self, order_ids):
+        """{order id: status} of the orders in order_ids that exist"""
+        statuses = {}
+        for start in range(0, len(order_ids), ID_CHUNK):
+            chunk = order_ids[start:start + ID_CHUNK]
+            statuses.update(self.conn.execute(
+                f"SELECT id, status FROM Orders WHERE id IN ({', '.join('?' * len(chunk))})", chunk))
+        return statuses
+
+    def transition(self, status, read_statuses, order_ids=None):
+        """Check each order against ORDER_TRANSITIONS and update the allowed ones with one executemany.
+
+        BEGIN IMMEDIATE takes the write lock before read_statuses runs, so
+        no other writer can move an order between the check and the update.
+        """
+        if status not in ORDER_STATUSES:
+            raise ValidationError(f"Unknown order status: {status}")
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = read_statuses()
+            results, updates = [], []
+            for order_id in (current if order_ids is None else order_ids):
+                previous = current.get(order_id)
+                if previous is None:
+                    outcome = NOT_FOUND
+                elif previous == status:
+                    outcome = UNCHANGED
+                elif status not in ORDER_TRANSITIONS[previous]:
+                    outcome = NOT_ALLOWED
+                else:
+                    outcome = UPDATED
+                    updates.append((status, order_id))
+                results.append(TransitionResult(order_id, previous, outcome))
+            self.conn.executemany("UPDATE Orders SET status = ? WHERE id = ?", updates)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        return results
+
+    def order_conditions(self, filters, residual_dates=False):
+        """WHERE conditions over Orders o and their parameters for an OrderFilter.
+
+        residual_dates writes the date range with unary +, so it is checked
+        per row of whatever index the planner walks instead of picking an
+        index itself.
+        """
+        conditions, params = [], []
+        order_date = "+o.order_date" if residual_dates else "o.order_date"
+        if filters.status is not None:
+            conditions.append("o.status = ?")
+            params.append(filters.status)
+        if filters.username is not None:
+            conditions.append("o.user_id = (SELECT id FROM Users WHERE username = ?)")
+            params.append(filters.username)
+        if filters.date_from is not None:
+            conditions.append(f"{order_date} >= ?")
+            params.append(filters.date_from)
+        if filters.date_to is not None:
+            conditions.append(f"{order_date} < date(?, '+1 day')")
+            params.append(filters.date_to)
+        if filters.min_age_days is not None:
+            # Full timestamps, both UTC: an order is exactly N days old N * 24 hours after it was placed
+            conditions.append(f"{order_date} < datetime('now', ?)")
+            params.append(f"-{filters.min_age_days} days")
+        return conditions, params
+
+    def page_all_orders(self, filters=OrderFilter(), sort=DEFAULT_ORDER_SORT, after=None, limit=100):
+        """Return (rows, next_cursor) for one page of the orders matching filters"""
+        _, column, descending = ORDER_SORTS[sort]
+        direction = "DESC" if descending else "ASC"
+        # Sorted by total, pages walk the total index and skip orders outside the
+        # dates, stopping at limit, rather than sorting every order in the range
+        conditions, params = self.order_conditions(filters, residual_dates=column != "order_date")
+        if after is not None:
+            # Keyset pagination on (sort column, id)
+            conditions.append(f"(o.{column}, o.id) {'<' if descending else '>'} (?, ?)")
+            params += after
+        query = """
+            SELECT o.id, u.username, o.order_date, o.total_amount, o.status
+            FROM Orders o
+            JOIN Users u ON o.user_id = u.id
+        """
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY o.{column} {direction}, o.id {direction} LIMIT ?"
+        params.append(limit)
+        rows = [AdminOrderRow(*row) for row in self.conn.execute(query, params)]
+        return rows, ((getattr(rows[-1], column), rows[-1].id) if len(rows) == limit else None)
+
+    def count_all_orders(self, filters=OrderFilter(), cap=COUNT_CAP):
+        """Number of orders matching filters; cap + 1 means more than cap"""
+        conditions, params = self.order_conditions(filters)
+        query = "SELECT 1 FROM Orders o"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return capped_count(self.conn, query, params, cap)
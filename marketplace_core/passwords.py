@@ -0,0 +1,112 @@
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# scrypt cost: n is the CPU/memory cost (a power of two), r the block size,
+# p the parallelism; memory use is about 128 * n * r bytes
+KdfParams = namedtuple("KdfParams", "n r p")
+
+DEFAULT_PARAMS = KdfParams(2 ** 14, 8, 1)
+SALT_BYTES = 16
+KEY_BYTES = 32
+SCHEME = "scrypt"
+
+# Optional overrides, e.g. MARKETPLACE_SCRYPT=32768,8,1 and MARKETPLACE_PASSWORD_WORKERS=4
+PARAMS_ENV = "MARKETPLACE_SCRYPT"
+WORKERS_ENV = "MARKETPLACE_PASSWORD_WORKERS"
+
+
+def b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+def derive(password, salt, params):
+    """Raw scrypt key for password"""
+    return hashlib.scrypt(password.encode(), salt=salt, n=params.n, r=params.r, p=params.p,
+                          maxmem=256 * params.n * params.r + 1024 * 1024, dklen=KEY_BYTES)
+
+
+def hash_password(password, params=DEFAULT_PARAMS):
+    """Return a salted scrypt hash as scrypt$n$r$p$salt$key"""
+    salt = secrets.token_bytes(SALT_BYTES)
+    return f"{SCHEME}${params.n}${params.r}${params.p}${b64(salt)}${b64(derive(password, salt, params))}"
+
+
+def stored_params(stored):
+    """KdfParams a stored hash was made with, or None for a legacy SHA-256 hex digest"""
+    if not stored.startswith(SCHEME + "$"):
+        return None
+    _, n, r, p, _, _ = stored.split("$")
+    return KdfParams(int(n), int(r), int(p))
+
+
+def verify_password(password, stored):
+    """True if password matches a stored scrypt hash or legacy unsalted SHA-256 digest"""
+    params = stored_params(stored)
+    if params is None:
+        candidate = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(candidate, stored)
+    _, _, _, _, salt, key = stored.split("$")
+    return hmac.compare_digest(derive(password, base64.b64decode(salt), params), base64.b64decode(key))
+
+
+def needs_rehash(stored, params=DEFAULT_PARAMS):
+    """True if stored was not made with params, so it should be replaced on the next login"""
+    return stored_params(stored) != params
+
+
+def params_from_env():
+    """KdfParams from MARKETPLACE_SCRYPT (n,r,p), or DEFAULT_PARAMS"""
+    value = os.environ.get(PARAMS_ENV)
+    return KdfParams(*map(int, value.split(","))) if value else DEFAULT_PARAMS
+
+
+class PasswordHasher:
+    """Hash and verify passwords on a worker pool.
+
+    scrypt is deliberately slow, so calls block only the calling thread
+    while the work runs in the pool; hashlib.scrypt releases the GIL, so
+    threads scale across cores, and processes=True isolates the memory
+    cost from the caller instead.
+    """
+
+    def __init__(self, params=DEFAULT_PARAMS, workers=None, processes=False):
+        self.params = params
+        workers = workers or os.cpu_count() or 1
+        if processes:
+            self.pool = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kdf")
+
+    def hash(self, password):
+        """Hash password with this hasher's params"""
+        return self.pool.submit(hash_password, password, self.params).result()
+
+    def verify(self, password, stored):
+        """True if password matches stored"""
+        return self.pool.submit(verify_password, password, stored).result()
+
+    def needs_rehash(self, stored):
+        return needs_rehash(stored, self.params)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_hasher():
+    """The process-wide PasswordHasher, configured from the environment on first use"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            workers = os.environ.get(WORKERS_ENV)
+            _shared = PasswordHasher(params_from_env(), int(workers) if workers else None)
+        return _shared
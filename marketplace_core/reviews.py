@@ -0,0 +1,23 @@
+from catalog_repository import REVIEW_COLUMNS
+from marketplace_core.errors import ValidationError
+
+
+class ReviewService:
+    """Review writes; RatingSummary is kept current by triggers"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def add_review(self, user_id, item_type, item_id, rating, comment):
+        """Store a 1-5 star review of a 'product' or 'set' and return its id"""
+        if not rating:
+            raise ValidationError("Please select a rating")
+        rating = int(rating)
+        if not 1 <= rating <= 5:
+            raise ValidationError("Rating must be between 1 and 5")
+        review_id = self.conn.execute(f"""
+            INSERT INTO Reviews (user_id, {REVIEW_COLUMNS[item_type]}, rating, comment)
+            VALUES (?, ?, ?, ?)
+        """, (user_id, item_id, rating, comment)).lastrowid
+        self.conn.commit()
+        return review_id
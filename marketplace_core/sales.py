@@ -0,0 +1,121 @@
+"""Sales metrics read from the rollup tables of migration 10.
+
+Triggers on Orders and Order_Items keep SalesDaily, SalesByCategory and
+SalesByItem current in the same transaction as checkout or a status
+change, so nothing here writes. Every query reads one row per day (per
+status, category or item sold that day), never one per order.
+"""
+import datetime
+from collections import namedtuple
+
+from marketplace_core.errors import ValidationError
+from marketplace_core.orders import ORDER_STATUSES, parse_day
+
+DaySales = namedtuple("DaySales", "day orders units revenue")
+StatusSales = namedtuple("StatusSales", "status orders units revenue")
+CategorySales = namedtuple("CategorySales", "category_id name orders units revenue")
+ItemSales = namedtuple("ItemSales", "item_type item_id name orders units revenue")
+# days covers every day of the range, with zeros for days without orders
+SalesDashboard = namedtuple("SalesDashboard", "date_from date_to days statuses categories items")
+
+# Dashboard range choices: label -> days, today included
+SALES_RANGES = {"Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90, "Last 365 days": 365}
+DEFAULT_SALES_RANGE = "Last 30 days"
+TOP_ROWS = 10
+# Longest range a dashboard may cover, in days
+MAX_SALES_DAYS = 3660
+
+
+def sales_range(days, today=None):
+    """(date_from, date_to) of the last days days up to today (UTC, as order_date is stored)"""
+    today = today or datetime.datetime.now(datetime.timezone.utc).date()
+    return (today - datetime.timedelta(days=days - 1)).isoformat(), today.isoformat()
+
+
+def sales_period(date_from, date_to):
+    """Validate a dashboard range of YYYY-MM-DD days, both inclusive"""
+    date_from, date_to = parse_day(date_from, "From"), parse_day(date_to, "To")
+    if not date_from or not date_to:
+        raise ValidationError("Choose both ends of the date range")
+    span = datetime.date.fromisoformat(date_to) - datetime.date.fromisoformat(date_from)
+    if span.days < 0:
+        raise ValidationError("From date is after To date")
+    if span.days >= MAX_SALES_DAYS:
+        raise ValidationError(f"Date range is longer than {MAX_SALES_DAYS} days")
+    return date_from, date_to
+
+
+class SalesService:
+    """Revenue, units and order counts per day, status, category and item"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def daily(self, date_from, date_to):
+        """DaySales for every day from date_from to date_to"""
+        totals = {row[0]: DaySales(*row) for row in self.conn.execute("""
+            SELECT day, SUM(orders), SUM(units), round(SUM(revenue), 2)
+            FROM SalesDaily
+            WHERE day BETWEEN ? AND ?
+            GROUP BY day
+        """, (date_from, date_to))}
+        start = datetime.date.fromisoformat(date_from)
+        days = []
+        for offset in range((datetime.date.fromisoformat(date_to) - start).days + 1):
+            day = (start + datetime.timedelta(days=offset)).isoformat()
+            days.append(totals.get(day, DaySales(day, 0, 0, 0)))
+        return days
+
+    def by_status(self, date_from, date_to):
+        """StatusSales for each of ORDER_STATUSES over the range"""
+        totals = {row[0]: StatusSales(*row) for row in self.conn.execute("""
+            SELECT status, SUM(orders), SUM(units), round(SUM(revenue), 2)
+            FROM SalesDaily
+            WHERE day BETWEEN ? AND ?
+            GROUP BY status
+        """, (date_from, date_to))}
+        return [totals.get(status, StatusSales(status, 0, 0, 0)) for status in ORDER_STATUSES]
+
+    def top_categories(self, date_from, date_to, limit=TOP_ROWS):
+        """The limit categories with the most revenue over the range"""
+        return [CategorySales(*row) for row in self.conn.execute("""
+            SELECT t.category_id, c.name, t.orders, t.units, t.revenue
+            FROM (
+                SELECT category_id, SUM(orders) AS orders, SUM(units) AS units, round(SUM(revenue), 2) AS revenue
+                FROM SalesByCategory
+                WHERE day BETWEEN ? AND ?
+                GROUP BY category_id
+                ORDER BY revenue DESC
+                LIMIT ?
+            ) t
+            LEFT JOIN Categories c ON c.id = t.category_id
+            ORDER BY t.revenue DESC
+        """, (date_from, date_to, limit))]
+
+    def top_items(self, date_from, date_to, limit=TOP_ROWS):
+        """The limit products and sets with the most revenue over the range"""
+        return [ItemSales(*row) for row in self.conn.execute("""
+            SELECT t.item_type, t.item_id, COALESCE(p.name, s.name), t.orders, t.units, t.revenue
+            FROM (
+                SELECT item_type, item_id, SUM(orders) AS orders, SUM(units) AS units, round(SUM(revenue), 2) AS revenue
+                FROM SalesByItem
+                WHERE day BETWEEN ? AND ?
+                GROUP BY item_type, item_id
+                ORDER BY revenue DESC
+                LIMIT ?
+            ) t
+            LEFT JOIN Products p ON t.item_type = 'product' AND p.id = t.item_id
+            LEFT JOIN Sets s ON t.item_type = 'set' AND s.id = t.item_id
+            ORDER BY t.revenue DESC
+        """, (date_from, date_to, limit))]
+
+    def sales_dashboard(self, date_from, date_to, limit=TOP_ROWS):
+        """Every dashboard figure for the range, read in one transaction so they agree"""
+        date_from, date_to = sales_period(date_from, date_to)
+        self.conn.execute("BEGIN")
+        try:
+            return SalesDashboard(date_from, date_to, self.daily(date_from, date_to),
+                                  self.by_status(date_from, date_to), self.top_categories(date_from, date_to, limit),
+                                  self.top_items(date_from, date_to, limit))
+        finally:
+            self.conn.commit()
@@ -0,0 +1,511 @@
+import argparse
+import asyncio
+import json
+import re
+import secrets
+import sqlite3
+import traceback
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from catalog_repository import SORTS, DEFAULT_SORT, CatalogFilter, CatalogRepository
+from catalog_snapshot import SnapshotStore
+from checkout_engine import STOCK_TABLES
+from database import MAIN_DB, ConnectionPool, connect, health_check
+from marketplace_core import (
+    ADMIN_USERNAME, ORDER_SORTS, USER_SORTS, AccountService, AuthenticationError, CartLine, CheckoutEngine,
+    ConflictError, NotFoundError, OrderService, OutOfStockError, SalesService, ValidationError, order_filter,
+    user_filter,
+)
+from marketplace_core.accounts import DEFAULT_USER_SORT
+from marketplace_core.orders import DEFAULT_ORDER_SORT
+from marketplace_core.sales import TOP_ROWS
+from migrations import migrate
+
+DEFAULT_PORT = 8765
+MAX_PAGE = 500
+MAX_BODY = 1024 * 1024
+
+Request = namedtuple("Request", "method path query body session match")
+# A logged-in client: user is the marketplace_core User, cart a list of CartLine
+Session = namedtuple("Session", "user cart")
+
+
+class HttpError(Exception):
+    """Abort a request with an HTTP status and message"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def cart_line(fields):
+    """CartLine for a posted cart line; unit_price is left unset, as checkout prices lines itself"""
+    try:
+        line = CartLine(fields["item_type"], int(fields["item_id"]), int(fields["quantity"]), None)
+    except (KeyError, TypeError, ValueError):
+        raise HttpError(HTTPStatus.BAD_REQUEST, "item_type, item_id and quantity are required")
+    if line.item_type not in STOCK_TABLES:
+        raise ValidationError(f"Unknown item_type: {line.item_type}")
+    if line.quantity < 1:
+        raise ValidationError("Quantity must be at least 1")
+    return line
+
+
+def public_user(user):
+    """User fields safe to send to a client"""
+    fields = user._asdict()
+    del fields["password"]
+    return fields
+
+
+def rows_payload(rows, cursor):
+    """JSON body for one page of namedtuple rows"""
+    return {"rows": [row._asdict() for row in rows], "next": cursor}
+
+
+def query_value(request, name, convert=str, default=None):
+    """One query parameter converted with convert, or default if absent"""
+    values = request.query.get(name)
+    if not values or values[0] == "":
+        return default
+    try:
+        return convert(values[0])
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"Invalid {name}")
+
+
+def page_args(request):
+    """(after, limit) of a paged request; after is the JSON cursor of the previous page"""
+    after = query_value(request, "after", json.loads)
+    limit = query_value(request, "limit", int, 100)
+    if limit < 1:
+        # 0 would leave no row to take a cursor from, and -1 means no LIMIT at all to SQLite
+        raise HttpError(HTTPStatus.BAD_REQUEST, "limit must be at least 1")
+    return (tuple(after) if isinstance(after, list) else after), min(limit, MAX_PAGE)
+
+
+def sort_arg(request, sorts, default):
+    """The sort query parameter, checked against sorts"""
+    sort = query_value(request, "sort", default=default)
+    if sort not in sorts:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"Unknown sort: {sort}")
+    return sort
+
+
+def order_args(request):
+    """(OrderFilter, sort) of an admin order listing request"""
+    return (order_filter(query_value(request, "status"), query_value(request, "date_from", default=""),
+                         query_value(request, "date_to", default=""), query_value(request, "username", default=""),
+                         query_value(request, "min_age_days")),
+            sort_arg(request, ORDER_SORTS, DEFAULT_ORDER_SORT))
+
+
+def user_args(request):
+    """(UserFilter, sort) of an admin user listing request"""
+    return (user_filter(query_value(request, "username_prefix", default=""),
+                        query_value(request, "email_prefix", default="")),
+            sort_arg(request, USER_SORTS, DEFAULT_USER_SORT))
+
+
+def catalog_args(request):
+    """(CatalogFilter, sort) of a catalog listing request"""
+    filters = CatalogFilter(
+        query_value(request, "min_price", float, 0),
+        query_value(request, "max_price", float, 10000),
+        query_value(request, "category_id", int),
+        query_value(request, "search"),
+    )
+    return filters, sort_arg(request, SORTS, DEFAULT_SORT)
+
+
+class MarketplaceServer:
+    """Local HTTP/JSON front end to marketplace_core for many terminals.
+
+    Reads run on a pool of reader threads, each with its own connection.
+    Every write goes through one writer thread and connection, so writers
+    never contend for the database lock; at most max_pending_writes wait
+    in line, and further writes are refused with 503 instead of queueing
+    without bound. One catalog snapshot answers every client's browsing
+    and category lookups.
+    """
+
+    def __init__(self, db_path=MAIN_DB, readers=4, max_pending_writes=64):
+        self.db_path = db_path
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="reader")
+        # Readers never write (hash upgrades are queued on the writer), so they open read-only
+        self.reader_connections = ConnectionPool(db_path, "kiosk")
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="writer")
+        self.writer_connections = ConnectionPool(db_path)
+        self.max_pending_writes = max_pending_writes
+        self.pending_writes = 0
+        self.sessions = {}
+
+        self.snapshots = SnapshotStore(db_path)
+
+        # (method, path pattern, handler, "read" | "write" | "session")
+        self.routes = [
+            # Logins verify on readers and queue any hash upgrade on the writer
+            ("POST", r"/login", self.login, "read"),
+            ("POST", r"/admin/login", self.admin_login, "read"),
+            ("POST", r"/logout", self.logout, "session"),
+            ("GET", r"/categories", self.categories, "read"),
+            ("GET", r"/products", self.products, "read"),
+            ("GET", r"/products/(\d+)", self.product, "read"),
+            ("GET", r"/sets", self.sets, "read"),
+            ("GET", r"/sets/(\d+)", self.set_info, "read"),
+            ("GET", r"/sets/(\d+)/items", self.set_items, "read"),
+            ("GET", r"/reviews/(product|set)/(\d+)", self.reviews, "read"),
+            ("GET", r"/cart", self.get_cart, "session"),
+            ("POST", r"/cart", self.add_to_cart, "session"),
+            ("DELETE", r"/cart", self.clear_cart, "session"),
+            ("POST", r"/checkout", self.checkout, "write"),
+            ("GET", r"/orders", self.orders, "read"),
+            ("GET", r"/orders/(\d+)", self.order, "read"),
+            ("GET", r"/admin/orders", self.all_orders, "read"),
+            ("GET", r"/admin/orders/count", self.count_orders, "read"),
+            ("GET", r"/admin/users", self.users, "read"),
+            ("GET", r"/admin/users/count", self.count_users, "read"),
+            ("POST", r"/admin/orders/(\d+)/status", self.set_order_status, "write"),
+            ("POST", r"/admin/orders/status", self.transition_orders, "write"),
+            ("GET", r"/admin/sales", self.sales, "read"),
+        ]
+        self.routes = [(method, re.compile(pattern + "$"), handler, kind)
+                       for method, pattern, handler, kind in self.routes]
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Accept clients until cancelled"""
+        self.snapshots.start()
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"Marketplace service listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        """Stop the worker threads and close their connections"""
+        self.readers.shutdown(wait=True)
+        self.writer.shutdown(wait=True)
+        self.reader_connections.close_all()
+        self.writer_connections.close_all()
+        self.snapshots.stop()
+
+    async def handle_client(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                    while True:
+                        line = (await reader.readline()).decode("latin-1").strip()
+                        if not line:
+                            break
+                        name, _, value = line.partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                    length = int(headers.get("content-length", 0))
+                    if length < 0:
+                        raise ValueError("Negative Content-Length")
+                except ValueError:
+                    # The stream cannot be resynchronised after a malformed request
+                    await self.respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request"}, False)
+                    break
+                if length > MAX_BODY:
+                    await self.respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload = await self.dispatch(method, target, headers, body)
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        """Write one JSON response"""
+        body = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    async def dispatch(self, method, target, headers, body):
+        """Route a request to its handler and map errors to HTTP statuses"""
+        url = urlsplit(target)
+        for route_method, pattern, handler, kind in self.routes:
+            match = pattern.match(url.path)
+            if match and route_method == method:
+                break
+        else:
+            return HTTPStatus.NOT_FOUND, {"error": f"No route for {method} {url.path}"}
+
+        try:
+            token = headers.get("authorization", "").removeprefix("Bearer ").strip()
+            fields = json.loads(body) if body else {}
+            if not isinstance(fields, dict):
+                raise HttpError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+            request = Request(method, url.path, parse_qs(url.query), fields, self.sessions.get(token), match)
+            if kind == "session":
+                return HTTPStatus.OK, handler(request, token)
+            if kind == "write":
+                return HTTPStatus.OK, await self.write(handler, request)
+            loop = asyncio.get_running_loop()
+            return HTTPStatus.OK, await loop.run_in_executor(self.readers, self.run, self.reader_connections,
+                                                             handler, request)
+        except HttpError as e:
+            return e.status, {"error": str(e)}
+        except OutOfStockError as e:
+            return HTTPStatus.CONFLICT, {"error": str(e), "shortfalls": [s._asdict() for s in e.shortfalls]}
+        except ValidationError as e:
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except AuthenticationError as e:
+            return HTTPStatus.UNAUTHORIZED, {"error": str(e)}
+        except NotFoundError as e:
+            return HTTPStatus.NOT_FOUND, {"error": str(e)}
+        except ConflictError as e:
+            return HTTPStatus.CONFLICT, {"error": str(e)}
+        except sqlite3.OperationalError as e:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": f"Database busy: {e}"}
+        except KeyError as e:
+            return HTTPStatus.BAD_REQUEST, {"error": f"Missing field: {e.args[0]}"}
+        except (TypeError, ValueError) as e:
+            # Includes json.JSONDecodeError and bad values the handlers convert
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except Exception:
+            traceback.print_exc()
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}
+
+    async def write(self, handler, request):
+        """Run a write on the single writer thread, refusing it if the line is full"""
+        if self.pending_writes >= self.max_pending_writes:
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, "Too many pending writes, retry shortly")
+        self.pending_writes += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.writer, self.run, self.writer_connections, handler, request)
+        finally:
+            self.pending_writes -= 1
+
+    def run(self, connections, handler, request):
+        """Worker side: call handler with this thread's connection"""
+        return handler(connections.get(), request)
+
+    def require_user(self, request, admin=False):
+        """The session's User, or a 401/403 HttpError"""
+        if request.session is None:
+            raise HttpError(HTTPStatus.UNAUTHORIZED, "Login required")
+        if admin and request.session.user.username != ADMIN_USERNAME:
+            raise HttpError(HTTPStatus.FORBIDDEN, "Admin only")
+        return request.session.user
+
+    def catalog_source(self, conn, filters):
+        """The snapshot when it can answer filters, otherwise this thread's repository"""
+        snapshot = self.snapshots.current
+        if snapshot is not None and snapshot.answers(filters):
+            return snapshot
+        return CatalogRepository(conn)
+
+    def start_session(self, user):
+        """Create a session for user and return the login response"""
+        token = secrets.token_urlsafe(32)
+        self.sessions[token] = Session(user, [])
+        return {"token": token, "user": public_user(user)}
+
+    # Handlers: read and write handlers run on worker threads with a
+    # connection; session handlers run on the event loop
+
+    def save_upgrade_later(self, user_id, stored):
+        """Queue a login's hash upgrade on the writer; logins themselves verify on readers"""
+        self.writer.submit(self.run, self.writer_connections,
+                           lambda conn, _: AccountService(conn).save_upgraded_hash(user_id, stored), None)
+
+    def login(self, conn, request):
+        accounts = AccountService(conn, save_upgrade=self.save_upgrade_later)
+        user = accounts.login(request.body.get("username", ""), request.body.get("password", ""))
+        if user is None:
+            raise AuthenticationError("Invalid username or password")
+        return self.start_session(user)
+
+    def admin_login(self, conn, request):
+        accounts = AccountService(conn, save_upgrade=self.save_upgrade_later)
+        user = accounts.authenticate_admin(request.body.get("username", ""), request.body.get("password", ""))
+        return self.start_session(user)
+
+    def logout(self, request, token):
+        self.sessions.pop(token, None)
+        return {}
+
+    def categories(self, conn, request):
+        snapshot = self.snapshots.current
+        categories = snapshot.categories if snapshot is not None else CatalogRepository(conn).categories()
+        return {"categories": [{"id": category_id, "name": name} for category_id, name in categories]}
+
+    def products(self, conn, request):
+        filters, sort = catalog_args(request)
+        after, limit = page_args(request)
+        return rows_payload(*self.catalog_source(conn, filters).page_products(filters, sort, after, limit))
+
+    def product(self, conn, request):
+        product = CatalogRepository(conn).get_product(int(request.match.group(1)))
+        if product is None:
+            raise NotFoundError("Product not found")
+        return product._asdict()
+
+    def sets(self, conn, request):
+        filters, sort = catalog_args(request)
+        after, limit = page_args(request)
+        return rows_payload(*self.catalog_source(conn, filters).page_sets(filters, sort, after, limit))
+
+    def set_info(self, conn, request):
+        set_info = CatalogRepository(conn).get_set(int(request.match.group(1)))
+        if set_info is None:
+            raise NotFoundError("Set not found")
+        return set_info._asdict()
+
+    def set_items(self, conn, request):
+        return {"items": [item._asdict() for item in CatalogRepository(conn).set_items(int(request.match.group(1)))]}
+
+    def reviews(self, conn, request):
+        after, limit = page_args(request)
+        item_type, item_id = request.match.group(1), int(request.match.group(2))
+        rating = query_value(request, "rating", int)
+        return rows_payload(*CatalogRepository(conn).page_reviews(item_type, item_id, rating, after, limit))
+
+    def get_cart(self, request, token):
+        self.require_user(request)
+        return {"lines": [line._asdict() for line in request.session.cart]}
+
+    def add_to_cart(self, request, token):
+        self.require_user(request)
+        request.session.cart.append(cart_line(request.body))
+        return self.get_cart(request, token)
+
+    def clear_cart(self, request, token):
+        self.require_user(request)
+        request.session.cart.clear()
+        return {"lines": []}
+
+    def checkout(self, conn, request):
+        """Place an order for the posted lines, or the session cart if none are posted.
+
+        Lines are priced from Products and Sets here; any unit_price a client
+        sends is ignored.
+        """
+        user = self.require_user(request)
+        if "lines" in request.body:
+            if not isinstance(request.body["lines"], list):
+                raise HttpError(HTTPStatus.BAD_REQUEST, "lines must be a list")
+            lines = [cart_line(line) for line in request.body["lines"]]
+        else:
+            lines = [cart_line(line._asdict()) for line in request.session.cart]
+        if not lines:
+            raise ValidationError("Cart is empty")
+        engine = CheckoutEngine(conn)
+        receipt = engine.place_order(user.id, engine.price_lines(lines),
+                                     request.body.get("payment_method", "Credit Card"))
+        if "lines" not in request.body:
+            request.session.cart.clear()
+        return receipt._asdict()
+
+    def orders(self, conn, request):
+        user = self.require_user(request)
+        after, limit = page_args(request)
+        return rows_payload(*OrderService(conn).page_user_orders(user.id, after, limit))
+
+    def order(self, conn, request):
+        user = self.require_user(request)
+        order_id = int(request.match.group(1))
+        orders = OrderService(conn)
+        row = orders.user_order(user.id, order_id)
+        if row is None and user.username != ADMIN_USERNAME:
+            raise NotFoundError("Order not found")
+        details = orders.order_details(order_id)
+        return {**details._asdict(), "lines": [line._asdict() for line in details.lines],
+                "total_amount": row.total_amount if row else None}
+
+    def all_orders(self, conn, request):
+        self.require_user(request, admin=True)
+        after, limit = page_args(request)
+        filters, sort = order_args(request)
+        return rows_payload(*OrderService(conn).page_all_orders(filters, sort, after, limit))
+
+    def count_orders(self, conn, request):
+        self.require_user(request, admin=True)
+        filters, _ = order_args(request)
+        return {"count": OrderService(conn).count_all_orders(filters)}
+
+    def users(self, conn, request):
+        self.require_user(request, admin=True)
+        after, limit = page_args(request)
+        filters, sort = user_args(request)
+        return rows_payload(*AccountService(conn).page_users(filters, sort, after, limit))
+
+    def count_users(self, conn, request):
+        self.require_user(request, admin=True)
+        filters, _ = user_args(request)
+        return {"count": AccountService(conn).count_users(filters)}
+
+    def set_order_status(self, conn, request):
+        self.require_user(request, admin=True)
+        OrderService(conn).set_status(int(request.match.group(1)), request.body.get("status"))
+        return {}
+
+    def transition_orders(self, conn, request):
+        """Bulk status change for the listed order_ids, or for every order matching filters"""
+        self.require_user(request, admin=True)
+        orders = OrderService(conn)
+        status = request.body.get("status")
+        if "order_ids" in request.body:
+            ids = request.body["order_ids"]
+            if not isinstance(ids, list) or not all(isinstance(order_id, int) for order_id in ids):
+                raise HttpError(HTTPStatus.BAD_REQUEST, "order_ids must be a list of integers")
+            results = orders.transition_orders(ids, status)
+        else:
+            fields = request.body.get("filters") or {}
+            filters = order_filter(fields.get("status"), fields.get("date_from") or "", fields.get("date_to") or "",
+                                   fields.get("username") or "", fields.get("min_age_days"))
+            results = orders.transition_matching(filters, status)
+        return {"results": [result._asdict() for result in results]}
+
+    def sales(self, conn, request):
+        self.require_user(request, admin=True)
+        dashboard = SalesService(conn).sales_dashboard(query_value(request, "date_from", default=""),
+                                                       query_value(request, "date_to", default=""),
+                                                       min(query_value(request, "limit", int, TOP_ROWS), MAX_PAGE))
+        return {**dashboard._asdict(), **{field: [row._asdict() for row in getattr(dashboard, field)]
+                                          for field in ("days", "statuses", "categories", "items")}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the marketplace catalog, cart and checkout over local HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--readers", type=int, default=4, help="reader threads, each with its own connection")
+    parser.add_argument("--max-pending-writes", type=int, default=64)
+    args = parser.parse_args()
+
+    conn = connect(MAIN_DB)
+    for problem in health_check(conn):
+        print(f"Database health check: {problem}")
+    migrate(conn)
+    conn.close()
+
+    server = MarketplaceServer(readers=args.readers, max_pending_writes=args.max_pending_writes)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
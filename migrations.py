@@ -0,0 +1,385 @@
+import sqlite3
+
+# Schema changes applied on top of schema.sql, tracked with PRAGMA user_version.
+# Append new (version, script) pairs; never edit a migration that has shipped.
+MIGRATIONS = [
+    (1, """
+        -- Durable outbox for SMS notifications, drained by sms_outbox.OutboxWorker
+        CREATE TABLE IF NOT EXISTS SmsOutbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            to_number VARCHAR(20) NOT NULL,
+            body TEXT NOT NULL,
+            status VARCHAR(10) NOT NULL DEFAULT 'pending' CHECK(status IN ('pending', 'sending', 'sent', 'dead')),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            sent_at DATETIME
+        );
+        CREATE INDEX IF NOT EXISTS idx_sms_outbox_due ON SmsOutbox(status, next_attempt_at);
+    """),
+    (2, """
+        -- Indexes backing keyset pagination in catalog_repository; INTEGER PRIMARY KEY
+        -- ids are the rowid, so an index on price is already ordered by (price, id)
+        CREATE INDEX IF NOT EXISTS idx_products_price ON Products(price);
+        CREATE INDEX IF NOT EXISTS idx_products_name ON Products(name);
+        CREATE INDEX IF NOT EXISTS idx_products_category_price ON Products(category_id, price);
+        CREATE INDEX IF NOT EXISTS idx_products_category_name ON Products(category_id, name);
+        CREATE INDEX IF NOT EXISTS idx_sets_price ON Sets(price);
+        CREATE INDEX IF NOT EXISTS idx_sets_name ON Sets(name);
+    """),
+    (3, """
+        -- Row-level change log read by change_tracker.ChangeTracker, so views can
+        -- refresh only the rows that changed; changed_at is unix time for pruning
+        CREATE TABLE IF NOT EXISTS ChangeLog (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name VARCHAR(20) NOT NULL,
+            row_id INTEGER NOT NULL,
+            changed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_changelog_changed_at ON ChangeLog(changed_at);
+        CREATE TRIGGER IF NOT EXISTS trg_products_insert_changelog AFTER INSERT ON Products
+        BEGIN
+            INSERT INTO ChangeLog (table_name, row_id, changed_at) VALUES ('Products', NEW.id, (julianday('now') - 2440587.5) * 86400.0);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_products_update_changelog AFTER UPDATE ON Products
+        BEGIN
+            INSERT INTO ChangeLog (table_name, row_id, changed_at) VALUES ('Products', NEW.id, (julianday('now') - 2440587.5) * 86400.0);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_products_delete_changelog AFTER DELETE ON Products
+        BEGIN
+            INSERT INTO ChangeLog (table_name, row_id, changed_at) VALUES ('Products', OLD.id, (julianday('now') - 2440587.5) * 86400.0);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_sets_insert_changelog AFTER INSERT ON Sets
+        BEGIN
+            INSERT INTO ChangeLog (table_name, row_id, changed_at) VALUES ('Sets', NEW.id, (julianday('now') - 2440587.5) * 86400.0);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_sets_update_changelog AFTER UPDATE ON Sets
+        BEGIN
+            INSERT INTO ChangeLog (table_name, row_id, changed_at) VALUES ('Sets', NEW.id, (julianday('now') - 2440587.5) * 86400.0);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_sets_delete_changelog AFTER DELETE ON Sets
+        BEGIN
+            INSERT INTO ChangeLog (table_name, row_id, changed_at) VALUES ('Sets', OLD.id, (julianday('now') - 2440587.5) * 86400.0);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_orders_insert_changelog AFTER INSERT ON Orders
+        BEGIN
+            INSERT INTO ChangeLog (table_name, row_id, changed_at) VALUES ('Orders', NEW.id, (julianday('now') - 2440587.5) * 86400.0);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_orders_update_changelog AFTER UPDATE ON Orders
+        BEGIN
+            INSERT INTO ChangeLog (table_name, row_id, changed_at) VALUES ('Orders', NEW.id, (julianday('now') - 2440587.5) * 86400.0);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_orders_delete_changelog AFTER DELETE ON Orders
+        BEGIN
+            INSERT INTO ChangeLog (table_name, row_id, changed_at) VALUES ('Orders', OLD.id, (julianday('now') - 2440587.5) * 86400.0);
+        END;
+    """),
+    (4, """
+        -- Indexes for the order and review listings, checked by benchmarks/check_query_plans.py.
+        -- The composite indexes start with the old single-column ones, which are dropped.
+        CREATE INDEX IF NOT EXISTS idx_orders_user_date ON Orders(user_id, order_date);
+        CREATE INDEX IF NOT EXISTS idx_orders_status_date ON Orders(status, order_date);
+        CREATE INDEX IF NOT EXISTS idx_orders_date ON Orders(order_date);
+        CREATE INDEX IF NOT EXISTS idx_reviews_product_created ON Reviews(product_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_reviews_set_created ON Reviews(set_id, created_at);
+        DROP INDEX IF EXISTS idx_orders_user;
+        DROP INDEX IF EXISTS idx_reviews_product;
+        DROP INDEX IF EXISTS idx_reviews_set;
+    """),
+    (5, """
+        -- Full-text search over catalog names and descriptions: external-content FTS5
+        -- tables kept in sync by triggers. Stock-only updates skip the index.
+        CREATE VIRTUAL TABLE IF NOT EXISTS ProductSearch USING fts5(
+            name, description, content='Products', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        INSERT INTO ProductSearch(ProductSearch) VALUES ('rebuild');
+        CREATE TRIGGER IF NOT EXISTS trg_products_insert_search AFTER INSERT ON Products
+        BEGIN
+            INSERT INTO ProductSearch (rowid, name, description) VALUES (NEW.id, NEW.name, NEW.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_products_delete_search AFTER DELETE ON Products
+        BEGIN
+            INSERT INTO ProductSearch (ProductSearch, rowid, name, description) VALUES ('delete', OLD.id, OLD.name, OLD.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_products_update_search AFTER UPDATE OF name, description ON Products
+        BEGIN
+            INSERT INTO ProductSearch (ProductSearch, rowid, name, description) VALUES ('delete', OLD.id, OLD.name, OLD.description);
+            INSERT INTO ProductSearch (rowid, name, description) VALUES (NEW.id, NEW.name, NEW.description);
+        END;
+        CREATE VIRTUAL TABLE IF NOT EXISTS SetSearch USING fts5(
+            name, description, content='Sets', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        INSERT INTO SetSearch(SetSearch) VALUES ('rebuild');
+        CREATE TRIGGER IF NOT EXISTS trg_sets_insert_search AFTER INSERT ON Sets
+        BEGIN
+            INSERT INTO SetSearch (rowid, name, description) VALUES (NEW.id, NEW.name, NEW.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_sets_delete_search AFTER DELETE ON Sets
+        BEGIN
+            INSERT INTO SetSearch (SetSearch, rowid, name, description) VALUES ('delete', OLD.id, OLD.name, OLD.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_sets_update_search AFTER UPDATE OF name, description ON Sets
+        BEGIN
+            INSERT INTO SetSearch (SetSearch, rowid, name, description) VALUES ('delete', OLD.id, OLD.name, OLD.description);
+            INSERT INTO SetSearch (rowid, name, description) VALUES (NEW.id, NEW.name, NEW.description);
+        END;
+    """),
+    (6, """
+        -- Log category changes too, so open views can drop their cached
+        -- reference_cache.CategoryCache maps when an admin edits categories
+        CREATE TRIGGER IF NOT EXISTS trg_categories_insert_changelog AFTER INSERT ON Categories
+        BEGIN
+            INSERT INTO ChangeLog (table_name, row_id, changed_at) VALUES ('Categories', NEW.id, (julianday('now') - 2440587.5) * 86400.0);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_categories_update_changelog AFTER UPDATE ON Categories
+        BEGIN
+            INSERT INTO ChangeLog (table_name, row_id, changed_at) VALUES ('Categories', NEW.id, (julianday('now') - 2440587.5) * 86400.0);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_categories_delete_changelog AFTER DELETE ON Categories
+        BEGIN
+            INSERT INTO ChangeLog (table_name, row_id, changed_at) VALUES ('Categories', OLD.id, (julianday('now') - 2440587.5) * 86400.0);
+        END;
+    """),
+    (7, """
+        -- Per-item review count, sum and 1-5 histogram, kept current by triggers on
+        -- Reviews so listings can show and sort by rating without aggregating.
+        -- avg_rating is 0 for unrated items so keyset comparisons never meet NULL.
+        CREATE TABLE IF NOT EXISTS RatingSummary (
+            item_type VARCHAR(10) NOT NULL CHECK(item_type IN ('product', 'set')),
+            item_id INTEGER NOT NULL,
+            review_count INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            avg_rating REAL NOT NULL DEFAULT 0,
+            stars_1 INTEGER NOT NULL DEFAULT 0,
+            stars_2 INTEGER NOT NULL DEFAULT 0,
+            stars_3 INTEGER NOT NULL DEFAULT 0,
+            stars_4 INTEGER NOT NULL DEFAULT 0,
+            stars_5 INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (item_type, item_id)
+        ) WITHOUT ROWID;
+        -- The primary key is appended, so this index is ordered by (avg_rating, item_id)
+        CREATE INDEX IF NOT EXISTS idx_rating_summary_avg ON RatingSummary(item_type, avg_rating);
+        INSERT OR IGNORE INTO RatingSummary (item_type, item_id, review_count, rating_sum, avg_rating, stars_1, stars_2, stars_3, stars_4, stars_5)
+        SELECT 'product', t.id, COUNT(r.id), COALESCE(SUM(r.rating), 0), COALESCE(AVG(r.rating), 0), COALESCE(SUM(r.rating = 1), 0), COALESCE(SUM(r.rating = 2), 0), COALESCE(SUM(r.rating = 3), 0), COALESCE(SUM(r.rating = 4), 0), COALESCE(SUM(r.rating = 5), 0)
+        FROM Products t
+        LEFT JOIN Reviews r ON r.product_id = t.id
+        GROUP BY t.id;
+        INSERT OR IGNORE INTO RatingSummary (item_type, item_id, review_count, rating_sum, avg_rating, stars_1, stars_2, stars_3, stars_4, stars_5)
+        SELECT 'set', t.id, COUNT(r.id), COALESCE(SUM(r.rating), 0), COALESCE(AVG(r.rating), 0), COALESCE(SUM(r.rating = 1), 0), COALESCE(SUM(r.rating = 2), 0), COALESCE(SUM(r.rating = 3), 0), COALESCE(SUM(r.rating = 4), 0), COALESCE(SUM(r.rating = 5), 0)
+        FROM Sets t
+        LEFT JOIN Reviews r ON r.set_id = t.id
+        GROUP BY t.id;
+        CREATE TRIGGER IF NOT EXISTS trg_products_insert_rating AFTER INSERT ON Products
+        BEGIN
+            INSERT OR IGNORE INTO RatingSummary (item_type, item_id) VALUES ('product', NEW.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_products_delete_rating AFTER DELETE ON Products
+        BEGIN
+            DELETE FROM RatingSummary WHERE item_type = 'product' AND item_id = OLD.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_sets_insert_rating AFTER INSERT ON Sets
+        BEGIN
+            INSERT OR IGNORE INTO RatingSummary (item_type, item_id) VALUES ('set', NEW.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_sets_delete_rating AFTER DELETE ON Sets
+        BEGIN
+            DELETE FROM RatingSummary WHERE item_type = 'set' AND item_id = OLD.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_reviews_insert_rating AFTER INSERT ON Reviews
+        BEGIN
+            UPDATE RatingSummary SET
+                review_count = review_count + 1,
+                rating_sum = rating_sum + NEW.rating,
+                avg_rating = (rating_sum + NEW.rating) * 1.0 / (review_count + 1),
+                stars_1 = stars_1 + (NEW.rating = 1),
+                stars_2 = stars_2 + (NEW.rating = 2),
+                stars_3 = stars_3 + (NEW.rating = 3),
+                stars_4 = stars_4 + (NEW.rating = 4),
+                stars_5 = stars_5 + (NEW.rating = 5)
+            WHERE item_type = CASE WHEN NEW.product_id IS NOT NULL THEN 'product' ELSE 'set' END AND item_id = COALESCE(NEW.product_id, NEW.set_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_reviews_delete_rating AFTER DELETE ON Reviews
+        BEGIN
+            UPDATE RatingSummary SET
+                review_count = review_count - 1,
+                rating_sum = rating_sum - OLD.rating,
+                avg_rating = CASE WHEN review_count > 1 THEN (rating_sum - OLD.rating) * 1.0 / (review_count - 1) ELSE 0 END,
+                stars_1 = stars_1 - (OLD.rating = 1),
+                stars_2 = stars_2 - (OLD.rating = 2),
+                stars_3 = stars_3 - (OLD.rating = 3),
+                stars_4 = stars_4 - (OLD.rating = 4),
+                stars_5 = stars_5 - (OLD.rating = 5)
+            WHERE item_type = CASE WHEN OLD.product_id IS NOT NULL THEN 'product' ELSE 'set' END AND item_id = COALESCE(OLD.product_id, OLD.set_id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_reviews_update_rating AFTER UPDATE OF rating, product_id, set_id ON Reviews
+        BEGIN
+            UPDATE RatingSummary SET
+                review_count = review_count - 1,
+                rating_sum = rating_sum - OLD.rating,
+                avg_rating = CASE WHEN review_count > 1 THEN (rating_sum - OLD.rating) * 1.0 / (review_count - 1) ELSE 0 END,
+                stars_1 = stars_1 - (OLD.rating = 1),
+                stars_2 = stars_2 - (OLD.rating = 2),
+                stars_3 = stars_3 - (OLD.rating = 3),
+                stars_4 = stars_4 - (OLD.rating = 4),
+                stars_5 = stars_5 - (OLD.rating = 5)
+            WHERE item_type = CASE WHEN OLD.product_id IS NOT NULL THEN 'product' ELSE 'set' END AND item_id = COALESCE(OLD.product_id, OLD.set_id);
+            UPDATE RatingSummary SET
+                review_count = review_count + 1,
+                rating_sum = rating_sum + NEW.rating,
+                avg_rating = (rating_sum + NEW.rating) * 1.0 / (review_count + 1),
+                stars_1 = stars_1 + (NEW.rating = 1),
+                stars_2 = stars_2 + (NEW.rating = 2),
+                stars_3 = stars_3 + (NEW.rating = 3),
+                stars_4 = stars_4 + (NEW.rating = 4),
+                stars_5 = stars_5 + (NEW.rating = 5)
+            WHERE item_type = CASE WHEN NEW.product_id IS NOT NULL THEN 'product' ELSE 'set' END AND item_id = COALESCE(NEW.product_id, NEW.set_id);
+        END;
+        -- A changed rating changes how the item is listed
+        CREATE TRIGGER IF NOT EXISTS trg_rating_summary_update_changelog AFTER UPDATE ON RatingSummary
+        BEGIN
+            INSERT INTO ChangeLog (table_name, row_id, changed_at)
+            VALUES (CASE NEW.item_type WHEN 'product' THEN 'Products' ELSE 'Sets' END, NEW.item_id, (julianday('now') - 2440587.5) * 86400.0);
+        END;
+    """),
+    (8, """
+        -- Review lists filtered by star rating, newest first
+        CREATE INDEX IF NOT EXISTS idx_reviews_product_rating_created ON Reviews(product_id, rating, created_at);
+        CREATE INDEX IF NOT EXISTS idx_reviews_set_rating_created ON Reviews(set_id, rating, created_at);
+    """),
+    (9, """
+        -- Admin order browser sorted by total, optionally within one status or user;
+        -- the date sorts use the indexes from migration 4
+        CREATE INDEX IF NOT EXISTS idx_orders_total ON Orders(total_amount);
+        CREATE INDEX IF NOT EXISTS idx_orders_status_total ON Orders(status, total_amount);
+        CREATE INDEX IF NOT EXISTS idx_orders_user_total ON Orders(user_id, total_amount);
+    """),
+    (10, """
+        -- Sales rollups per UTC day (date(order_date)), kept current by triggers on Orders
+        -- and Order_Items inside the writing transaction, so the admin dashboard reads a
+        -- row per day instead of every order. SalesDaily is split by status; an order's
+        -- units are added when its items are written. orders in SalesByCategory and
+        -- SalesByItem counts distinct orders; sets have no category. Orders and their
+        -- items are never deleted, and an item's category is the one it had when sold.
+        CREATE TABLE IF NOT EXISTS SalesDaily (
+            day DATE NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            orders INTEGER NOT NULL DEFAULT 0,
+            units INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, status)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS SalesByCategory (
+            day DATE NOT NULL,
+            category_id INTEGER NOT NULL,
+            orders INTEGER NOT NULL DEFAULT 0,
+            units INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, category_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS SalesByItem (
+            day DATE NOT NULL,
+            item_type VARCHAR(10) NOT NULL CHECK(item_type IN ('product', 'set')),
+            item_id INTEGER NOT NULL,
+            orders INTEGER NOT NULL DEFAULT 0,
+            units INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, item_type, item_id)
+        ) WITHOUT ROWID;
+        INSERT OR IGNORE INTO SalesDaily (day, status, orders, units, revenue)
+        SELECT date(o.order_date), o.status, COUNT(*), COALESCE(SUM(i.units), 0), round(SUM(o.total_amount), 2)
+        FROM Orders o
+        LEFT JOIN (SELECT order_id, SUM(quantity) AS units FROM Order_Items GROUP BY order_id) i ON i.order_id = o.id
+        GROUP BY date(o.order_date), o.status;
+        INSERT OR IGNORE INTO SalesByCategory (day, category_id, orders, units, revenue)
+        SELECT date(o.order_date), p.category_id, COUNT(DISTINCT oi.order_id), SUM(oi.quantity), round(SUM(oi.quantity * oi.unit_price), 2)
+        FROM Order_Items oi
+        JOIN Orders o ON o.id = oi.order_id
+        JOIN Products p ON p.id = oi.product_id
+        GROUP BY date(o.order_date), p.category_id;
+        INSERT OR IGNORE INTO SalesByItem (day, item_type, item_id, orders, units, revenue)
+        SELECT date(o.order_date), CASE WHEN oi.product_id IS NOT NULL THEN 'product' ELSE 'set' END, COALESCE(oi.product_id, oi.set_id),
+               COUNT(DISTINCT oi.order_id), SUM(oi.quantity), round(SUM(oi.quantity * oi.unit_price), 2)
+        FROM Order_Items oi
+        JOIN Orders o ON o.id = oi.order_id
+        GROUP BY 1, 2, 3;
+        CREATE TRIGGER IF NOT EXISTS trg_orders_insert_sales AFTER INSERT ON Orders
+        BEGIN
+            INSERT INTO SalesDaily (day, status, orders, revenue)
+            VALUES (date(NEW.order_date), NEW.status, 1, NEW.total_amount)
+            ON CONFLICT (day, status) DO UPDATE SET orders = orders + 1, revenue = round(revenue + excluded.revenue, 2);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_orders_status_sales AFTER UPDATE OF status ON Orders WHEN OLD.status <> NEW.status
+        BEGIN
+            UPDATE SalesDaily SET
+                orders = orders - 1,
+                units = units - (SELECT COALESCE(SUM(quantity), 0) FROM Order_Items WHERE order_id = OLD.id),
+                revenue = round(revenue - OLD.total_amount, 2)
+            WHERE day = date(OLD.order_date) AND status = OLD.status;
+            INSERT INTO SalesDaily (day, status, orders, units, revenue)
+            VALUES (date(NEW.order_date), NEW.status, 1, (SELECT COALESCE(SUM(quantity), 0) FROM Order_Items WHERE order_id = NEW.id), NEW.total_amount)
+            ON CONFLICT (day, status) DO UPDATE SET orders = orders + 1, units = units + excluded.units, revenue = round(revenue + excluded.revenue, 2);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_order_items_insert_sales AFTER INSERT ON Order_Items
+        BEGIN
+            UPDATE SalesDaily SET units = units + NEW.quantity
+            WHERE (day, status) = (SELECT date(order_date), status FROM Orders WHERE id = NEW.order_id);
+            INSERT INTO SalesByItem (day, item_type, item_id, orders, units, revenue)
+            SELECT date(o.order_date), CASE WHEN NEW.product_id IS NOT NULL THEN 'product' ELSE 'set' END, COALESCE(NEW.product_id, NEW.set_id),
+                   NOT EXISTS (SELECT 1 FROM Order_Items oi WHERE oi.order_id = NEW.order_id AND oi.id <> NEW.id
+                               AND (oi.product_id = NEW.product_id OR oi.set_id = NEW.set_id)),
+                   NEW.quantity, NEW.quantity * NEW.unit_price
+            FROM Orders o
+            WHERE o.id = NEW.order_id
+            ON CONFLICT (day, item_type, item_id) DO UPDATE SET
+                orders = orders + excluded.orders, units = units + excluded.units, revenue = round(revenue + excluded.revenue, 2);
+            INSERT INTO SalesByCategory (day, category_id, orders, units, revenue)
+            SELECT date(o.order_date), p.category_id,
+                   NOT EXISTS (SELECT 1 FROM Order_Items oi JOIN Products q ON q.id = oi.product_id
+                               WHERE oi.order_id = NEW.order_id AND oi.id <> NEW.id AND q.category_id = p.category_id),
+                   NEW.quantity, NEW.quantity * NEW.unit_price
+            FROM Orders o, Products p
+            WHERE o.id = NEW.order_id AND p.id = NEW.product_id
+            ON CONFLICT (day, category_id) DO UPDATE SET
+                orders = orders + excluded.orders, units = units + excluded.units, revenue = round(revenue + excluded.revenue, 2);
+        END;
+    """),
+    (11, """
+        -- Highest order id each named export has written, for since-last-export runs
+        -- in marketplace_core.exports; ids only grow, as Orders uses AUTOINCREMENT
+        CREATE TABLE IF NOT EXISTS OrderExports (
+            name VARCHAR(50) PRIMARY KEY,
+            last_order_id INTEGER NOT NULL,
+            exported_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """),
+    (12, """
+        -- When a worker claimed a 'sending' message; only claims older than the
+        -- worker's lease are returned to the queue, so a second terminal starting
+        -- up no longer re-sends messages a live worker is still sending
+        ALTER TABLE SmsOutbox ADD COLUMN claimed_at REAL;
+    """),
+]
+
+
+def schema_version(conn):
+    """Return the migration version the database is at"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply every pending migration, one transaction per version"""
+    current = schema_version(conn)
+    for version, script in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        print(f"Applied database migration {version}")
+    return schema_version(conn)
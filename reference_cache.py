@@ -0,0 +1,42 @@
+class CategoryCache:
+    """In-process category name <-> id maps, reloaded only when stale.
+
+    Writes made through the cache's own connection must call invalidate();
+    commits from any other connection are noticed through PRAGMA
+    data_version, which only moves when another connection commits.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.ids_by_name = None
+        self.names_by_id = None
+        self.data_version = None
+
+    def invalidate(self):
+        """Drop the maps so the next lookup reloads them"""
+        self.ids_by_name = None
+        self.names_by_id = None
+
+    def refresh(self):
+        """Reload the maps if they were invalidated or another connection committed"""
+        version = self.catalog.conn.execute("PRAGMA data_version").fetchone()[0]
+        if self.ids_by_name is None or version != self.data_version:
+            rows = self.catalog.categories()
+            self.ids_by_name = {name: category_id for category_id, name in rows}
+            self.names_by_id = {category_id: name for category_id, name in rows}
+            self.data_version = version
+
+    def names(self):
+        """Every category name, sorted"""
+        self.refresh()
+        return list(self.ids_by_name)
+
+    def id_for(self, name):
+        """Return the id of a category name, or None"""
+        self.refresh()
+        return self.ids_by_name.get(name)
+
+    def name_for(self, category_id):
+        """Return the name of a category id, or None"""
+        self.refresh()
+        return self.names_by_id.get(category_id)
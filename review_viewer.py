@@ -0,0 +1,90 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from tkinter.scrolledtext import ScrolledText
+
+from catalog_repository import CatalogRepository
+from virtual_list import VirtualList
+
+ALL_RATINGS = "All ratings"
+
+
+def rating_text(avg_rating, review_count):
+    """Listing cell for a rating, e.g. 4.3 (12)"""
+    return f"{avg_rating:.1f} ({review_count})" if review_count else "No reviews"
+
+
+def rating_breakdown(summary):
+    """Average, count and star histogram shown above a review list"""
+    lines = [f"Average: {rating_text(summary.avg_rating, summary.review_count)}"]
+    for stars in range(5, 0, -1):
+        lines.append(f"{stars} stars: {summary.stars[stars - 1]}")
+    return "\n".join(lines)
+
+
+class ReviewViewer(tk.Toplevel):
+    """Reviews of one product or set, paged newest first as the user scrolls.
+
+    The header comes from RatingSummary and each page is a keyset seek, so
+    opening the window costs the same whatever the review count. Filtering
+    by stars reloads the list with the rating applied in SQL.
+    """
+
+    def __init__(self, root, executor, catalog, item_type, item_id, title, page_size=50):
+        super().__init__(root)
+        self.catalog = catalog
+        self.item_type = item_type
+        self.item_id = item_id
+        self.rating = None
+        self.title(title)
+        self.geometry("700x500")
+
+        summary = catalog.rating_summary(item_type, item_id)
+        ttk.Label(self, text=rating_breakdown(summary), justify=tk.LEFT).pack(anchor=tk.W, padx=15, pady=(15, 5))
+
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(fill=tk.X, padx=15)
+        ttk.Label(filter_frame, text="Show:").pack(side=tk.LEFT)
+        self.rating_labels = {ALL_RATINGS: None}
+        for stars in range(5, 0, -1):
+            self.rating_labels[f"{stars} stars ({summary.stars[stars - 1]})"] = stars
+        self.rating_var = tk.StringVar(value=ALL_RATINGS)
+        rating_combo = ttk.Combobox(filter_frame, textvariable=self.rating_var, values=list(self.rating_labels),
+                                    state="readonly", width=18)
+        rating_combo.pack(side=tk.LEFT, padx=10)
+        rating_combo.bind("<<ComboboxSelected>>", self.apply_filter)
+
+        columns = [("User", "User", 110), ("Rating", "Rating", 60), ("Comment", "Comment", 360), ("Date", "Date", 140)]
+        self.review_list = VirtualList(self, columns, self.fetch_page, page_size=page_size, executor=executor,
+                                       format_row=lambda row: (row.username, f"{row.rating}/5", row.comment,
+                                                               row.created_at))
+        self.review_list.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
+        self.review_list.tree.bind("<Double-1>", self.show_review)
+        self.review_list.reload()
+
+    def fetch_page(self, conn, cursor, limit):
+        """Fetch one page of reviews (worker thread)"""
+        return CatalogRepository(conn).page_reviews(self.item_type, self.item_id, self.rating, cursor, limit)
+
+    def apply_filter(self, event=None):
+        """Reload the list for the selected star rating"""
+        self.rating = self.rating_labels[self.rating_var.get()]
+        self.review_list.reload()
+
+    def show_review(self, event=None):
+        """Open the full text of the double-clicked review"""
+        selected = self.review_list.tree.selection()
+        if not selected:
+            return
+        review = self.catalog.get_review(int(selected[0]))
+        if review is None:
+            messagebox.showerror("Error", "Review no longer exists", parent=self)
+            return
+
+        review_window = tk.Toplevel(self)
+        review_window.title(f"Review by {review.username}")
+        review_window.geometry("500x300")
+        text_area = ScrolledText(review_window, wrap=tk.WORD, width=60, height=15)
+        text_area.pack(padx=15, pady=15)
+        text_area.insert(tk.END, f"User: {review.username}\nRating: {review.rating}/5\nDate: {review.created_at}\n\n"
+                                 f"{review.comment or ''}")
+        text_area.configure(state='disabled')
@@ -0,0 +1,129 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from marketplace_core import SALES_RANGES, sales_range
+from marketplace_core.sales import DEFAULT_SALES_RANGE
+
+CHART_HEIGHT = 160
+
+
+def money(amount):
+    return f"${amount:,.2f}"
+
+
+def totals_text(dashboard):
+    """One-line summary of a dashboard's range"""
+    orders = sum(day.orders for day in dashboard.days)
+    units = sum(day.units for day in dashboard.days)
+    revenue = sum(day.revenue for day in dashboard.days)
+    return (f"{dashboard.date_from} to {dashboard.date_to}: {money(revenue)} revenue, "
+            f"{orders} orders, {units} units")
+
+
+class SalesDashboard(tk.Toplevel):
+    """Revenue, units and orders per day, status, category and item.
+
+    Every figure comes from the sales rollup tables, so a year of history
+    costs a few hundred rows whatever the order count. The load runs on
+    the executor; source(conn) returns a SalesService or marketplace_client.
+    """
+
+    def __init__(self, root, executor, source):
+        super().__init__(root)
+        self.executor = executor
+        self.source = source
+        self.title("Sales Dashboard")
+        self.geometry("900x650")
+
+        top = ttk.Frame(self)
+        top.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Label(top, text="Range:").pack(side=tk.LEFT)
+        self.range_var = tk.StringVar(value=DEFAULT_SALES_RANGE)
+        range_combo = ttk.Combobox(top, textvariable=self.range_var, values=list(SALES_RANGES), state="readonly",
+                                   width=15)
+        range_combo.pack(side=tk.LEFT, padx=5)
+        range_combo.bind("<<ComboboxSelected>>", lambda event: self.load())
+        ttk.Button(top, text="Refresh", command=self.load).pack(side=tk.LEFT, padx=5)
+        self.summary_var = tk.StringVar()
+        ttk.Label(top, textvariable=self.summary_var).pack(side=tk.LEFT, padx=15)
+
+        self.chart = tk.Canvas(self, height=CHART_HEIGHT, background="white", highlightthickness=0)
+        self.chart.pack(fill=tk.X, padx=10)
+        self.chart.bind("<Configure>", lambda event: self.draw_chart())
+
+        notebook = ttk.Notebook(self)
+        notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.tables = {
+            "days": self.table(notebook, "By Day", [("Day", 120), ("Orders", 80), ("Units", 80), ("Revenue", 120)]),
+            "statuses": self.table(notebook, "By Status",
+                                   [("Status", 120), ("Orders", 80), ("Units", 80), ("Revenue", 120)]),
+            "categories": self.table(notebook, "Top Categories",
+                                     [("Category", 200), ("Orders", 80), ("Units", 80), ("Revenue", 120)]),
+            "items": self.table(notebook, "Top Items",
+                                [("Item", 250), ("Type", 80), ("Orders", 80), ("Units", 80), ("Revenue", 120)]),
+        }
+        self.dashboard = None
+        self.load()
+
+    def table(self, notebook, title, columns):
+        """Add a tab holding a Treeview with columns and return the Treeview"""
+        frame = ttk.Frame(notebook)
+        notebook.add(frame, text=title)
+        tree = ttk.Treeview(frame, columns=[name for name, _ in columns], show="headings")
+        for name, width in columns:
+            tree.heading(name, text=name)
+            tree.column(name, width=width)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        return tree
+
+    def load(self):
+        """Read the dashboard for the chosen range on the executor"""
+        self.summary_var.set("Loading...")
+        date_from, date_to = sales_range(SALES_RANGES[self.range_var.get()])
+        self.executor.submit(self.fetch, date_from, date_to, on_done=self.show, on_error=self.failed,
+                             key=(self, "sales"))
+
+    def fetch(self, conn, date_from, date_to):
+        """Read every dashboard figure (worker thread)"""
+        return self.source(conn).sales_dashboard(date_from, date_to)
+
+    def failed(self, error):
+        if self.winfo_exists():
+            self.summary_var.set("")
+            messagebox.showerror("Error", f"Could not load sales: {error}", parent=self)
+
+    def show(self, dashboard):
+        if not self.winfo_exists():
+            return
+        self.dashboard = dashboard
+        self.summary_var.set(totals_text(dashboard))
+        rows = {
+            "days": [(day.day, day.orders, day.units, money(day.revenue)) for day in reversed(dashboard.days)],
+            "statuses": [(row.status.title(), row.orders, row.units, money(row.revenue)) for row in dashboard.statuses],
+            "categories": [(row.name, row.orders, row.units, money(row.revenue)) for row in dashboard.categories],
+            "items": [(row.name, row.item_type.title(), row.orders, row.units, money(row.revenue))
+                      for row in dashboard.items],
+        }
+        for name, tree in self.tables.items():
+            tree.delete(*tree.get_children())
+            for values in rows[name]:
+                tree.insert("", tk.END, values=values)
+        self.draw_chart()
+
+    def draw_chart(self):
+        """Daily revenue as bars, scaled to the best day"""
+        self.chart.delete("all")
+        if not self.dashboard:
+            return
+        days = self.dashboard.days
+        width = self.chart.winfo_width()
+        best = max(day.revenue for day in days) or 1
+        bar = width / len(days)
+        for index, day in enumerate(days):
+            height = (CHART_HEIGHT - 20) * day.revenue / best
+            self.chart.create_rectangle(index * bar + 1, CHART_HEIGHT - height, (index + 1) * bar - 1, CHART_HEIGHT,
+                                        fill="#4A90D9", outline="")
+        self.chart.create_text(5, 5, anchor=tk.NW, text=f"Best day: {money(best)}")
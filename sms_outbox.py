@@ -0,0 +1,216 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import get_backend, load_environment
+from database import connect
+
+
+class TransportError(Exception):
+    """Raised by a transport when a message could not be delivered"""
+
+
+class StubTransport:
+    """Local transport that records messages instead of sending them"""
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send(self, to_number, body):
+        """Record one message, optionally simulating latency and failures"""
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise TransportError("Simulated delivery failure")
+        with self.lock:
+            self.sent.append((to_number, body))
+            return f"STUB_{len(self.sent)}"
+
+
+def create_transport(name=None):
+    """Create the transport named by name or the SMS_TRANSPORT setting"""
+    load_environment()
+    name = name or os.getenv('SMS_TRANSPORT', 'twilio')
+    return get_backend("sms", name)()
+
+
+def enqueue(cur, to_number, body):
+    """Queue an SMS in the caller's transaction; the caller commits"""
+    cur.execute("""
+        INSERT INTO SmsOutbox (to_number, body, status, next_attempt_at)
+        VALUES (?, ?, 'pending', ?)
+    """, (to_number, body, time.time()))
+    return cur.lastrowid
+
+
+class OutboxWorker:
+    """Background thread that drains SmsOutbox through a transport.
+
+    Several workers may share one database (every terminal starts one).
+    A claim marks a message 'sending' with claimed_at only if it is still
+    'pending', so no two workers send it at once; a claim older than lease
+    seconds belongs to a worker that died and is returned to the queue.
+    lease must exceed the transport's send timeout.
+    """
+
+    def __init__(self, db_path, transport=None, transport_name=None, concurrency=4,
+                 max_attempts=5, base_delay=2.0, max_delay=300.0, poll_interval=1.0, lease=300.0):
+        self.db_path = db_path
+        # Without an explicit transport one is created on the first due message,
+        # so sessions that never send an SMS never import the provider SDK
+        self.transport = transport
+        self.transport_name = transport_name
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.lease = lease
+
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Start draining the outbox in a daemon thread"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="sms-outbox", daemon=True)
+            self.thread.start()
+
+    def wake(self):
+        """Drain immediately instead of waiting for the next poll"""
+        self.wakeup.set()
+
+    def stop(self, timeout=5.0):
+        """Stop the worker after the current batch"""
+        self.stopping.set()
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def run(self):
+        """Worker loop: claim due messages, send them, record the outcome"""
+        conn = connect(self.db_path)
+        # Expired claims are looked for at startup and then once per lease, not on
+        # every poll, so idle terminals do not take the write lock each second
+        next_recover = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="sms-send") as pool:
+                while not self.stopping.is_set():
+                    delay = self.poll_interval
+                    try:
+                        if time.monotonic() >= next_recover:
+                            self.recover(conn)
+                            next_recover = time.monotonic() + self.lease
+                        sent = self.drain_once(conn, pool)
+                    except sqlite3.Error as e:
+                        print(f"SMS outbox error: {e}")
+                        sent = 0
+                    except Exception as e:
+                        # Misconfigured or missing transport; retry much later
+                        print(f"SMS transport unavailable: {e}")
+                        sent = 0
+                        delay = self.max_delay
+                    if not sent:
+                        self.wakeup.wait(delay)
+                        self.wakeup.clear()
+        finally:
+            conn.close()
+
+    def recover(self, conn):
+        """Return messages whose claim outlived the lease (a crashed worker's) to the queue"""
+        conn.execute("""
+            UPDATE SmsOutbox SET status = 'pending', claimed_at = NULL
+            WHERE status = 'sending' AND (claimed_at IS NULL OR claimed_at < ?)
+        """, (time.time() - self.lease,))
+        conn.commit()
+
+    def get_transport(self):
+        """Return the transport, creating it on first use"""
+        if self.transport is None:
+            self.transport = create_transport(self.transport_name)
+        return self.transport
+
+    def has_due(self, conn):
+        """Return True if any message is waiting to be sent"""
+        return conn.execute("""
+            SELECT 1 FROM SmsOutbox WHERE status = 'pending' AND next_attempt_at <= ? LIMIT 1
+        """, (time.time(),)).fetchone() is not None
+
+    def claim(self, conn):
+        """Mark up to one batch of due messages as 'sending' and return the ones this worker won"""
+        now = time.time()
+        # The write lock up front keeps another worker from claiming between the read and the update
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("""
+                SELECT id, to_number, body, attempts
+                FROM SmsOutbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY next_attempt_at
+                LIMIT ?
+            """, (now, self.concurrency)).fetchall()
+            claimed = [row for row in rows if conn.execute("""
+                UPDATE SmsOutbox SET status = 'sending', claimed_at = ?
+                WHERE id = ? AND status = 'pending'
+            """, (now, row[0])).rowcount]
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return claimed
+
+    def drain_once(self, conn, pool):
+        """Send one batch with bounded concurrency; return how many were claimed"""
+        if self.transport is None:
+            if not self.has_due(conn):
+                return 0
+            self.get_transport()
+
+        rows = self.claim(conn)
+        if not rows:
+            return 0
+
+        futures = [(row, pool.submit(self.transport.send, row[1], row[2])) for row in rows]
+        sent, retries, dead = [], [], []
+        for (message_id, _, _, attempts), future in futures:
+            try:
+                future.result()
+                sent.append((message_id,))
+            except Exception as e:
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    dead.append((attempts, str(e), message_id))
+                else:
+                    retries.append((attempts, time.time() + self.backoff(attempts), str(e), message_id))
+
+        with conn:
+            conn.executemany("""
+                UPDATE SmsOutbox SET status = 'sent', sent_at = CURRENT_TIMESTAMP, last_error = NULL, claimed_at = NULL
+                WHERE id = ?
+            """, sent)
+            conn.executemany("""
+                UPDATE SmsOutbox SET status = 'pending', attempts = ?, next_attempt_at = ?, last_error = ?, claimed_at = NULL
+                WHERE id = ?
+            """, retries)
+            conn.executemany("""
+                UPDATE SmsOutbox SET status = 'dead', attempts = ?, last_error = ?, claimed_at = NULL
+                WHERE id = ?
+            """, dead)
+        for _, _, error, message_id in retries:
+            print(f"SMS {message_id} failed, will retry: {error}")
+        for _, error, message_id in dead:
+            print(f"SMS {message_id} moved to dead letter: {error}")
+        return len(rows)
+
+    def backoff(self, attempts):
+        """Exponential backoff with jitter for the given attempt count"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
@@ -0,0 +1,74 @@
+import json
+import os
+import time
+
+# Set to 1 to print the startup report, or to a file path to also append it
+# there as one JSON line per launch for tracking cold-start regressions
+PROFILE_ENV = "MARKETPLACE_STARTUP_PROFILE"
+
+
+class StartupProfiler:
+    """Record how long each cold-start phase of the application takes"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last_mark = self.started
+        self.phases = []
+        self.lazy_imports = []
+        self.reported = False
+
+    def mark(self, name):
+        """Record the time since the previous mark as phase name"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last_mark))
+        self.last_mark = now
+
+    def finish(self, name="first frame"):
+        """Record the final phase and report"""
+        self.mark(name)
+        self.report()
+
+    def record_lazy_import(self, module_name, seconds):
+        """Record an integration imported on first use"""
+        self.lazy_imports.append((module_name, seconds))
+        if self.reported:
+            # Imported after the startup report was printed
+            print(f"Lazy import {module_name}: {seconds * 1000:.1f} ms")
+
+    def total(self):
+        """Seconds from profiler creation to the last recorded phase"""
+        return self.last_mark - self.started
+
+    def as_dict(self):
+        """Return the report as a JSON-serialisable dict"""
+        return {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "total_ms": round(self.total() * 1000, 2),
+            "phases": {name: round(seconds * 1000, 2) for name, seconds in self.phases},
+            "lazy_imports": {name: round(seconds * 1000, 2) for name, seconds in self.lazy_imports},
+        }
+
+    def format_report(self):
+        """Return the report as printable text"""
+        lines = ["Startup profile:"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<24} {seconds * 1000:8.1f} ms")
+        lines.append(f"  {'total':<24} {self.total() * 1000:8.1f} ms")
+        for name, seconds in self.lazy_imports:
+            lines.append(f"  lazy import {name:<12} {seconds * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+    def report(self):
+        """Print and optionally persist the report, once, if profiling is enabled"""
+        setting = os.getenv(PROFILE_ENV)
+        if not setting or self.reported:
+            return
+        self.reported = True
+        print(self.format_report())
+        if setting not in ("1", "true", "yes"):
+            with open(setting, "a") as profile_file:
+                profile_file.write(json.dumps(self.as_dict()) + "\n")
+
+
+# Created at import time, so importing this module first measures the imports after it
+profiler = StartupProfiler()
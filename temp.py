@@ -1,27 +1,41 @@
+from startup_profiler import profiler  # Imported first so it can time the imports below
 import sqlite3
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-import hashlib
 import datetime
 import os
-import re
 from tkinter.scrolledtext import ScrolledText
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
-from dotenv import load_dotenv
-from PIL import Image, ImageTk
+from gradient import GradientBackground
+from migrations import migrate
+from database import HASH_DB, MAIN_DB, connect, health_check
+from db_executor import DatabaseExecutor
+from sms_outbox import OutboxWorker
+from marketplace_core import (
+    ADMIN_USERNAME, AccountService, ConflictError, ProfileUpdate, Registration, ValidationError,
+)
+from image_cache import ImageAssetCache
 import subprocess
 
+profiler.mark("imports")
+
+LOGO_PATH = "logo.png"
+LOGO_SIZE = (150, 50)
+LOGO_HOVER_SCALE = 1.1
+
 class JewelryMarketplaceApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Jewelry Marketplace")
         self.root.geometry("1200x900")
         
-        # Load environment variables for Twilio
-        load_dotenv()
-        self.twilio_client = Client(os.getenv('TWILIO_ACCOUNT_SID'), os.getenv('TWILIO_AUTH_TOKEN'))
-        self.twilio_from_number = os.getenv('TWILIO_PHONE_NUMBER')
+        # Initialize databases
+        self.create_databases()
+        profiler.mark("database bootstrap")
+        
+        # Deliver queued SMS notifications in the background; the transport
+        # (and its SDK) is only loaded once there is something to send
+        self.outbox = OutboxWorker("jewelry_marketplace.db")
+        self.outbox.start()
         
         # Launch admin terminal
         subprocess.Popen(['python', 'admin_terminal.py'])
@@ -29,14 +43,12 @@ class JewelryMarketplaceApp:
         # Create gradient background
         self.canvas = tk.Canvas(self.root, highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
-        self.create_gradient()
+        self.gradient = GradientBackground(self.root, self.canvas, "#4CCDC4", "#FF1C1B")  # Teal to coral
+        self.gradient.draw()
         
         # Add logo
         self.add_logo()
         
-        # Initialize databases
-        self.create_databases()
-        
         # Initialize user state
         self.current_user = None
         self.cart = []
@@ -81,44 +93,21 @@ class JewelryMarketplaceApp:
         self.setup_admin_frame()
         
         # Bind window resize to update gradient
-        self.root.bind('<Configure>', self.create_gradient)
-
-    def create_gradient(self, event=None):
-        """Create a gradient background"""
-        self.canvas.delete("gradient")
-        width = self.canvas.winfo_width() or self.root.winfo_width()
-        height = self.canvas.winfo_height() or self.root.winfo_height()
-        
-        # Gradient colors
-        color1 = "#4CCDC4"  # Teal
-        color2 = "#FF1C1B"  # Coral
-        
-        # Create gradient
-        for i in range(height):
-            r1, g1, b1 = [int(x) for x in self.canvas.winfo_rgb(color1)]
-            r2, g2, b2 = [int(x) for x in self.canvas.winfo_rgb(color2)]
-            r = int(r1 + (r2 - r1) * i / height)
-            g = int(g1 + (g2 - g1) * i / height)
-            b = int(b1 + (b2 - b1) * i / height)
-            color = f'#{r:02x}{g:02x}{b:02x}'
-            self.canvas.create_line(0, i, width, i, fill=color, tags="gradient")
-
-        # Update logo position
-        if hasattr(self, 'logo_label'):
-            self.logo_label.place(relx=0.5, rely=0.05, anchor="center")
+        self.gradient.bind()
+        
+        profiler.mark("widget construction")
 
     def add_logo(self):
         """Add logo image on top of gradient"""
         try:
-            logo_path = "logo.png"
-            logo_image = Image.open(logo_path)
-            logo_image = logo_image.resize((150, 50), Image.Resampling.LANCZOS)
-            self.logo_photo = ImageTk.PhotoImage(logo_image)
+            # Decode the logo once and pre-render every hover scale
+            self.image_cache = ImageAssetCache(self.root)
+            self.logo_photo, _ = self.image_cache.prerender(LOGO_PATH, LOGO_SIZE, (1.0, LOGO_HOVER_SCALE))
             
             self.logo_label = tk.Label(self.canvas, image=self.logo_photo, bg="#FFFFFF", bd=0)
             self.logo_label.place(relx=0.5, rely=0.05, anchor="center")
             
-            self.logo_label.bind("<Enter>", lambda e: self.logo_label.config(cursor="hand2", image=self.scale_logo(1.1)))
+            self.logo_label.bind("<Enter>", lambda e: self.logo_label.config(cursor="hand2", image=self.scale_logo(LOGO_HOVER_SCALE)))
             self.logo_label.bind("<Leave>", lambda e: self.logo_label.config(cursor="", image=self.logo_photo))
             
         except Exception as e:
@@ -128,11 +117,7 @@ class JewelryMarketplaceApp:
 
     def scale_logo(self, scale):
         """Scale logo image for hover effect"""
-        logo_image = Image.open("logo.png")
-        original_size = (150, 50)
-        new_size = (int(original_size[0] * scale), int(original_size[1] * scale))
-        logo_image = logo_image.resize(new_size, Image.Resampling.LANCZOS)
-        scaled_photo = ImageTk.PhotoImage(logo_image)
+        scaled_photo = self.image_cache.get(LOGO_PATH, LOGO_SIZE, scale)
         # Keep a reference to prevent garbage collection
         self.logo_label.scaled_photo = scaled_photo
         return scaled_photo
@@ -178,7 +163,7 @@ class JewelryMarketplaceApp:
     def create_databases(self):
         """Create the main and hashed passwords databases"""
         # Main database
-        self.conn = sqlite3.connect("jewelry_marketplace.db")
+        self.conn = connect(MAIN_DB)
         self.cur = self.conn.cursor()
         
         # Check if Users table exists
@@ -192,8 +177,11 @@ class JewelryMarketplaceApp:
             admin_exists = self.cur.fetchone()
         
         # Hashed passwords database
-        self.hash_conn = sqlite3.connect("hashed_passwords.db")
+        self.hash_conn = connect(HASH_DB)
         self.hash_cur = self.hash_conn.cursor()
+        for conn in (self.conn, self.hash_conn):
+            for problem in health_check(conn):
+                print(f"Database health check: {problem}")
         
         # Check if HashedPasswords table exists
         self.hash_cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='HashedPasswords'")
@@ -225,6 +213,23 @@ class JewelryMarketplaceApp:
                     self.cur.execute("DROP TABLE IF EXISTS Products")
                     self.cur.execute("DROP TABLE IF EXISTS Categories")
                     self.cur.execute("DROP TABLE IF EXISTS Users")
+                    # Summary rows are backfilled from the recreated tables by migration 7
+                    self.cur.execute("DROP TABLE IF EXISTS RatingSummary")
+                    # Migration-created tables go too, so replaying from version 0 does not
+                    # collide with their old columns (migration 12 adds SmsOutbox.claimed_at)
+                    self.cur.execute("DROP TABLE IF EXISTS SmsOutbox")
+                    self.cur.execute("DROP TABLE IF EXISTS ChangeLog")
+                    self.cur.execute("DROP TABLE IF EXISTS ProductSearch")
+                    self.cur.execute("DROP TABLE IF EXISTS SetSearch")
+                    # Migration 10 backfills with INSERT OR IGNORE, so surviving rollup rows
+                    # would keep the old orders' revenue
+                    self.cur.execute("DROP TABLE IF EXISTS SalesDaily")
+                    self.cur.execute("DROP TABLE IF EXISTS SalesByCategory")
+                    self.cur.execute("DROP TABLE IF EXISTS SalesByItem")
+                    # Export marks name order ids, which restart with the recreated Orders
+                    self.cur.execute("DROP TABLE IF EXISTS OrderExports")
+                    # Recreated tables need their migrations applied again
+                    self.cur.execute("PRAGMA user_version = 0")
                 if hashed_db_exists:
                     self.hash_cur.execute("DROP TABLE IF EXISTS HashedPasswords")
                 
@@ -253,32 +258,11 @@ class JewelryMarketplaceApp:
             self.conn.commit()
             self.hash_conn.commit()
             print("Databases created and initialized with sample data.")
-
-    def hash_password(self, password):
-        """Hash password using SHA-256"""
-        return hashlib.sha256(password.encode()).hexdigest()
-
-    def store_hashed_password(self, user_id, password):
-        """Store hashed password in separate database"""
-        hashed_password = self.hash_password(password)
-        self.hash_cur.execute("""
-            INSERT OR REPLACE INTO HashedPasswords (user_id, hashed_password)
-            VALUES (?, ?)
-        """, (user_id, hashed_password))
-        self.hash_conn.commit()
-
-    def send_sms(self, to_number, message):
-        """Send SMS using Twilio"""
-        try:
-            message = self.twilio_client.messages.create(
-                body=message,
-                from_=self.twilio_from_number,
-                to=to_number
-            )
-            print(f"SMS sent successfully: {message.sid}")
-        except TwilioRestException as e:
-            print(f"Failed to send SMS: {e}")
-            messagebox.showerror("Error", "Failed to send SMS notification")
+        
+        migrate(self.conn)
+        # Logins, registrations and password changes share AccountService with the
+        # other front ends; they run on worker threads so hashing never blocks the UI
+        self.db = DatabaseExecutor(self.root, MAIN_DB)
 
     def setup_login_frame(self):
         """Setup the login frame"""
@@ -549,91 +533,74 @@ class JewelryMarketplaceApp:
         ttk.Button(frame, text="Update Order Status", command=self.update_order_status).grid(row=8, column=0, pady=10, padx=10)
 
     def login(self):
-        """Handle user login using hashed password"""
+        """Handle user login; the password is checked on a worker so the KDF never blocks the UI"""
         username = self.username_entry.get()
-        password = self.password_entry.get()
-        hashed_password = self.hash_password(password)
-        
-        self.cur.execute("SELECT * FROM Users WHERE username = ?", (username,))
-        user = self.cur.fetchone()
-        
+        self.status_var.set("Signing in...")
+        # Verifies scrypt and legacy SHA-256 hashes alike, upgrading the latter
+        self.db.submit(lambda conn, password: AccountService(conn).login(username, password),
+                       self.password_entry.get(),
+                       on_done=lambda user: self.finish_login(username, user),
+                       on_error=lambda e: messagebox.showerror("Login Failed", f"Could not sign in: {e}"),
+                       key="login")
+
+    def finish_login(self, username, user):
+        """Open the shop for a logged-in user, or report bad credentials"""
         if user:
-            self.hash_cur.execute("SELECT hashed_password FROM HashedPasswords WHERE user_id = ?", (user[0],))
-            stored_hash = self.hash_cur.fetchone()
+            self.current_user = user
+            self.notebook.add(self.products_frame, text="Products")
+            self.notebook.add(self.sets_frame, text="Sets")
+            self.notebook.add(self.cart_frame, text="Cart")
+            self.notebook.add(self.orders_frame, text="Orders")
+            self.notebook.add(self.profile_frame, text="Profile")
             
-            if stored_hash and stored_hash[0] == hashed_password:
-                self.current_user = user
-                self.notebook.add(self.products_frame, text="Products")
-                self.notebook.add(self.sets_frame, text="Sets")
-                self.notebook.add(self.cart_frame, text="Cart")
-                self.notebook.add(self.orders_frame, text="Orders")
-                self.notebook.add(self.profile_frame, text="Profile")
-                
-                if username == "admin" and password == "admin123":
-                    self.notebook.add(self.admin_frame, text="Admin")
-                
-                self.notebook.forget(self.login_frame)
-                self.notebook.forget(self.register_frame)
-                self.status_var.set(f"Welcome, {user[4]} {user[5]}")
-                self.load_products()
-                self.load_sets()
-                self.load_orders()
-                self.load_profile()
-            else:
-                messagebox.showerror("Login Failed", "Invalid username or password")
+            if username == ADMIN_USERNAME:
+                self.notebook.add(self.admin_frame, text="Admin")
+            
+            self.notebook.forget(self.login_frame)
+            self.notebook.forget(self.register_frame)
+            self.status_var.set(f"Welcome, {user[4]} {user[5]}")
+            self.load_products()
+            self.load_sets()
+            self.load_orders()
+            self.load_profile()
         else:
+            self.status_var.set("Welcome to Jewelry Marketplace")
             messagebox.showerror("Login Failed", "Invalid username or password")
 
     def register(self):
-        """Handle user registration with SMS notification"""
-        username = self.reg_username.get()
-        password = self.reg_password.get()
-        confirm_password = self.reg_confirm_password.get()
-        email = self.reg_email.get()
-        firstname = self.reg_firstname.get()
-        lastname = self.reg_lastname.get()
-        address = self.reg_address.get()
-        phone = self.reg_phone.get()
-        
-        # Validation
-        if not all([username, password, email, firstname, lastname, address, phone]):
-            messagebox.showerror("Error", "All fields are required")
-            return
-        
-        if password != confirm_password:
-            messagebox.showerror("Error", "Passwords do not match")
-            return
-        
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
-            messagebox.showerror("Error", "Invalid email format")
-            return
-        
-        # Phone number validation: must be exactly 10 digits
-        if not (phone.isdigit() and len(phone) == 10):
-            messagebox.showerror("Error", "Phone number must be exactly 10 digits")
-            return
-        
-        full_phone = f"+91{phone}"
-        
-        try:
-            self.cur.execute("""
-                INSERT INTO Users (username, password, email, firstname, lastname, address, phone)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (username, password, email, firstname, lastname, address, full_phone))
-            user_id = self.cur.lastrowid
-            self.conn.commit()
-            
-            # Store hashed password
-            self.store_hashed_password(user_id, password)
-            
-            # Send SMS notification
-            sms_message = f"Welcome to Jewelry Marketplace, {firstname}! Your account has been successfully created."
-            self.send_sms(full_phone, sms_message)
-            
-            messagebox.showinfo("Success", "Registration successful! Please login.")
-            self.notebook.select(0)
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Error", "Username or email already exists")
+        """Handle user registration with SMS notification; hashing runs on a worker like login"""
+        form = Registration(
+            self.reg_username.get(),
+            self.reg_password.get(),
+            self.reg_confirm_password.get(),
+            self.reg_email.get(),
+            self.reg_firstname.get(),
+            self.reg_lastname.get(),
+            self.reg_address.get(),
+            self.reg_phone.get()
+        )
+        
+        # The user, its hash in both stores and the welcome SMS commit
+        # together; the outbox worker delivers the message
+        self.status_var.set("Creating account...")
+        self.db.submit(lambda conn: AccountService(conn).register(form), on_done=self.finish_register,
+                       on_error=self.account_failed)
+
+    def finish_register(self, user_id):
+        """Confirm a registration once its transaction has committed"""
+        self.outbox.wake()
+        self.status_var.set("Welcome to Jewelry Marketplace")
+        messagebox.showinfo("Success", "Registration successful! Please login.")
+        self.notebook.select(0)
+
+    def account_failed(self, error):
+        """Report a failed registration or profile update"""
+        self.status_var.set("Welcome to Jewelry Marketplace" if not self.current_user else
+                            f"Welcome, {self.current_user[4]} {self.current_user[5]}")
+        if isinstance(error, (ValidationError, ConflictError)):
+            messagebox.showerror("Error", str(error))
+        else:
+            messagebox.showerror("Error", f"Database error: {error}")
 
     def load_categories(self):
         """Load categories for product filtering"""
@@ -1154,70 +1121,33 @@ class JewelryMarketplaceApp:
         self.profile_phone.insert(0, self.current_user[7])
 
     def update_profile(self):
-        """Update user profile"""
+        """Update user profile; a new password is hashed on a worker"""
         if not self.current_user:
             return
         
-        email = self.profile_email.get()
-        firstname = self.profile_firstname.get()
-        lastname = self.profile_lastname.get()
-        address = self.profile_address.get()
-        phone = self.profile_phone.get()
-        password = self.profile_password.get()
-        confirm_password = self.profile_confirm_password.get()
-        
-        if not all([email, firstname, lastname, address, phone]):
-            messagebox.showerror("Error", "All fields are required")
-            return
-        
-        if password and password != confirm_password:
-            messagebox.showerror("Error", "Passwords do not match")
-            return
-        
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
-            messagebox.showerror("Error", "Invalid email format")
-            return
-        
-        # Validate phone number format
-        phone_digits = phone.replace('+91', '') if phone.startswith('+91') else phone
-        if not (phone_digits.isdigit() and len(phone_digits) == 10):
-            messagebox.showerror("Error", "Phone number must be exactly 10 digits")
-            return
-        
-        full_phone = f"+91{phone_digits}"
-        
-        try:
-            update_query = """
-                UPDATE Users
-                SET email = ?, firstname = ?, lastname = ?, address = ?, phone = ?
-                WHERE id = ?
-            """
-            params = [email, firstname, lastname, address, full_phone, self.current_user[0]]
-            
-            if password:
-                update_query = """
-                    UPDATE Users
-                    SET email = ?, firstname = ?, lastname = ?, address = ?, phone = ?, password = ?
-                    WHERE id = ?
-                """
-                params = [email, firstname, lastname, address, full_phone, password, self.current_user[0]]
-                
-                # Update hashed password
-                self.store_hashed_password(self.current_user[0], password)
-            
-            self.cur.execute(update_query, params)
-            self.conn.commit()
-            
-            self.cur.execute("SELECT * FROM Users WHERE id = ?", (self.current_user[0],))
-            self.current_user = self.cur.fetchone()
-            
-            messagebox.showinfo("Success", "Profile updated successfully")
-            self.profile_password.delete(0, tk.END)
-            self.profile_confirm_password.delete(0, tk.END)
-            self.status_var.set(f"Welcome, {self.current_user[4]} {self.current_user[5]}")
-            
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Error", "Email already exists")
+        update = ProfileUpdate(
+            self.profile_email.get(),
+            self.profile_firstname.get(),
+            self.profile_lastname.get(),
+            self.profile_address.get(),
+            self.profile_phone.get(),
+            self.profile_password.get(),
+            self.profile_confirm_password.get()
+        )
+        
+        # A new password is hashed into Users and the credential store together
+        self.status_var.set("Saving profile...")
+        self.db.submit(lambda conn, user_id: AccountService(conn).update_profile(user_id, update),
+                       self.current_user[0], on_done=self.finish_update_profile,
+                       on_error=self.account_failed)
+
+    def finish_update_profile(self, user):
+        """Show the saved profile"""
+        self.current_user = user
+        messagebox.showinfo("Success", "Profile updated successfully")
+        self.profile_password.delete(0, tk.END)
+        self.profile_confirm_password.delete(0, tk.END)
+        self.status_var.set(f"Welcome, {self.current_user[4]} {self.current_user[5]}")
 
     def add_product(self):
         """Add new product (admin)"""
@@ -1627,5 +1557,7 @@ class JewelryMarketplaceApp:
 
 if __name__ == "__main__":
     root = tk.Tk()
+    profiler.mark("tk init")
     app = JewelryMarketplaceApp(root)
+    root.after_idle(profiler.finish)
     root.mainloop()
\ No newline at end of file
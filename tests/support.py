@@ -0,0 +1,22 @@
+import os
+import sqlite3
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+from migrations import migrate
+
+SCHEMA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schema.sql")
+
+
+def scratch_db(test):
+    """Connect to an empty, fully migrated marketplace database removed when test ends"""
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    conn = sqlite3.connect(os.path.join(tmp.name, "test.db"))
+    test.addCleanup(conn.close)
+    with open(SCHEMA, "r") as schema_file:
+        conn.executescript(schema_file.read())
+    with redirect_stdout(StringIO()):
+        migrate(conn)
+    return conn
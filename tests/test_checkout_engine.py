@@ -0,0 +1,63 @@
+import unittest
+
+from checkout_engine import CartLine, CheckoutEngine, OutOfStockError
+from tests.support import scratch_db
+
+
+class CheckoutEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = scratch_db(self)
+        self.conn.execute("INSERT INTO Categories (name) VALUES ('Rings')")
+        self.conn.execute("""
+            INSERT INTO Products (name, description, price, stock_quantity, category_id)
+            VALUES ('Ring', '', 999.99, 9, 1)
+        """)
+        self.conn.commit()
+        self.engine = CheckoutEngine(self.conn)
+
+    def stock(self):
+        return self.conn.execute("SELECT stock_quantity FROM Products WHERE id = 1").fetchone()[0]
+
+    def orders(self):
+        return self.conn.execute("SELECT COUNT(*) FROM Orders").fetchone()[0]
+
+    def test_places_order_and_decrements_stock(self):
+        receipt = self.engine.place_order(1, [CartLine("product", 1, 2, 999.99)], "Credit Card")
+        self.assertAlmostEqual(receipt.total, 1999.98)
+        self.assertEqual(self.stock(), 7)
+        self.assertEqual(self.orders(), 1)
+
+    def test_rejects_quantity_below_one(self):
+        for quantity in (0, -5):
+            with self.subTest(quantity=quantity):
+                with self.assertRaises(ValueError):
+                    self.engine.place_order(1, [CartLine("product", 1, quantity, 999.99)], "Credit Card")
+                self.assertEqual(self.stock(), 9)
+                self.assertEqual(self.orders(), 0)
+
+    def test_rejects_negative_line_beside_valid_one(self):
+        lines = [CartLine("product", 1, 2, 999.99), CartLine("product", 1, -2, 999.99)]
+        with self.assertRaises(ValueError):
+            self.engine.place_order(1, lines, "Credit Card")
+        self.assertEqual(self.stock(), 9)
+
+    def test_rejects_unknown_line_type(self):
+        with self.assertRaises(ValueError):
+            self.engine.place_order(1, [CartLine("gift", 1, 1, 1.0)], "Credit Card")
+
+    def test_price_lines_ignores_the_line_price(self):
+        lines = self.engine.price_lines([CartLine("product", 1, 1, 0.01)])
+        self.assertEqual(lines, [CartLine("product", 1, 1, 999.99)])
+        with self.assertRaises(OutOfStockError):
+            self.engine.price_lines([CartLine("set", 1, 1, 0.01)])
+
+    def test_out_of_stock_writes_nothing(self):
+        with self.assertRaises(OutOfStockError) as raised:
+            self.engine.place_order(1, [CartLine("product", 1, 10, 999.99)], "Credit Card")
+        self.assertEqual(raised.exception.shortfalls[0].available, 9)
+        self.assertEqual(self.stock(), 9)
+        self.assertEqual(self.orders(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
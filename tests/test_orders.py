@@ -0,0 +1,59 @@
+import unittest
+
+from marketplace_core import OrderFilter, OrderService, ValidationError, stale_filter
+from marketplace_core.orders import UPDATED
+from tests.support import scratch_db
+
+
+class StaleTransitionTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = scratch_db(self)
+        self.conn.execute("""
+            INSERT INTO Users (username, password, email, firstname, lastname, address, phone)
+            VALUES ('bob', 'x', 'bob@example.com', 'Bob', 'B', '1 Test St', '+910000000000')
+        """)
+        self.orders = OrderService(self.conn)
+
+    def add_order(self, age):
+        """Insert a pending order placed age (an SQLite datetime modifier such as '-47 hours') ago"""
+        return self.conn.execute("""
+            INSERT INTO Orders (user_id, order_date, total_amount, status)
+            VALUES (1, datetime('now', ?), 10, 'pending')
+        """, (age,)).lastrowid
+
+    def test_stale_filter_compares_full_timestamps(self):
+        fresh = self.add_order("-1 day")
+        almost = self.add_order("-47 hours")
+        stale = self.add_order("-49 hours")
+        self.conn.commit()
+
+        results = self.orders.transition_matching(stale_filter("pending", 2), "shipped")
+
+        self.assertEqual([(result.order_id, result.outcome) for result in results], [(stale, UPDATED)])
+        statuses = self.orders.current_statuses([fresh, almost, stale])
+        self.assertEqual(statuses, {fresh: "pending", almost: "pending", stale: "shipped"})
+
+    def test_zero_days_matches_every_order_in_status(self):
+        self.add_order("-1 minute")
+        self.conn.commit()
+        self.assertEqual(self.orders.count_all_orders(stale_filter("pending", 0)), 1)
+        self.assertEqual(self.orders.count_all_orders(OrderFilter("shipped", min_age_days=0)), 0)
+
+    def test_stale_filter_validates(self):
+        for status, days in (("lost", 2), ("pending", "two"), ("pending", -1), ("pending", "")):
+            with self.subTest(status=status, days=days):
+                with self.assertRaises(ValidationError):
+                    stale_filter(status, days)
+
+    def test_empty_selection_moves_nothing(self):
+        order_id = self.add_order("-3 days")
+        self.conn.commit()
+        with self.assertRaises(ValidationError):
+            self.orders.transition_orders([], "shipped")
+        with self.assertRaises(ValidationError):
+            self.orders.transition_matching(OrderFilter(), "shipped")
+        self.assertEqual(self.orders.current_statuses([order_id]), {order_id: "pending"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,21 @@
+import unittest
+
+from benchmarks.check_query_plans import check_plans, normalize, seed
+from tests.support import scratch_db
+
+
+class QueryPlanTest(unittest.TestCase):
+    """The check_query_plans gate at a scale small enough for every test run"""
+
+    def test_shipped_queries_avoid_scans_and_temp_sorts(self):
+        conn = scratch_db(self)
+        seed(conn, 2000)
+
+        failures = [f"{location}: {normalize(sql)} -> {'; '.join(problems)}"
+                    for location, sql, _, problems, allowed in check_plans(conn) if problems and allowed is None]
+
+        self.assertEqual(failures, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
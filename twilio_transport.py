@@ -0,0 +1,24 @@
+import os
+
+from twilio.rest import Client
+from twilio.base.exceptions import TwilioRestException
+
+from backends import load_environment
+from sms_outbox import TransportError
+
+
+class TwilioTransport:
+    """Deliver SMS through the Twilio REST API"""
+
+    def __init__(self):
+        load_environment()
+        self.client = Client(os.getenv('TWILIO_ACCOUNT_SID'), os.getenv('TWILIO_AUTH_TOKEN'))
+        self.from_number = os.getenv('TWILIO_PHONE_NUMBER')
+
+    def send(self, to_number, body):
+        """Send one message and return the provider message id"""
+        try:
+            message = self.client.messages.create(body=body, from_=self.from_number, to=to_number)
+        except TwilioRestException as e:
+            raise TransportError(str(e)) from e
+        return message.sid
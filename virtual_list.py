@@ -0,0 +1,260 @@
+import tkinter as tk
+from collections import deque
+from tkinter import ttk, messagebox
+
+
+class VirtualList(ttk.Frame):
+    """Treeview that keeps only a sliding window of pages materialized.
+
+    Rows come from fetch_page(cursor, limit), which returns (rows, next_cursor)
+    and next_cursor None on the last page. Pages are fetched as the user
+    scrolls towards either end of the window, and pages that fall out of the
+    window are removed from the Treeview again.
+
+    With a db_executor.DatabaseExecutor, fetch_page(conn, cursor, limit) runs
+    on a worker thread instead; the list shows a loading label meanwhile, and
+    a reload supersedes any page still being fetched.
+    """
+
+    def __init__(self, parent, columns, fetch_page, page_size=100, max_pages=3,
+                 row_id=None, format_row=None, xscroll=False, executor=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.fetch_page = fetch_page
+        self.executor = executor
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.row_id = row_id or (lambda row: row[0])
+        self.format_row = format_row or (lambda row: row)
+
+        self.tree = ttk.Treeview(self, columns=[col for col, _, _ in columns], show="headings")
+        for col, heading, width in columns:
+            self.tree.heading(col, text=heading)
+            self.tree.column(col, width=width)
+
+        self.y_scroll = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.on_yscroll)
+        if xscroll:
+            x_scroll = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.tree.xview)
+            self.tree.configure(xscrollcommand=x_scroll.set)
+            x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.loading_label = ttk.Label(self, text="Loading...")
+
+        self.loading = False
+        self.reset()
+
+    def reset(self):
+        """Forget every materialized row and page cursor"""
+        self.tree.delete(*self.tree.get_children())
+        # page_cursors[i] is the cursor that fetches page i
+        self.page_cursors = [None]
+        # Materialized pages, each a list of Treeview item ids, first_page first
+        self.pages = deque()
+        self.first_page = 0
+        self.at_end = False
+        self.rows = {}
+        self.check_pending = False
+        self.set_loading(False)
+
+    def reload(self):
+        """Discard the window and load the first page again"""
+        self.reset()
+        self.tree.yview_moveto(0)
+        self.load_next()
+
+    def fetch(self, cursor, on_done):
+        """Fetch one page inline, or on the executor when the list has one"""
+        if self.executor is None:
+            on_done(*self.fetch_page(cursor, self.page_size))
+            return
+
+        def done(result):
+            if self.winfo_exists():
+                self.set_loading(False)
+                on_done(*result)
+
+        def failed(error):
+            if self.winfo_exists():
+                self.set_loading(False)
+                messagebox.showerror("Error", f"Database error: {error}", parent=self)
+
+        self.set_loading(True)
+        # Keyed on the list, so a reload drops a page that is still loading
+        self.executor.submit(self.fetch_page, cursor, self.page_size,
+                             on_done=done, on_error=failed, key=self)
+
+    def set_loading(self, loading):
+        """Show or hide the loading label"""
+        self.loading = loading
+        if loading:
+            self.loading_label.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
+        else:
+            self.loading_label.place_forget()
+
+    def on_yscroll(self, first, last):
+        """Update the scrollbar and grow the window when nearing either end"""
+        self.y_scroll.set(first, last)
+        if not self.check_pending:
+            self.check_pending = True
+            self.after_idle(self.check_window)
+
+    def check_window(self):
+        """Load the next or previous page if the view is close to an edge"""
+        self.check_pending = False
+        total = len(self.tree.get_children())
+        if not total or self.loading:
+            return
+        first, last = self.tree.yview()
+        margin = self.page_size // 4
+        if not self.at_end and last * total >= total - margin:
+            self.load_next()
+        elif self.first_page > 0 and first * total <= margin:
+            self.load_previous()
+
+    def load_next(self):
+        """Append the page after the window, dropping the first page if needed"""
+        page_index = self.first_page + len(self.pages)
+        self.fetch(self.page_cursors[page_index],
+                   lambda rows, next_cursor: self.append_page(page_index, rows, next_cursor))
+
+    def append_page(self, page_index, rows, next_cursor):
+        """Add a fetched page after the window"""
+        if len(self.page_cursors) == page_index + 1:
+            self.page_cursors.append(next_cursor)
+        self.at_end = next_cursor is None
+        if not rows:
+            self.at_end = True
+            return
+
+        self.pages.append(self.insert_rows(tk.END, rows))
+        if len(self.pages) > self.max_pages:
+            self.drop_page(first=True)
+
+    def load_previous(self):
+        """Prepend the page before the window, dropping the last page if needed"""
+        page_index = self.first_page - 1
+        self.fetch(self.page_cursors[page_index],
+                   lambda rows, _: self.prepend_page(page_index, rows))
+
+    def prepend_page(self, page_index, rows):
+        """Add a fetched page before the window"""
+        top = self.top_index()
+        items = self.insert_rows(0, rows)
+        self.pages.appendleft(items)
+        self.first_page = page_index
+        self.scroll_to_index(top + len(items))
+        if len(self.pages) > self.max_pages:
+            self.drop_page(first=False)
+
+    def drop_page(self, first):
+        """Remove the first or last materialized page from the Treeview"""
+        top = self.top_index()
+        items = self.pages.popleft() if first else self.pages.pop()
+        self.tree.delete(*items)
+        for item in items:
+            self.rows.pop(item, None)
+        if first:
+            self.first_page += 1
+            self.scroll_to_index(top - len(items))
+        else:
+            self.at_end = False
+
+    def insert_rows(self, index, rows):
+        """Insert rows starting at index and return their Treeview item ids"""
+        items = []
+        for row in rows:
+            item = str(self.row_id(row))
+            # A row can reappear on the next page if the data moved underneath us
+            if item in self.rows:
+                continue
+            self.rows[item] = row
+            self.tree.insert("", index, iid=item, values=self.format_row(row))
+            if index != tk.END:
+                index += 1
+            items.append(item)
+        return items
+
+    def apply_changes(self, ids, fetch_row, sort_key, descending=False):
+        """Patch the window for changed row ids instead of reloading it.
+
+        fetch_row(id) returns the row as the listing would show it now, or None
+        if it was deleted or no longer matches; sort_key(row) is its position
+        in the listing order. Rows outside the window are left to paging.
+        """
+        for row_id in ids:
+            item = str(row_id)
+            row = fetch_row(row_id)
+            old = self.rows.get(item)
+            if old is not None:
+                if row is not None and sort_key(row) == sort_key(old):
+                    self.rows[item] = row
+                    self.tree.item(item, values=self.format_row(row))
+                    continue
+                self.remove_item(item)
+            if row is not None:
+                self.place_row(row, sort_key, descending)
+
+    def remove_item(self, item):
+        """Remove one materialized row from the Treeview and its page"""
+        for page in self.pages:
+            if item in page:
+                page.remove(item)
+                break
+        self.rows.pop(item, None)
+        self.tree.delete(item)
+
+    def place_row(self, row, sort_key, descending):
+        """Insert a row at its sorted position if it falls inside the window"""
+        if not self.pages:
+            if not self.at_end:
+                return
+            self.pages.append([])
+
+        def before(a, b):
+            return a > b if descending else a < b
+
+        key = sort_key(row)
+        keys = [sort_key(self.rows[item]) for item in self.tree.get_children()]
+        # Rows sorting before the first page or after an unloaded next page
+        # are not materialized; paging picks them up when scrolled to
+        if keys and ((self.first_page > 0 and before(key, keys[0]))
+                     or (not self.at_end and before(keys[-1], key))):
+            return
+
+        low, high = 0, len(keys)
+        while low < high:
+            mid = (low + high) // 2
+            if before(keys[mid], key):
+                low = mid + 1
+            else:
+                high = mid
+
+        offset = low
+        for page in self.pages:
+            if offset <= len(page):
+                break
+            offset -= len(page)
+        item = str(self.row_id(row))
+        self.rows[item] = row
+        self.tree.insert("", low, iid=item, values=self.format_row(row))
+        page.insert(offset, item)
+
+    def top_index(self):
+        """Index of the first visible row"""
+        return round(self.tree.yview()[0] * len(self.tree.get_children()))
+
+    def scroll_to_index(self, index):
+        """Scroll so the row at index is the first visible row"""
+        total = len(self.tree.get_children())
+        if total:
+            self.tree.yview_moveto(max(0, index) / total)
+
+    def selection(self):
+        """Return the selected Treeview item ids"""
+        return self.tree.selection()
+
+    def selected_row(self):
+        """Return the source row of the first selected item, or None"""
+        selected = self.tree.selection()
+        return self.rows.get(selected[0]) if selected else None